@@ -1,5 +1,6 @@
 # app.py - Main application entry point
 import os
+import click
 from app import create_app
 from app.extensions import db
 
@@ -46,6 +47,126 @@ def create_admin():
     
     print(f"Admin user '{username}' created successfully!")
 
+@app.cli.command('import-bookings')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Defaults to the file extension')
+@click.option('--chunk-size', default=1000, show_default=True, help='Rows per insert transaction')
+@click.option('--report', 'report_path', type=click.Path(dir_okay=False), help='Write the per-row error report as JSON')
+def import_bookings(path, fmt, chunk_size, report_path):
+    """Bulk import bookings from a CSV or JSONL file"""
+    from app.services.booking_service import BookingService
+    import json
+    
+    fmt = fmt or ('jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else 'csv')
+    with open(path, 'rb') as stream:
+        report = BookingService.import_bookings(
+            BookingService.parse_import_rows(stream, fmt),
+            chunk_size=chunk_size
+        )
+    
+    print(f"Imported {report['imported']} of {report['total']} bookings ({report['failed']} failed)")
+    if report_path:
+        with open(report_path, 'w') as output:
+            json.dump(report['errors'], output, indent=2)
+        print(f"Error report written to {report_path}")
+    else:
+        for error in report['errors'][:20]:
+            print(f"  row {error['row']}: {'; '.join(error['errors'])}")
+        if len(report['errors']) > 20:
+            print(f"  ... {len(report['errors']) - 20} more (use --report)")
+
+@app.cli.command('sync-calendar')
+@click.option('--retry-failed', is_flag=True, help='Re-queue outbox rows that exhausted their retries')
+def sync_calendar(retry_failed):
+    """Drain the Google Calendar outbox until nothing is due"""
+    from app.services.calendar_sync import calendar_sync
+    from app.models import CalendarOutbox
+    from datetime import datetime
+    
+    if retry_failed:
+        requeued = CalendarOutbox.query.filter_by(status='failed').update(
+            {'status': 'pending', 'attempts': 0, 'next_attempt_at': datetime.utcnow()}
+        )
+        db.session.commit()
+        print(f"Re-queued {requeued} failed outbox rows")
+    
+    totals = {'bookings': 0, 'synced': 0, 'retried': 0, 'failed': 0}
+    while True:
+        stats = calendar_sync.drain()
+        if not stats['claimed']:
+            break
+        # Retried rows are not due again yet, so this ends once the backlog is through
+        for key in totals:
+            totals[key] += stats[key]
+    
+    print(f"Synced {totals['synced']} bookings ({totals['retried']} retrying later, {totals['failed']} failed)")
+
+@app.cli.command('rebuild-capacity')
+def rebuild_capacity():
+    """Recompute destination capacity running totals from bookings"""
+    from app.services.capacity_service import CapacityService
+    
+    dates = CapacityService.rebuild()
+    print(f"Rebuilt booked totals for {dates} destination dates")
+
+@app.cli.command('rollup-visits')
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']), help='First day to rebuild (default: yesterday)')
+@click.option('--until', type=click.DateTime(formats=['%Y-%m-%d']), help='Day after the last one to rebuild (default: today)')
+def rollup_visits(since, until):
+    """Rebuild hourly/daily visit rollups and visitor sketches for closed days from site_visits"""
+    from app.services.visit_rollups import VisitRollupService
+    from app.services.visitor_sketches import VisitorSketchService
+    from app.services.visit_partitions import visit_partitions
+    from datetime import datetime, timedelta
+    
+    until = until.date() if until else datetime.utcnow().date()
+    since = since.date() if since else until - timedelta(days=1)
+    if since >= until:
+        raise click.BadParameter('--since must be before --until')
+    
+    # Compacted months have no raw visits left; rebuilding them would empty their rollups
+    raw_since = visit_partitions.raw_since()
+    if raw_since and since < raw_since:
+        print(f"Raw visits start at {raw_since}; keeping the rollups before it")
+        since = raw_since
+        if since >= until:
+            return
+    
+    total = VisitRollupService.rebuild(since, until)
+    VisitorSketchService.rebuild(since, until)
+    print(f"Rolled up {total} visits from {since} to {until}")
+
+@app.cli.command('compact-visits')
+@click.option('--retention-months', type=click.IntRange(min=1), help='Months of raw visits to keep (default: VISIT_RETENTION_MONTHS)')
+def compact_visits(retention_months):
+    """Roll up and drop site_visits partitions older than the retention window"""
+    from app.services.visit_partitions import visit_partitions
+    
+    summary = visit_partitions.compact(retention_months=retention_months)
+    if not summary['dropped']:
+        print(f"Nothing to compact before {summary['cutoff']}")
+        return
+    print(f"Rolled up {summary['visits']} visits and dropped {', '.join(summary['dropped'])}")
+
+@app.cli.command('reconcile-revenue')
+@click.option('--fix', is_flag=True, help='Replace the ledger with totals recomputed from bookings')
+def reconcile_revenue(fix):
+    """Check the monthly revenue ledger against the bookings"""
+    from app.services.revenue_ledger import RevenueLedger
+    
+    mismatches = RevenueLedger.reconcile(fix=fix)
+    if not mismatches:
+        print("Revenue ledger matches bookings")
+        return
+    
+    for mismatch in mismatches:
+        (expected, expected_count), (recorded, recorded_count) = mismatch['expected'], mismatch['recorded']
+        print(f"{mismatch['month']:%Y-%m}: ledger {recorded} ({recorded_count} bookings), "
+              f"bookings {expected} ({expected_count} bookings)")
+    if not fix:
+        raise click.ClickException(f"{len(mismatches)} months differ; run with --fix to rebuild the ledger")
+    print(f"Rebuilt the ledger for {len(mismatches)} months")
+
 if __name__ == '__main__':
     # For development
     debug_mode = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
@@ -1,5 +1,6 @@
 # app/__init__.py - Fixed Flask application factory
 from flask import Flask
+from celery import Celery, Task
 from config import config_by_name
 from app.extensions import db, migrate, cors, limiter
 from app.routes import public_bp, admin_bp, auth_bp
@@ -22,6 +23,8 @@ def create_app(config_name='development'):
     
     limiter.init_app(app)
     
+    celery_init_app(app)
+    
     # Register blueprints
     app.register_blueprint(public_bp, url_prefix='/api')
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
@@ -31,5 +34,41 @@ def create_app(config_name='development'):
     from app.utils.helpers import register_error_handlers
     register_error_handlers(app)
     
+    # In-process caches and write-behind buffers
+    from app.services.catalog_service import catalog_cache
+    from app.services.view_counter import view_counter
+    from app.services.reference_allocator import reference_allocator
+    from app.services.visit_recorder import visit_recorder
+    from app.services.visit_partitions import visit_partitions
+    from app.services.funnel_service import funnel_counter
+    catalog_cache.init_app(app)
+    view_counter.init_app(app)
+    reference_allocator.init_app(app)
+    visit_recorder.init_app(app)
+    visit_partitions.init_app(app)
+    funnel_counter.init_app(app)
+    
+    from app.services.analytics_service import AnalyticsService
+    AnalyticsService.init_app(app)
+    
+    # Google Calendar sync outbox
+    from app.services.calendar_sync import calendar_sync
+    calendar_sync.init_app(app)
+    
     return app
-    
\ No newline at end of file
+
+def celery_init_app(app):
+    """Create the Celery app; every task runs inside a Flask app context"""
+    class FlaskTask(Task):
+        def __call__(self, *args, **kwargs):
+            with app.app_context():
+                return self.run(*args, **kwargs)
+    
+    celery_app = Celery(app.name, task_cls=FlaskTask)
+    celery_app.config_from_object(app.config['CELERY'])
+    celery_app.set_default()
+    app.extensions['celery'] = celery_app
+    
+    # Register tasks
+    from app import tasks  # noqa: F401
+    return celery_app
@@ -1,11 +1,10 @@
 # app/models.py - Database models
 from app.extensions import db
+from app.utils.helpers import parse_price_range, parse_duration_days
+from sqlalchemy.orm import validates
 from datetime import datetime
-import uuid
 import bcrypt
 import json
-import secrets
-import string
 class Admin(db.Model):
     __tablename__ = 'admins'
     
@@ -25,6 +24,11 @@ class Admin(db.Model):
 
 class Booking(db.Model):
     __tablename__ = 'bookings'
+    __table_args__ = (
+        # Keyset pagination order, overall and per status
+        db.Index('ix_bookings_created_at_id', 'created_at', 'id'),
+        db.Index('ix_bookings_status_created_at_id', 'status', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     booking_reference = db.Column(db.String(20), unique=True, nullable=False)
@@ -32,7 +36,7 @@ class Booking(db.Model):
     email = db.Column(db.String(120), nullable=False)
     phone = db.Column(db.String(20))
     destination = db.Column(db.String(100))
-    preferred_date = db.Column(db.Date)
+    preferred_date = db.Column(db.Date, index=True)
     guests = db.Column(db.Integer, default=1)
     message = db.Column(db.Text)
     status = db.Column(db.String(20), default='pending')  # pending, confirmed, cancelled, completed
@@ -44,28 +48,15 @@ class Booking(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def generate_reference(self):
-        """Generate unique booking reference"""
-        # Use current timestamp and random string for uniqueness
-        timestamp = datetime.now().strftime('%y%m%d')  # YYMMDD format
-        # Generate random 4-character string
-        random_part = ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(4))
-        return f"RT{timestamp}{random_part}"
+        """Generate unique booking reference (RT{YYMMDD}XXXX)"""
+        from app.services.reference_allocator import reference_allocator
+        return reference_allocator.allocate()
 
     @staticmethod
     def generate_unique_reference():
-        """Generate a unique booking reference, checking database for uniqueness"""
-        max_attempts = 10
-        for _ in range(max_attempts):
-            # Create a temporary booking instance to use the method
-            temp_booking = Booking()
-            reference = temp_booking.generate_reference()
-            
-            # Check if this reference already exists
-            if not Booking.query.filter_by(booking_reference=reference).first():
-                return reference
-        
-        # Fallback: use UUID if we can't generate unique reference
-        return f"RT{datetime.now().strftime('%y%m%d')}{str(uuid.uuid4())[:6].upper()}"
+        """Generate a unique booking reference without querying bookings"""
+        from app.services.reference_allocator import reference_allocator
+        return reference_allocator.allocate()
 
     def to_dict(self):
         return {
@@ -87,6 +78,38 @@ class Booking(db.Model):
     def __repr__(self):
         return f'<Booking {self.booking_reference}: {self.name}>'
 
+class CalendarOutbox(db.Model):
+    """A booking whose Google Calendar event needs syncing.
+    
+    Rows are written in the same transaction as the booking change. The
+    sync worker derives the operation from the booking's state when it
+    drains, so several rows for one booking collapse into one API call.
+    Rows are deleted once synced; `failed` rows have exhausted their retries.
+    """
+    __tablename__ = 'calendar_outbox'
+    __table_args__ = (
+        db.Index('ix_calendar_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id', ondelete='CASCADE'), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_by = db.Column(db.String(32))
+    claimed_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    booking = db.relationship('Booking')
+
+class ReferenceBlock(db.Model):
+    """Per-day high-water mark for booking reference sequence blocks"""
+    __tablename__ = 'booking_reference_blocks'
+    
+    day = db.Column(db.String(6), primary_key=True)  # YYMMDD
+    next_value = db.Column(db.Integer, nullable=False, default=0)
+
 class Destination(db.Model):
     __tablename__ = 'destinations'
     
@@ -98,14 +121,29 @@ class Destination(db.Model):
     duration = db.Column(db.String(50))
     highlights = db.Column(db.Text)  # JSON string
     price_range = db.Column(db.String(50))
-    difficulty_level = db.Column(db.String(20))  # easy, moderate, challenging
+    difficulty_level = db.Column(db.String(20), index=True)  # easy, moderate, challenging
     best_time_to_visit = db.Column(db.String(100))
     is_featured = db.Column(db.Boolean, default=False)
     is_active = db.Column(db.Boolean, default=True)
     view_count = db.Column(db.Integer, default=0)
+    # Numeric facets derived from price_range / duration
+    min_price = db.Column(db.Integer, index=True)
+    max_price = db.Column(db.Integer, index=True)
+    duration_days = db.Column(db.Integer, index=True)
+    daily_capacity = db.Column(db.Integer)  # guests per date; None means no limit
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    @validates('price_range')
+    def _sync_price_facets(self, key, value):
+        self.min_price, self.max_price = parse_price_range(value)
+        return value
+
+    @validates('duration')
+    def _sync_duration_facet(self, key, value):
+        self.duration_days = parse_duration_days(value)
+        return value
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -123,6 +161,24 @@ class Destination(db.Model):
             'created_at': self.created_at.isoformat()
         }
 
+    def to_json(self):
+        """Encoded JSON fragment with the same fields as to_dict()"""
+        return json.dumps(self.to_dict(), separators=(',', ':')).encode('utf-8')
+
+class DestinationCapacity(db.Model):
+    """Running total of guests booked per destination and date.
+    
+    `booked` is maintained on every booking write (see capacity_service),
+    so availability never sums bookings. `capacity` overrides the
+    destination's daily_capacity for this date.
+    """
+    __tablename__ = 'destination_capacity'
+    
+    destination_id = db.Column(db.Integer, db.ForeignKey('destinations.id', ondelete='CASCADE'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    capacity = db.Column(db.Integer)
+    booked = db.Column(db.Integer, nullable=False, default=0)
+
 class SiteVisit(db.Model):
     __tablename__ = 'site_visits'
     
@@ -132,7 +188,48 @@ class SiteVisit(db.Model):
     user_agent = db.Column(db.String(255))
     referer = db.Column(db.String(255))
     session_id = db.Column(db.String(50))
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    # Partition key (see VisitPartitions); PostgreSQL's primary key is (id, timestamp)
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+class VisitRollupHourly(db.Model):
+    """Site visits per UTC hour, maintained as visits are recorded"""
+    __tablename__ = 'visit_rollups_hourly'
+    
+    hour = db.Column(db.DateTime, primary_key=True)  # truncated to the hour
+    visits = db.Column(db.BigInteger, nullable=False, default=0)
+
+class VisitRollupDaily(db.Model):
+    """Site visits per UTC day, maintained as visits are recorded"""
+    __tablename__ = 'visit_rollups_daily'
+    
+    day = db.Column(db.Date, primary_key=True)
+    visits = db.Column(db.BigInteger, nullable=False, default=0)
+
+class VisitorSketch(db.Model):
+    """HyperLogLog sketch of distinct visitors per UTC day, per page and over all pages ('*')"""
+    __tablename__ = 'visitor_sketches'
+    
+    day = db.Column(db.Date, primary_key=True)
+    page = db.Column(db.String(100), primary_key=True)
+    sketch = db.Column(db.LargeBinary, nullable=False)  # HyperLogLog.to_bytes()
+
+class DestinationFunnelDaily(db.Model):
+    """Per destination (slug) and UTC day: page visits -> detail views -> bookings"""
+    __tablename__ = 'destination_funnel_daily'
+    
+    day = db.Column(db.Date, primary_key=True)
+    destination = db.Column(db.String(100), primary_key=True)
+    page_visits = db.Column(db.BigInteger, nullable=False, default=0)
+    detail_views = db.Column(db.BigInteger, nullable=False, default=0)
+    bookings = db.Column(db.BigInteger, nullable=False, default=0)
+
+class RevenueMonthly(db.Model):
+    """Revenue of confirmed/completed bookings with a cost, by month of booking creation"""
+    __tablename__ = 'revenue_monthly'
+    
+    month = db.Column(db.Date, primary_key=True)  # First day of the month
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    bookings = db.Column(db.Integer, nullable=False, default=0)
 
 class ContactMessage(db.Model):
     __tablename__ = 'contact_messages'
@@ -1,10 +1,19 @@
 # app/routes/admin.py - Fixed version with duplicate login removed
-from flask import Blueprint, request, jsonify, current_app
-from app.extensions import db, limiter
-from app.models import Booking, Destination, Admin, SiteVisit, ContactMessage
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from app.extensions import db
+from app.models import Booking, Destination, ContactMessage
 from app.utils.decorators import token_required
-from sqlalchemy import func, extract
+from app.services.booking_service import BookingService, IMPORT_FORMATS
+from app.utils.validators import (
+    parse_booking_filters, parse_bulk_booking_update, parse_date_range, parse_timeseries_query, parse_lookback_range,
+    FUNNEL_DEFAULT_DAYS, FUNNEL_MAX_DAYS
+)
+from app.services.capacity_service import CapacityService
+from app.services.analytics_service import AnalyticsService
+from app.services.timeseries import TimeseriesService
+from app.services.funnel_service import FunnelService
 from datetime import datetime, timedelta
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,83 +27,119 @@ admin_bp = Blueprint('admin', __name__)
 def admin_dashboard_stats(current_admin):
     """Get dashboard statistics"""
     try:
-        now = datetime.utcnow()
-        today = now.date()
-        week_ago = today - timedelta(days=7)
-        month_ago = today - timedelta(days=30)
-        year_ago = today - timedelta(days=365)
-        
-        # Visit statistics
-        daily_visits = SiteVisit.query.filter(
-            func.date(SiteVisit.timestamp) == today
-        ).count()
-        
-        weekly_visits = SiteVisit.query.filter(
-            SiteVisit.timestamp >= week_ago
-        ).count()
-        
-        monthly_visits = SiteVisit.query.filter(
-            SiteVisit.timestamp >= month_ago
-        ).count()
-        
-        yearly_visits = SiteVisit.query.filter(
-            SiteVisit.timestamp >= year_ago
-        ).count()
-        
-        # Booking statistics
-        total_bookings = Booking.query.count()
-        pending_bookings = Booking.query.filter_by(status='pending').count()
-        confirmed_bookings = Booking.query.filter_by(status='confirmed').count()
-        completed_bookings = Booking.query.filter_by(status='completed').count()
-        cancelled_bookings = Booking.query.filter_by(status='cancelled').count()
-        
-        # Top destinations
-        top_destinations = db.session.query(
-            Booking.destination,
-            func.count(Booking.id).label('count')
-        ).filter(
-            Booking.destination.isnot(None),
-            Booking.destination != ''
-        ).group_by(Booking.destination).order_by(func.count(Booking.id).desc()).limit(5).all()
+        return jsonify({
+            'success': True,
+            'data': AnalyticsService.get_dashboard_stats()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error fetching dashboard stats: {e}")
+        return jsonify({'success': False, 'message': 'Internal server error'}), 500
+
+@admin_bp.route('/analytics/timeseries', methods=['GET'])
+@token_required
+def admin_analytics_timeseries(current_admin):
+    """Gap-filled totals of one metric per hour / day / week / month
+    
+    Query: metric (bookings, guests, revenue, visits), granularity, from,
+    to, and the booking filters (status, q, preferred_from, preferred_to,
+    destination) or page for visits.
+    """
+    try:
+        query, errors = parse_timeseries_query(request.args)
+        if errors:
+            return jsonify({'success': False, 'message': 'Invalid time series query', 'errors': errors}), 400
+        
+        buckets = TimeseriesService.series(
+            query['metric'], query['granularity'], query['start'], query['end'], query['filters']
+        )
         
         return jsonify({
             'success': True,
             'data': {
-                'visits': {
-                    'daily': daily_visits,
-                    'weekly': weekly_visits,
-                    'monthly': monthly_visits,
-                    'yearly': yearly_visits
-                },
-                'bookings': {
-                    'total': total_bookings,
-                    'pending': pending_bookings,
-                    'confirmed': confirmed_bookings,
-                    'completed': completed_bookings,
-                    'cancelled': cancelled_bookings
-                },
-                'top_destinations': [{'destination': d, 'count': c} for d, c in top_destinations]
+                'metric': query['metric'],
+                'granularity': query['granularity'],
+                'from': query['start'].isoformat(),
+                'to': query['end'].isoformat(),
+                'total': sum(bucket['value'] for bucket in buckets),
+                'buckets': [
+                    {'start': bucket['start'].isoformat(), 'value': bucket['value']}
+                    for bucket in buckets
+                ]
             }
         })
         
     except Exception as e:
-        logger.error(f"Error fetching dashboard stats: {e}")
+        logger.error(f"Error building time series: {e}")
+        return jsonify({'success': False, 'message': 'Internal server error'}), 500
+
+@admin_bp.route('/analytics/funnel', methods=['GET'])
+@token_required
+def admin_analytics_funnel(current_admin):
+    """Page visits -> detail views -> bookings per destination, with conversion rates
+    
+    Query: from, to (the last 30 days by default), destination (slug).
+    """
+    try:
+        start, end, errors = parse_lookback_range(request.args, FUNNEL_DEFAULT_DAYS, FUNNEL_MAX_DAYS)
+        if errors:
+            return jsonify({'success': False, 'message': 'Invalid date range', 'errors': errors}), 400
+        
+        funnel = FunnelService.get_funnel(start, end, request.args.get('destination', '').strip() or None)
+        
+        return jsonify({
+            'success': True,
+            'data': {'from': start.isoformat(), 'to': end.isoformat(), **funnel}
+        })
+        
+    except Exception as e:
+        logger.error(f"Error building funnel: {e}")
         return jsonify({'success': False, 'message': 'Internal server error'}), 500
 
 @admin_bp.route('/bookings', methods=['GET'])
 @token_required
 def admin_get_bookings(current_admin):
-    """Get all bookings with pagination"""
+    """Get bookings, newest first
+    
+    Pass `cursor` (empty for the first page) or omit `page` for keyset
+    pagination; `page` keeps the numbered pages the dashboard uses.
+    """
     try:
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 20))
-        status = request.args.get('status', '')
+        per_page = min(max(int(request.args.get('per_page', 20)), 1), 100)
+        filters, errors = parse_booking_filters(request.args)
+        if errors:
+            return jsonify({'success': False, 'message': 'Invalid filters', 'errors': errors}), 400
+        
+        if 'cursor' in request.args or 'page' not in request.args:
+            try:
+                bookings, next_cursor = BookingService.get_bookings_page(
+                    filters, per_page, request.args.get('cursor') or None
+                )
+            except ValueError:
+                return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+            
+            # Counted on the first page only, unless an exact total is asked for
+            exact = request.args.get('include_total', '').lower() in ['1', 'true', 'yes']
+            total, is_estimate = None, None
+            if exact or not request.args.get('cursor'):
+                total, is_estimate = BookingService.count_bookings(filters, exact=exact)
+            
+            return jsonify({
+                'success': True,
+                'data': [booking.to_dict() for booking in bookings],
+                'pagination': {
+                    'per_page': per_page,
+                    'next_cursor': next_cursor,
+                    'has_more': next_cursor is not None,
+                    'total': total,
+                    'total_is_estimate': is_estimate
+                }
+            })
         
-        query = Booking.query
-        if status:
-            query = query.filter_by(status=status)
-        
-        bookings = query.order_by(Booking.created_at.desc()).paginate(
+        page = int(request.args.get('page', 1))
+        bookings = Booking.query.filter(
+            *BookingService.filter_clauses(filters)
+        ).order_by(Booking.created_at.desc(), Booking.id.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
@@ -113,6 +158,75 @@ def admin_get_bookings(current_admin):
         logger.error(f"Error fetching bookings: {e}")
         return jsonify({'success': False, 'message': 'Internal server error'}), 500
 
+@admin_bp.route('/bookings/import', methods=['POST'])
+@token_required
+def admin_import_bookings(current_admin):
+    """Bulk import bookings from a CSV or JSONL upload"""
+    try:
+        upload = request.files.get('file')
+        filename = upload.filename if upload else ''
+        
+        # Format from ?format=, the file extension, or the content type
+        fmt = request.args.get('format', '').lower()
+        if not fmt:
+            if filename.lower().endswith(('.jsonl', '.ndjson')) or 'ndjson' in (request.content_type or '') or 'jsonl' in (request.content_type or ''):
+                fmt = 'jsonl'
+            else:
+                fmt = 'csv'
+        if fmt not in IMPORT_FORMATS:
+            return jsonify({'success': False, 'message': 'Format must be csv or jsonl'}), 400
+        
+        stream = upload.stream if upload else request.stream
+        report = BookingService.import_bookings(
+            BookingService.parse_import_rows(stream, fmt),
+            ip_address=request.remote_addr
+        )
+        
+        logger.info(f"Admin {current_admin.username} imported {report['imported']} bookings ({report['failed']} failed)")
+        
+        return jsonify({
+            'success': True,
+            'message': f"Imported {report['imported']} of {report['total']} bookings",
+            'data': report
+        })
+        
+    except Exception as e:
+        logger.error(f"Error importing bookings: {e}")
+        db.session.rollback()
+        return jsonify({'success': False, 'message': 'Import failed'}), 500
+
+@admin_bp.route('/bookings/bulk', methods=['PUT'])
+@token_required
+def admin_bulk_update_bookings(current_admin):
+    """Apply a status and/or estimated cost to many bookings in one transaction"""
+    try:
+        data = request.get_json() or {}
+        booking_ids, changes, errors = parse_bulk_booking_update(data)
+        if errors:
+            return jsonify({'success': False, 'message': 'Validation failed', 'errors': errors}), 400
+        
+        results = BookingService.bulk_update_bookings(booking_ids, changes)
+        updated = sum(1 for result in results if result['success'])
+        
+        logger.info(
+            f"Admin {current_admin.username} bulk updated {updated} of {len(booking_ids)} bookings: "
+            f"{', '.join(f'{key}={value}' for key, value in changes.items())}"
+        )
+        
+        return jsonify({
+            'success': True,
+            'message': f'Updated {updated} of {len(booking_ids)} bookings',
+            'data': {
+                'updated': updated,
+                'results': results
+            }
+        })
+        
+    except Exception as e:
+        logger.error(f"Error bulk updating bookings: {e}")
+        db.session.rollback()
+        return jsonify({'success': False, 'message': 'Internal server error'}), 500
+
 @admin_bp.route('/bookings/<int:booking_id>', methods=['PUT'])
 @token_required
 def admin_update_booking(current_admin, booking_id):
@@ -233,8 +347,16 @@ def admin_create_destination(current_admin):
             is_featured=data.get('is_featured', False)
         )
         
+        if data.get('daily_capacity') is not None:
+            try:
+                destination.daily_capacity = int(data['daily_capacity'])
+            except (ValueError, TypeError):
+                return jsonify({'success': False, 'message': 'daily_capacity must be a whole number'}), 400
+            if destination.daily_capacity < 0:
+                return jsonify({'success': False, 'message': 'daily_capacity cannot be negative'}), 400
+        
         db.session.add(destination)
-        db.session.commit()
+        db.session.commit()  # Bumps the catalog version on commit
         
         logger.info(f"Admin {current_admin.username} created destination: {destination.name}")
         
@@ -249,6 +371,66 @@ def admin_create_destination(current_admin):
         db.session.rollback()
         return jsonify({'success': False, 'message': 'Internal server error'}), 500
 
+@admin_bp.route('/destinations/<slug>/capacity', methods=['PUT'])
+@token_required
+def admin_set_destination_capacity(current_admin, slug):
+    """Set the default daily capacity, or override it for a date range
+    
+    Body: {"daily_capacity": n} and/or {"from": date, "to": date, "capacity": n or null};
+    a null capacity removes the override.
+    """
+    try:
+        destination = Destination.query.filter_by(slug=slug).first()
+        if not destination:
+            return jsonify({'success': False, 'message': 'Destination not found'}), 404
+        data = request.get_json() or {}
+        
+        values = {}
+        for field in ['daily_capacity', 'capacity']:
+            if data.get(field) is None:
+                continue
+            try:
+                values[field] = int(data[field])
+            except (ValueError, TypeError):
+                return jsonify({'success': False, 'message': f'{field} must be a whole number'}), 400
+            if values[field] < 0:
+                return jsonify({'success': False, 'message': f'{field} cannot be negative'}), 400
+        
+        has_range = 'from' in data or 'to' in data
+        if not has_range and 'daily_capacity' not in data:
+            return jsonify({'success': False, 'message': 'Provide daily_capacity and/or a from/to range with capacity'}), 400
+        
+        # Validate everything before changing anything, so a 400 leaves both settings alone
+        if has_range:
+            start, end, errors = parse_date_range(data)
+            if errors:
+                return jsonify({'success': False, 'message': 'Invalid date range', 'errors': errors}), 400
+        else:
+            start = datetime.utcnow().date()
+            end = start + timedelta(days=29)
+        
+        if 'daily_capacity' in data:
+            destination.daily_capacity = values.get('daily_capacity')
+        if has_range:
+            CapacityService.set_capacity(destination, start, end, values.get('capacity'))
+        db.session.commit()
+        if has_range:
+            logger.info(f"Admin {current_admin.username} set capacity for {slug} {start} to {end}: {values.get('capacity')}")
+        
+        return jsonify({
+            'success': True,
+            'message': 'Capacity updated successfully',
+            'data': {
+                'destination': destination.slug,
+                'daily_capacity': destination.daily_capacity,
+                'dates': CapacityService.get_availability(destination, start, end)
+            }
+        })
+    except Exception as e:
+        logger.error(f"Error setting capacity for {slug}: {e}")
+        db.session.rollback()
+        return jsonify({'success': False, 'message': 'Internal server error'}), 500
+
 @admin_bp.route('/messages', methods=['GET'])
 @token_required
 def admin_get_messages(current_admin):
@@ -278,44 +460,24 @@ def admin_get_messages(current_admin):
 @admin_bp.route('/export/bookings', methods=['GET'])
 @token_required
 def admin_export_bookings(current_admin):
-    """Export bookings as CSV"""
+    """Export bookings as a streamed CSV (optionally gzipped)"""
     try:
-        import csv
-        import io
-        from flask import make_response
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow([
-            'Booking Reference', 'Name', 'Email', 'Phone', 'Destination',
-            'Date', 'Guests', 'Status', 'Estimated Cost', 'Created', 'Message'
-        ])
-        
-        # Write bookings
-        bookings = Booking.query.order_by(Booking.created_at.desc()).all()
-        for booking in bookings:
-            writer.writerow([
-                booking.booking_reference,
-                booking.name,
-                booking.email,
-                booking.phone or '',
-                booking.destination or '',
-                booking.preferred_date.strftime('%Y-%m-%d') if booking.preferred_date else '',
-                booking.guests,
-                booking.status,
-                booking.estimated_cost or '',
-                booking.created_at.strftime('%Y-%m-%d %H:%M'),
-                booking.message or ''
-            ])
-        
-        output.seek(0)
-        response = make_response(output.getvalue())
-        response.headers['Content-Type'] = 'text/csv'
-        response.headers['Content-Disposition'] = f'attachment; filename=bookings_{datetime.now().strftime("%Y%m%d")}.csv'
-        
-        logger.info(f"Admin {current_admin.username} exported bookings")
+        filters, errors = parse_booking_filters(request.args)
+        if errors:
+            return jsonify({'success': False, 'message': 'Invalid filters', 'errors': errors}), 400
+        
+        compress = request.args.get('gzip', '').lower() in ['1', 'true', 'yes']
+        filename = f'bookings_{datetime.now().strftime("%Y%m%d")}.csv' + ('.gz' if compress else '')
+        
+        # Rows are written as they are read; errors past this point can
+        # only end the stream early, so they are logged by the generator
+        response = Response(
+            stream_with_context(BookingService.export_csv(filters, compress=compress)),
+            mimetype='application/gzip' if compress else 'text/csv'
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+        
+        logger.info(f"Admin {current_admin.username} exported bookings (filters: {request.args.to_dict()})")
         return response
         
     except Exception as e:
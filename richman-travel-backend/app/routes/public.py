@@ -1,9 +1,15 @@
 # app/routes/public.py - Fixed booking route
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.extensions import db, limiter
-from app.models import Destination, Booking, ContactMessage, SiteVisit
-from app.utils.validators import validate_booking_data, validate_contact_data, sanitize_input
-from app.utils.helpers import send_booking_confirmation_email, send_admin_booking_notification
+from app.models import Destination, Booking, ContactMessage
+from app.utils.validators import validate_booking_data, validate_contact_data, sanitize_input, parse_destination_filters, parse_date_range
+from app.tasks import send_booking_notifications
+from app.utils.helpers import is_not_modified, set_cache_validators, not_modified_response, make_etag
+from app.services.catalog_service import catalog_cache, CatalogService
+from app.services.view_counter import view_counter
+from app.services.funnel_service import record_impressions
+from app.services.search_service import SearchService
+from app.services.capacity_service import CapacityService, CapacityExceeded
 from datetime import datetime
 import logging
 
@@ -23,23 +29,65 @@ def health_check():
 @public_bp.route('/destinations', methods=['GET'])
 @limiter.limit("30 per minute")
 def get_destinations():
-    """Get all active destinations"""
+    """Get all active destinations, optionally filtered by price, duration and difficulty"""
     try:
         featured_only = request.args.get('featured', 'false').lower() == 'true'
+        with_facets = request.args.get('facets', 'false').lower() == 'true'
         
-        query = Destination.query.filter_by(is_active=True)
-        if featured_only:
-            query = query.filter_by(is_featured=True)
+        filters, errors = parse_destination_filters(request.args)
+        if errors:
+            return jsonify({'success': False, 'message': 'Invalid filters', 'errors': errors}), 400
         
-        destinations = query.order_by(Destination.created_at.desc()).all()
+        # Served pre-encoded from the in-process catalog cache
+        snapshot = catalog_cache.snapshot()
+        body, etag, last_modified = snapshot.listing(featured_only)
+        
+        if filters or with_facets:
+            # Filtered listings are derived from the same catalog state
+            etag = make_etag(etag, sorted(filters.items()), with_facets)
+            if is_not_modified(etag, last_modified):
+                return not_modified_response(etag, last_modified)
+            
+            ids = CatalogService.filter_destination_ids(filters, featured_only)
+            extra = {'facets': CatalogService.get_facet_counts(filters, featured_only)} if with_facets else None
+            body = snapshot.subset_body(ids, extra)
+        elif is_not_modified(etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        else:
+            ids = snapshot.listing_ids(featured_only)
+        
+        record_impressions(snapshot.slug_by_id[dest_id] for dest_id in ids if dest_id in snapshot.slug_by_id)
+        response = current_app.response_class(body, mimetype='application/json')
+        return set_cache_validators(response, etag, last_modified)
+    except Exception as e:
+        logger.error(f"Error fetching destinations: {e}")
+        return jsonify({'success': False, 'message': 'Internal server error'}), 500
+
+@public_bp.route('/destinations/search', methods=['GET'])
+@limiter.limit("60 per minute")
+def search_destinations():
+    """Full-text search over active destinations"""
+    try:
+        query = sanitize_input(request.args.get('q', '')).strip()
+        if not query:
+            return jsonify({'success': False, 'message': 'Search query is required'}), 400
+        
+        try:
+            limit = min(max(int(request.args.get('limit', 20)), 1), 50)
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Invalid limit'}), 400
+        
+        results = SearchService.search_destinations(query, limit)
+        record_impressions(result['slug'] for result in results)
         
         return jsonify({
             'success': True,
-            'data': [dest.to_dict() for dest in destinations],
-            'count': len(destinations)
+            'data': results,
+            'count': len(results),
+            'query': query
         })
     except Exception as e:
-        logger.error(f"Error fetching destinations: {e}")
+        logger.error(f"Error searching destinations: {e}")
         return jsonify({'success': False, 'message': 'Internal server error'}), 500
 
 @public_bp.route('/destinations/<slug>', methods=['GET'])
@@ -47,20 +95,56 @@ def get_destinations():
 def get_destination_by_slug(slug):
     """Get destination by slug and increment view count"""
     try:
+        detail = catalog_cache.snapshot().detail(slug)
+        if detail is None:
+            # Possibly created by another worker since our snapshot was loaded
+            if not Destination.query.filter_by(slug=slug, is_active=True).first():
+                return jsonify({'success': False, 'message': 'Destination not found'}), 404
+            catalog_cache.bump_version()
+            detail = catalog_cache.snapshot().detail(slug)
+            if detail is None:
+                return jsonify({'success': False, 'message': 'Destination not found'}), 404
+        
+        body, etag, last_modified = detail
+        
+        if is_not_modified(etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        
+        # Full responses only, like the funnel's detail views; buffered and
+        # written in batches by the view counter
+        view_counter.increment(slug)
+        
+        response = current_app.response_class(body, mimetype='application/json')
+        return set_cache_validators(response, etag, last_modified)
+    except Exception as e:
+        logger.error(f"Error fetching destination: {e}")
+        return jsonify({'success': False, 'message': 'Internal server error'}), 500
+
+@public_bp.route('/destinations/<slug>/availability', methods=['GET'])
+@limiter.limit("60 per minute")
+def get_destination_availability(slug):
+    """Remaining spots per date, from the running totals in destination_capacity"""
+    try:
+        start, end, errors = parse_date_range(request.args)
+        if errors:
+            return jsonify({'success': False, 'message': 'Invalid date range', 'errors': errors}), 400
+        
         destination = Destination.query.filter_by(slug=slug, is_active=True).first()
         if not destination:
             return jsonify({'success': False, 'message': 'Destination not found'}), 404
         
-        # Increment view count
-        destination.view_count += 1
-        db.session.commit()
-        
         return jsonify({
             'success': True,
-            'data': destination.to_dict()
+            'data': {
+                'destination': destination.slug,
+                'daily_capacity': destination.daily_capacity,
+                'from': start.isoformat(),
+                'to': end.isoformat(),
+                'dates': CapacityService.get_availability(destination, start, end)
+            }
         })
     except Exception as e:
-        logger.error(f"Error fetching destination: {e}")
+        logger.error(f"Error fetching availability for {slug}: {e}")
         return jsonify({'success': False, 'message': 'Internal server error'}), 500
 
 @public_bp.route('/bookings', methods=['POST'])
@@ -143,16 +227,26 @@ def create_booking():
         booking.booking_reference = booking.generate_reference()
         
         db.session.add(booking)
-        db.session.commit()
+        try:
+            # Reserves the guests' spots on the date (see capacity_service)
+            db.session.commit()
+        except CapacityExceeded as e:
+            db.session.rollback()
+            logger.info(f"Booking refused, date full: {e}")
+            return jsonify({
+                'success': False,
+                'message': 'Not enough availability for the selected date',
+                'errors': [str(e)],
+                'remaining': e.remaining
+            }), 409
         
         logger.info(f"Created booking: {booking.booking_reference}")
         
-        # Send notifications (non-blocking)
+        # Queue notifications; sent and retried by the Celery worker
         try:
-            send_booking_confirmation_email(booking)
-            send_admin_booking_notification(booking)
+            send_booking_notifications.delay(booking.id)
         except Exception as e:
-            logger.warning(f"Failed to send email notifications: {e}")
+            logger.warning(f"Failed to queue email notifications: {e}")
         
         return jsonify({
             'success': True,
@@ -1,85 +1,134 @@
 # app/services/analytics_service.py - Analytics calculations
 from app.extensions import db
-from app.models import SiteVisit, Booking, Destination
-from sqlalchemy import func, extract
+from app.models import Booking, Destination, VisitRollupDaily
+from app.services.revenue_ledger import RevenueLedger
+from app.services.timeseries import TimeseriesService
+from app.services.visitor_sketches import VisitorSketchService, ALL_PAGES
+from sqlalchemy import func, case
+from app.utils.cache import TTLCache
+from app.utils.hyperloglog import HyperLogLog
+from app.utils.validators import BOOKING_STATUSES
 from datetime import datetime, timedelta
 
+# Assembled dashboard payloads, shared by every admin polling the dashboard
+dashboard_cache = TTLCache()
+
 class AnalyticsService:
+    @staticmethod
+    def init_app(app):
+        dashboard_cache.ttl = app.config.get('DASHBOARD_CACHE_TTL', 15)
+    
+    @staticmethod
+    def get_dashboard_stats():
+        """Visit, booking and top-destination stats for the admin dashboard
+        
+        Cached for DASHBOARD_CACHE_TTL seconds with one refresh at a time,
+        so the figures can lag writes by that much.
+        """
+        return dashboard_cache.get('dashboard', AnalyticsService._compute_dashboard_stats)
+    
+    @staticmethod
+    def _compute_dashboard_stats():
+        top_destinations = db.session.query(
+            Booking.destination,
+            func.count(Booking.id).label('count')
+        ).filter(
+            Booking.destination.isnot(None),
+            Booking.destination != ''
+        ).group_by(Booking.destination).order_by(func.count(Booking.id).desc()).limit(5).all()
+        
+        return {
+            'visits': AnalyticsService.get_visit_stats(),
+            'unique_visitors': AnalyticsService.get_unique_visitor_stats(),
+            'bookings': AnalyticsService.get_booking_status_counts(),
+            'top_destinations': [{'destination': d, 'count': c} for d, c in top_destinations]
+        }
+    
+    @staticmethod
+    def get_booking_status_counts():
+        """Total and per-status booking counts in one conditional-aggregation query"""
+        row = db.session.query(
+            func.count(Booking.id).label('total'),
+            *[
+                func.coalesce(func.sum(case((Booking.status == status, 1), else_=0)), 0).label(status)
+                for status in BOOKING_STATUSES
+            ]
+        ).one()
+        return {key: int(value) for key, value in row._mapping.items()}
+    
     @staticmethod
     def get_visit_stats():
-        """Calculate visit statistics"""
-        now = datetime.utcnow()
-        today = now.date()
+        """Calculate visit statistics from the daily rollups (one query over at most 366 rows)"""
+        today = datetime.utcnow().date()
         week_ago = today - timedelta(days=7)
         month_ago = today - timedelta(days=30)
         year_ago = today - timedelta(days=365)
         
-        daily_visits = SiteVisit.query.filter(
-            func.date(SiteVisit.timestamp) == today
-        ).count()
-        
-        weekly_visits = SiteVisit.query.filter(
-            SiteVisit.timestamp >= week_ago
-        ).count()
-        
-        monthly_visits = SiteVisit.query.filter(
-            SiteVisit.timestamp >= month_ago
-        ).count()
+        def visits_since(day):
+            return func.coalesce(func.sum(case((VisitRollupDaily.day >= day, VisitRollupDaily.visits), else_=0)), 0)
         
-        yearly_visits = SiteVisit.query.filter(
-            SiteVisit.timestamp >= year_ago
-        ).count()
+        daily_visits, weekly_visits, monthly_visits, yearly_visits = db.session.query(
+            visits_since(today),
+            visits_since(week_ago),
+            visits_since(month_ago),
+            visits_since(year_ago)
+        ).filter(VisitRollupDaily.day >= year_ago).one()
         
         return {
-            'daily': daily_visits,
-            'weekly': weekly_visits,
-            'monthly': monthly_visits,
-            'yearly': yearly_visits
+            'daily': int(daily_visits),
+            'weekly': int(weekly_visits),
+            'monthly': int(monthly_visits),
+            'yearly': int(yearly_visits)
         }
     
+    @staticmethod
+    def get_unique_visitor_stats(top_pages=10):
+        """Estimated distinct visitors today / 7 / 30 / 365 days, and per page over 30 days
+        
+        Merges the daily HyperLogLog sketches, newest first, reading each
+        window's estimate on the way.
+        """
+        today = datetime.utcnow().date()
+        windows = [('daily', today), ('weekly', today - timedelta(days=7)),
+                   ('monthly', today - timedelta(days=30)), ('yearly', today - timedelta(days=365))]
+        
+        sketches = VisitorSketchService.sketches(windows[-1][1], today, ALL_PAGES)
+        merged = HyperLogLog()
+        stats = {}
+        days = sorted(sketches, reverse=True)
+        for name, since in windows:
+            while days and days[0] >= since:
+                merged.merge(sketches[days.pop(0)])
+            stats[name] = merged.count()
+        
+        by_page = VisitorSketchService.unique_visitors_by_page(today - timedelta(days=30), today)
+        stats['by_page'] = [
+            {'page': page, 'visitors': visitors}
+            for page, visitors in sorted(by_page.items(), key=lambda item: item[1], reverse=True)[:top_pages]
+        ]
+        return stats
+    
     @staticmethod
     def get_booking_stats():
         """Calculate booking statistics"""
-        total_bookings = Booking.query.count()
-        pending_bookings = Booking.query.filter_by(status='pending').count()
-        confirmed_bookings = Booking.query.filter_by(status='confirmed').count()
-        completed_bookings = Booking.query.filter_by(status='completed').count()
-        cancelled_bookings = Booking.query.filter_by(status='cancelled').count()
-        
-        # Monthly booking trends (last 12 months)
-        twelve_months_ago = datetime.utcnow() - timedelta(days=365)
-        monthly_trends = db.session.query(
-            extract('year', Booking.created_at).label('year'),
-            extract('month', Booking.created_at).label('month'),
-            func.count(Booking.id).label('count')
-        ).filter(
-            Booking.created_at >= twelve_months_ago
-        ).group_by(
-            extract('year', Booking.created_at),
-            extract('month', Booking.created_at)
-        ).order_by(
-            extract('year', Booking.created_at),
-            extract('month', Booking.created_at)
-        ).all()
+        counts = AnalyticsService.get_booking_status_counts()
         
+        # Monthly booking trends (last 12 months, empty months included)
         return {
-            'total': total_bookings,
-            'pending': pending_bookings,
-            'confirmed': confirmed_bookings,
-            'completed': completed_bookings,
-            'cancelled': cancelled_bookings,
+            **counts,
             'monthly_trends': [
-                {
-                    'year': int(trend.year),
-                    'month': int(trend.month),
-                    'count': trend.count
-                } for trend in monthly_trends
+                {'year': bucket['start'].year, 'month': bucket['start'].month, 'count': bucket['value']}
+                for bucket in AnalyticsService._last_twelve_months('bookings')
             ]
         }
     
     @staticmethod
     def get_popular_destinations():
-        """Get most popular destinations by bookings and views"""
+        """Get most popular destinations by bookings and views
+
+        View counts are buffered per worker (see ViewCounter), so by_views
+        reflects counts flushed as of the last flush interval.
+        """
         # Most booked destinations
         popular_by_bookings = db.session.query(
             Booking.destination,
@@ -108,41 +157,21 @@ class AnalyticsService:
             ]
         }
     
+    @staticmethod
+    def _last_twelve_months(metric):
+        today = datetime.utcnow().date()
+        return TimeseriesService.series(metric, 'month', today - timedelta(days=365), today)
+    
     @staticmethod
     def get_revenue_stats():
-        """Calculate revenue statistics"""
-        # Total estimated revenue
-        total_revenue = db.session.query(
-            func.sum(Booking.estimated_cost)
-        ).filter(
-            Booking.status.in_(['confirmed', 'completed']),
-            Booking.estimated_cost.isnot(None)
-        ).scalar() or 0
-        
-        # Monthly revenue trends
-        monthly_revenue = db.session.query(
-            extract('year', Booking.created_at).label('year'),
-            extract('month', Booking.created_at).label('month'),
-            func.sum(Booking.estimated_cost).label('revenue')
-        ).filter(
-            Booking.status.in_(['confirmed', 'completed']),
-            Booking.estimated_cost.isnot(None)
-        ).group_by(
-            extract('year', Booking.created_at),
-            extract('month', Booking.created_at)
-        ).order_by(
-            extract('year', Booking.created_at),
-            extract('month', Booking.created_at)
-        ).all()
+        """Calculate revenue statistics, from the monthly revenue ledger"""
+        today = datetime.utcnow().date()
         
+        # Monthly revenue trends (last 12 months, empty months included)
         return {
-            'total': float(total_revenue),
+            'total': RevenueLedger.total()['revenue'],
             'monthly_trends': [
-                {
-                    'year': int(trend.year),
-                    'month': int(trend.month),
-                    'revenue': float(trend.revenue or 0)
-                } for trend in monthly_revenue
+                {'year': month['month'].year, 'month': month['month'].month, 'revenue': month['revenue']}
+                for month in RevenueLedger.monthly(today - timedelta(days=365), today)
             ]
         }
-        
\ No newline at end of file
@@ -1,12 +1,45 @@
 # app/services/booking_service.py - Booking business logic
 from app.extensions import db
 from app.models import Booking
-from datetime import datetime
+from app.services.reference_allocator import reference_allocator
+from app.services.calendar_sync import calendar_sync
+from app.services.capacity_service import CapacityService, CAPACITY_COLUMNS
+from app.services.funnel_service import FunnelService
+from app.services.revenue_ledger import RevenueLedger, REVENUE_COLUMNS
+from app.utils.validators import validate_booking_data, sanitize_input
+from app.utils.helpers import encode_cursor, decode_cursor
+from sqlalchemy import insert, select, update, func, tuple_, or_, inspect, text, column
+from datetime import datetime, time, timedelta
+import csv
+import io
+import json
+import re
+import zlib
 import logging
 
 logger = logging.getLogger(__name__)
 
+IMPORT_TEXT_FIELDS = ['name', 'email', 'phone', 'destination', 'message']
+IMPORT_FORMATS = ['csv', 'jsonl']
+IMPORT_CHUNK_SIZE = 1000
+
+EXPORT_HEADER = [
+    'Booking Reference', 'Name', 'Email', 'Phone', 'Destination',
+    'Date', 'Guests', 'Status', 'Estimated Cost', 'Created', 'Message'
+]
+# Search terms that look like a booking reference match it exactly
+REFERENCE_SEARCH_RE = re.compile(r'RT[0-9A-Z]{6,}')
+
+# Planner estimates below this are replaced by an exact (cheap) count
+EXACT_COUNT_THRESHOLD = 10000
+
+# Rows fetched per round trip (server-side cursor on PostgreSQL) and per yielded chunk
+EXPORT_BATCH_SIZE = 1000
+
 class BookingService:
+    # Whether the bookings_fts table exists, per database URL
+    _fts_available = {}
+    
     @staticmethod
     def create_booking(booking_data):
         """Create new booking"""
@@ -48,4 +81,342 @@ class BookingService:
             logger.error(f"Error updating booking status: {e}")
             db.session.rollback()
             raise
-        
\ No newline at end of file
+    
+    @staticmethod
+    def bulk_update_bookings(booking_ids, changes):
+        """Apply the same status / estimated_cost to many bookings at once
+        
+        One locked read and one set-based UPDATE in a single transaction,
+        which also queues the calendar sync and adjusts the capacity totals
+        and revenue ledger. Returns a result per requested id, in request order.
+        """
+        try:
+            current = {
+                row.id: row for row in db.session.execute(
+                    select(
+                        Booking.id, Booking.booking_reference, Booking.status, Booking.estimated_cost,
+                        Booking.destination, Booking.preferred_date, Booking.guests, Booking.created_at
+                    )
+                    .where(Booking.id.in_(booking_ids))
+                    .with_for_update()
+                )
+            }
+            
+            if current:
+                db.session.execute(
+                    update(Booking)
+                    .where(Booking.id.in_(list(current)))
+                    .values(**changes, updated_at=datetime.utcnow())
+                    # The commit below expires loaded instances anyway
+                    .execution_options(synchronize_session=False)
+                )
+                if 'status' in changes:
+                    calendar_sync.enqueue(list(current))
+                    # Admin changes adjust the running totals without a capacity check
+                    before = [tuple(getattr(row, key) for key in CAPACITY_COLUMNS) for row in current.values()]
+                    after = [(changes['status'],) + values[1:] for values in before]
+                    CapacityService.adjust(CapacityService.booking_deltas(before, after))
+                # Set-based UPDATE bypasses the revenue ledger's flush listener
+                before = [tuple(getattr(row, key) for key in REVENUE_COLUMNS) for row in current.values()]
+                after = [tuple(changes.get(key, value) for key, value in zip(REVENUE_COLUMNS, values)) for values in before]
+                RevenueLedger.adjust(RevenueLedger.booking_deltas(before, after))
+            db.session.commit()
+            
+        except Exception as e:
+            logger.error(f"Error bulk updating bookings: {e}")
+            db.session.rollback()
+            raise
+        
+        results = []
+        for booking_id in booking_ids:
+            row = current.get(booking_id)
+            if row is None:
+                results.append({'id': booking_id, 'success': False, 'message': 'Booking not found'})
+                continue
+            results.append({
+                'id': booking_id,
+                'success': True,
+                'booking_reference': row.booking_reference,
+                'previous': {'status': row.status, 'estimated_cost': row.estimated_cost}
+            })
+        
+        return results
+    
+    @staticmethod
+    def parse_import_rows(stream, fmt):
+        """Yield (row_number, dict or error message) from a CSV or JSONL byte stream"""
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        if fmt == 'csv':
+            # Row 1 is the header
+            for row_number, row in enumerate(csv.DictReader(text), start=2):
+                yield row_number, {(key or '').strip().lower(): value for key, value in row.items()}
+        else:
+            for row_number, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    yield row_number, 'Invalid JSON'
+                    continue
+                yield row_number, row if isinstance(row, dict) else 'Each line must be a JSON object'
+    
+    @staticmethod
+    def prepare_import_row(row, ip_address=None):
+        """Sanitize and validate one imported row; returns (values, errors)"""
+        data = {}
+        for field in IMPORT_TEXT_FIELDS:
+            value = row.get(field)
+            data[field] = sanitize_input(str(value)) if value not in (None, '') else ''
+        data['date'] = str(row.get('date') or row.get('preferred_date') or '').strip()
+        data['guests'] = row.get('guests') if row.get('guests') not in (None, '') else 1
+        
+        errors = validate_booking_data(data)
+        if errors:
+            return None, errors
+        
+        return {
+            'name': data['name'],
+            'email': data['email'],
+            'phone': data['phone'],
+            'destination': data['destination'],
+            'preferred_date': datetime.strptime(data['date'], '%Y-%m-%d').date() if data['date'] else None,
+            'guests': int(data['guests']),
+            'message': data['message'],
+            'status': 'pending',
+            'ip_address': ip_address
+        }, []
+    
+    @staticmethod
+    def import_bookings(rows, chunk_size=IMPORT_CHUNK_SIZE, ip_address=None):
+        """Validate rows and insert the valid ones in chunked executemany batches
+        
+        `rows` yields (row_number, dict or error message). Each chunk is
+        committed in its own transaction; a chunk that fails to insert is
+        reported row by row and the import continues.
+        """
+        report = {'total': 0, 'imported': 0, 'failed': 0, 'errors': []}
+        chunk = []
+        
+        def flush(chunk):
+            now = datetime.utcnow()
+            for _, values in chunk:
+                values['booking_reference'] = reference_allocator.allocate()
+                values['created_at'] = now
+                values['updated_at'] = now
+            try:
+                result = db.session.execute(
+                    insert(Booking.__table__).returning(Booking.__table__.c.id),
+                    [values for _, values in chunk]
+                )
+                calendar_sync.enqueue(result.scalars().all())
+                # Imported bookings count towards capacity but are not refused for it
+                CapacityService.adjust(CapacityService.booking_deltas([], [
+                    tuple(values[key] for key in CAPACITY_COLUMNS) for _, values in chunk
+                ]))
+                FunnelService.record_bookings((values['destination'], values['created_at']) for _, values in chunk)
+                db.session.commit()
+                report['imported'] += len(chunk)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error importing booking chunk: {e}")
+                report['failed'] += len(chunk)
+                report['errors'].extend(
+                    {'row': row_number, 'errors': ['Database error while inserting row']}
+                    for row_number, _ in chunk
+                )
+        
+        for row_number, row in rows:
+            report['total'] += 1
+            if isinstance(row, str):
+                values, errors = None, [row]
+            else:
+                values, errors = BookingService.prepare_import_row(row, ip_address)
+            
+            if errors:
+                report['failed'] += 1
+                report['errors'].append({'row': row_number, 'errors': errors})
+                continue
+            
+            chunk.append((row_number, values))
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = []
+        
+        if chunk:
+            flush(chunk)
+        
+        logger.info(f"Imported {report['imported']} of {report['total']} bookings ({report['failed']} failed)")
+        return report
+    
+    @staticmethod
+    def filter_clauses(filters):
+        """SQL criteria for the admin booking filters (see parse_booking_filters)"""
+        clauses = []
+        if filters.get('q'):
+            clauses.append(BookingService.search_clause(filters['q']))
+        if filters.get('status'):
+            clauses.append(Booking.status.in_(filters['status']))
+        if 'start_date' in filters:
+            clauses.append(Booking.created_at >= datetime.combine(filters['start_date'], time.min))
+        if 'end_date' in filters:
+            clauses.append(Booking.created_at < datetime.combine(filters['end_date'] + timedelta(days=1), time.min))
+        if 'preferred_from' in filters:
+            clauses.append(Booking.preferred_date >= filters['preferred_from'])
+        if 'preferred_to' in filters:
+            clauses.append(Booking.preferred_date <= filters['preferred_to'])
+        return clauses
+    
+    @staticmethod
+    def search_clause(term):
+        """Match a booking reference exactly, or a name / email fragment
+        
+        PostgreSQL serves the ILIKE from the pg_trgm GIN indexes and SQLite
+        from the bookings_fts trigram table, when their migration has run.
+        """
+        term = term.strip()
+        if REFERENCE_SEARCH_RE.fullmatch(term.upper()):
+            return Booking.booking_reference == term.upper()
+        
+        if db.engine.dialect.name == 'sqlite' and BookingService._fts_table_available():
+            # A quoted trigram phrase matches the term as a case-insensitive substring
+            match = '"' + term.replace('"', '""') + '"'
+            return Booking.id.in_(
+                text('SELECT rowid FROM bookings_fts WHERE bookings_fts MATCH :booking_search')
+                .bindparams(booking_search=match)
+                .columns(column('rowid'))
+            )
+        
+        pattern = '%' + re.sub(r'([\\%_])', r'\\\1', term) + '%'
+        return or_(Booking.name.ilike(pattern, escape='\\'), Booking.email.ilike(pattern, escape='\\'))
+    
+    @staticmethod
+    def _fts_table_available():
+        key = str(db.engine.url)
+        if key not in BookingService._fts_available:
+            BookingService._fts_available[key] = inspect(db.engine).has_table('bookings_fts')
+        return BookingService._fts_available[key]
+    
+    @staticmethod
+    def get_bookings_page(filters, per_page, cursor=None):
+        """One keyset page of bookings, newest first; returns (bookings, next_cursor)
+        
+        Pages are keyed on (created_at, id) so each page is an index range
+        scan from the cursor position, whatever its depth.
+        """
+        query = Booking.query.filter(*BookingService.filter_clauses(filters))
+        if cursor:
+            created_at, booking_id = BookingService.decode_page_cursor(cursor)
+            query = query.filter(tuple_(Booking.created_at, Booking.id) < tuple_(created_at, booking_id))
+        
+        bookings = query.order_by(Booking.created_at.desc(), Booking.id.desc()).limit(per_page + 1).all()
+        next_cursor = None
+        if len(bookings) > per_page:
+            bookings = bookings[:per_page]
+            next_cursor = encode_cursor(bookings[-1].created_at.isoformat(), bookings[-1].id)
+        return bookings, next_cursor
+    
+    @staticmethod
+    def decode_page_cursor(cursor):
+        """Parse a bookings cursor into (created_at, id); raises ValueError"""
+        values = decode_cursor(cursor)
+        if len(values) != 2:
+            raise ValueError('Invalid cursor')
+        try:
+            return datetime.fromisoformat(values[0]), int(values[1])
+        except (TypeError, ValueError) as e:
+            raise ValueError('Invalid cursor') from e
+    
+    @staticmethod
+    def count_bookings(filters, exact=False):
+        """Number of bookings matching the filters; returns (count, is_estimate)
+        
+        On PostgreSQL the default is the planner's row estimate (from
+        reltuples and column statistics), which costs no table scan.
+        """
+        clauses = BookingService.filter_clauses(filters)
+        if not exact and db.engine.dialect.name == 'postgresql':
+            try:
+                estimate = BookingService._planner_estimate(select(Booking.id).where(*clauses))
+                if estimate >= EXACT_COUNT_THRESHOLD:
+                    return estimate, True
+            except Exception as e:
+                logger.warning(f"Booking count estimate failed, counting exactly: {e}")
+                db.session.rollback()
+        
+        return db.session.query(func.count(Booking.id)).filter(*clauses).scalar(), False
+    
+    @staticmethod
+    def _planner_estimate(statement):
+        compiled = statement.compile(dialect=db.engine.dialect, compile_kwargs={'render_postcompile': True})
+        plan = db.session.connection().exec_driver_sql(
+            f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    
+    @staticmethod
+    def export_csv(filters=None, compress=False, batch_size=EXPORT_BATCH_SIZE):
+        """Yield the bookings CSV as byte chunks, optionally gzip-compressed
+        
+        Rows are read as plain column tuples with yield_per, so neither the
+        ORM identity map nor the CSV buffer grows with the table size.
+        """
+        query = select(
+            Booking.booking_reference,
+            Booking.name,
+            Booking.email,
+            Booking.phone,
+            Booking.destination,
+            Booking.preferred_date,
+            Booking.guests,
+            Booking.status,
+            Booking.estimated_cost,
+            Booking.created_at,
+            Booking.message
+        ).where(
+            *BookingService.filter_clauses(filters or {})
+        ).order_by(
+            Booking.created_at.desc(), Booking.id.desc()
+        ).execution_options(yield_per=batch_size)
+        
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # wbits=31 writes a gzip header and trailer
+        compressor = zlib.compressobj(wbits=31) if compress else None
+        
+        def drain():
+            data = buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            return compressor.compress(data) if compressor else data
+        
+        writer.writerow(EXPORT_HEADER)
+        yield drain()
+        
+        try:
+            for partition in db.session.execute(query).partitions():
+                writer.writerows([
+                    row.booking_reference,
+                    row.name,
+                    row.email,
+                    row.phone or '',
+                    row.destination or '',
+                    row.preferred_date.strftime('%Y-%m-%d') if row.preferred_date else '',
+                    row.guests,
+                    row.status,
+                    row.estimated_cost or '',
+                    row.created_at.strftime('%Y-%m-%d %H:%M'),
+                    row.message or ''
+                ] for row in partition)
+                chunk = drain()
+                if chunk:
+                    yield chunk
+        except Exception as e:
+            # Headers are already sent; the client sees a truncated file
+            logger.error(f"Error streaming bookings export: {e}")
+            raise
+        
+        if compressor:
+            yield compressor.flush()
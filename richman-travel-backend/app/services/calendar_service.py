@@ -2,25 +2,86 @@
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
+from googleapiclient.http import BatchHttpRequest
 from datetime import datetime, timedelta
+import httplib2
+import threading
 import logging
 import os
 
 logger = logging.getLogger(__name__)
 
 class CalendarService:
+    """Google Calendar client.
+    
+    Credentials and the discovery-built service are shared by every
+    instance for the life of the process and only reloaded when the token
+    expires. httplib2 connections are not thread-safe, so each thread keeps
+    its own authorized connection, reused across calls.
+    """
+    
+    _lock = threading.Lock()
+    _credentials = None
+    _service = None
+    _events = None
+    _service_credentials = None
+    _pid = None
+    _local = threading.local()
+    
     def __init__(self):
         self.SCOPES = ['https://www.googleapis.com/auth/calendar']
         self.CALENDAR_ID = os.environ.get('GOOGLE_CALENDAR_ID', 'primary')
+        self.TOKEN_FILE = os.environ.get('GOOGLE_TOKEN_FILE', 'token.json')
+        self.CREDENTIALS_FILE = os.environ.get('GOOGLE_CREDENTIALS_FILE', 'credentials.json')
+        # Overrides https://www.googleapis.com/calendar/v3/, e.g. for a local stand-in server
+        self.API_ENDPOINT = os.environ.get('GOOGLE_CALENDAR_API_ENDPOINT')
         self.credentials = None
     
+    @classmethod
+    def reset(cls):
+        """Drop the cached credentials, service and connections"""
+        with cls._lock:
+            cls._credentials = None
+            cls._service = None
+            cls._events = None
+            cls._service_credentials = None
+            cls._local = threading.local()
+            cls._pid = os.getpid()
+    
     def _get_credentials(self):
-        """Get Google Calendar credentials"""
-        creds = None
-        # The file token.json stores the user's access and refresh tokens.
-        if os.path.exists('token.json'):
-            creds = Credentials.from_authorized_user_file('token.json', self.SCOPES)
+        """Get Google Calendar credentials, reloading only when they are missing or expired"""
+        cls = CalendarService
+        creds = cls._credentials
+        if creds and creds.valid and cls._pid == os.getpid():
+            self.credentials = creds
+            return creds
+        
+        with cls._lock:
+            if cls._pid != os.getpid():
+                # Forked: connections inherited from the parent are not ours
+                cls._credentials = None
+                cls._service = None
+                cls._events = None
+                cls._service_credentials = None
+                cls._local = threading.local()
+                cls._pid = os.getpid()
+            
+            # Another thread may have refreshed while we waited
+            creds = cls._credentials
+            if not (creds and creds.valid):
+                creds = self._load_credentials(creds)
+                cls._credentials = creds
+        
+        self.credentials = creds
+        return creds
+    
+    def _load_credentials(self, creds=None):
+        """Load, refresh or obtain credentials (called under the class lock)"""
+        # The token file stores the user's access and refresh tokens.
+        if not creds and os.path.exists(self.TOKEN_FILE):
+            creds = Credentials.from_authorized_user_file(self.TOKEN_FILE, self.SCOPES)
         
         # If there are no (valid) credentials available, let the user log in.
         if not creds or not creds.valid:
@@ -31,10 +92,10 @@ class CalendarService:
                     logger.error(f"Error refreshing credentials: {e}")
                     return None
             else:
-                if os.path.exists('credentials.json'):
+                if os.path.exists(self.CREDENTIALS_FILE):
                     try:
                         flow = InstalledAppFlow.from_client_secrets_file(
-                            'credentials.json', self.SCOPES)
+                            self.CREDENTIALS_FILE, self.SCOPES)
                         creds = flow.run_local_server(port=0)
                     except Exception as e:
                         logger.error(f"Error getting new credentials: {e}")
@@ -45,57 +106,134 @@ class CalendarService:
             
             # Save the credentials for the next run
             if creds:
-                with open('token.json', 'w') as token:
+                with open(self.TOKEN_FILE, 'w') as token:
                     token.write(creds.to_json())
         
         return creds
     
+    def _get_events(self):
+        """Return the cached Calendar events resource, building it once per credentials
+        
+        Building the service parses the discovery document and each
+        resource accessor (service.events()) generates all of its methods,
+        so both are kept rather than rebuilt per call.
+        """
+        creds = self._get_credentials()
+        if not creds:
+            return None
+        
+        cls = CalendarService
+        if cls._service is None or cls._service_credentials is not creds:
+            with cls._lock:
+                if cls._service is None or cls._service_credentials is not creds:
+                    client_options = {'api_endpoint': self.API_ENDPOINT} if self.API_ENDPOINT else None
+                    cls._service = build('calendar', 'v3', credentials=creds,
+                                         client_options=client_options, cache_discovery=False)
+                    cls._events = cls._service.events()
+                    cls._service_credentials = creds
+        return cls._events
+    
+    def _http(self):
+        """This thread's authorized connection, kept alive across requests"""
+        local = CalendarService._local
+        creds = self.credentials
+        if getattr(local, 'credentials', None) is not creds:
+            local.http = AuthorizedHttp(creds, http=httplib2.Http(timeout=30))
+            local.credentials = creds
+        return local.http
+    
+    def _execute(self, request):
+        return request.execute(http=self._http())
+    
+    def event_body(self, booking, event_id=None):
+        """Calendar event resource for a booking (pass event_id to create it with a known id)"""
+        event_start = datetime.combine(booking.preferred_date, datetime.min.time().replace(hour=8))
+        event_end = event_start + timedelta(hours=8)  # Default 8-hour tour
+        
+        event = {
+            'summary': f'Tour Booking - {booking.name} ({booking.destination})',
+            'description': '\n'.join([
+                f'Booking Reference: {booking.booking_reference}',
+                f'Client: {booking.name}',
+                f'Email: {booking.email}',
+                f'Phone: {booking.phone}',
+                f'Destination: {booking.destination}',
+                f'Guests: {booking.guests}',
+                f'Status: {booking.status}',
+                f'Message: {booking.message}'
+            ]),
+            'start': {
+                'dateTime': event_start.isoformat(),
+                'timeZone': 'Africa/Nairobi',
+            },
+            'end': {
+                'dateTime': event_end.isoformat(),
+                'timeZone': 'Africa/Nairobi',
+            },
+            'attendees': [
+                {'email': booking.email, 'displayName': booking.name}
+            ],
+            'reminders': {
+                'useDefault': False,
+                'overrides': [
+                    {'method': 'email', 'minutes': 24 * 60},
+                    {'method': 'popup', 'minutes': 60},
+                ],
+            },
+        }
+        if event_id:
+            event['id'] = event_id
+        return event
+    
+    def execute_batch(self, operations, batch_size=50):
+        """Run calendar operations through batch HTTP requests
+        
+        `operations` is a list of (key, method, params) where method is
+        'insert', 'update' or 'delete' and params are the events.<method>
+        arguments besides calendarId. Returns {key: (response, error)};
+        error is an HttpError for that operation, or the exception that
+        failed its whole batch. Returns None without credentials.
+        """
+        events = self._get_events()
+        if not events:
+            return None
+        
+        results = {}
+        for i in range(0, len(operations), batch_size):
+            chunk = operations[i:i + batch_size]
+            keys = {}
+            
+            def collect(request_id, response, exception):
+                results[keys[request_id]] = (response, exception)
+            
+            if self.API_ENDPOINT:
+                batch = BatchHttpRequest(callback=collect, batch_uri=self.API_ENDPOINT.rstrip('/') + '/batch/calendar/v3')
+            else:
+                batch = CalendarService._service.new_batch_http_request(callback=collect)
+            for index, (key, method, params) in enumerate(chunk):
+                keys[str(index)] = key
+                batch.add(getattr(events, method)(calendarId=self.CALENDAR_ID, **params), request_id=str(index))
+            
+            try:
+                batch.execute(http=self._http())
+            except Exception as e:
+                logger.warning(f"Calendar batch request failed: {e}")
+                for key, _, _ in chunk:
+                    results.setdefault(key, (None, e))
+        
+        return results
+    
     def create_event(self, booking):
         """Create Google Calendar event for booking"""
         try:
-            creds = self._get_credentials()
-            if not creds:
+            events = self._get_events()
+            if not events:
                 logger.warning("No valid credentials for Google Calendar")
                 return None
             
-            service = build('calendar', 'v3', credentials=creds)
-            
-            # Create event details
-            event_start = datetime.combine(booking.preferred_date, datetime.min.time().replace(hour=8))
-            event_end = event_start + timedelta(hours=8)  # Default 8-hour tour
-            
-            event = {
-                'summary': f'Tour Booking - {booking.name} ({booking.destination})',
-                'description': f"""
-                Booking Reference: {booking.booking_reference}
-                Client: {booking.name}
-                Email: {booking.email}
-                Phone: {booking.phone}
-                Destination: {booking.destination}
-                Guests: {booking.guests}
-                Message: {booking.message}
-                """.strip(),
-                'start': {
-                    'dateTime': event_start.isoformat(),
-                    'timeZone': 'Africa/Nairobi',
-                },
-                'end': {
-                    'dateTime': event_end.isoformat(),
-                    'timeZone': 'Africa/Nairobi',
-                },
-                'attendees': [
-                    {'email': booking.email, 'displayName': booking.name}
-                ],
-                'reminders': {
-                    'useDefault': False,
-                    'overrides': [
-                        {'method': 'email', 'minutes': 24 * 60},
-                        {'method': 'popup', 'minutes': 60},
-                    ],
-                },
-            }
-            
-            created_event = service.events().insert(calendarId=self.CALENDAR_ID, body=event).execute()
+            event = self.event_body(booking)
+            
+            created_event = self._execute(events.insert(calendarId=self.CALENDAR_ID, body=event))
             logger.info(f"Created calendar event: {created_event.get('id')}")
             return created_event.get('id')
             
@@ -106,14 +244,12 @@ class CalendarService:
     def update_event(self, event_id, booking):
         """Update existing calendar event"""
         try:
-            creds = self._get_credentials()
-            if not creds:
+            events = self._get_events()
+            if not events:
                 return None
             
-            service = build('calendar', 'v3', credentials=creds)
-            
             # Get existing event
-            event = service.events().get(calendarId=self.CALENDAR_ID, eventId=event_id).execute()
+            event = self._execute(events.get(calendarId=self.CALENDAR_ID, eventId=event_id))
             
             # Update event details
             event['summary'] = f'Tour Booking - {booking.name} ({booking.destination})'
@@ -128,11 +264,11 @@ class CalendarService:
             Message: {booking.message}
             """.strip()
             
-            updated_event = service.events().update(
+            updated_event = self._execute(events.update(
                 calendarId=self.CALENDAR_ID, 
                 eventId=event_id, 
                 body=event
-            ).execute()
+            ))
             
             return updated_event.get('id')
             
@@ -143,12 +279,11 @@ class CalendarService:
     def delete_event(self, event_id):
         """Delete calendar event"""
         try:
-            creds = self._get_credentials()
-            if not creds:
+            events = self._get_events()
+            if not events:
                 return False
             
-            service = build('calendar', 'v3', credentials=creds)
-            service.events().delete(calendarId=self.CALENDAR_ID, eventId=event_id).execute()
+            self._execute(events.delete(calendarId=self.CALENDAR_ID, eventId=event_id))
             
             return True
             
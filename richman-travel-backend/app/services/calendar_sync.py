@@ -0,0 +1,278 @@
+# app/services/calendar_sync.py - Transactional outbox for Google Calendar sync
+from app.extensions import db
+from app.models import Booking, CalendarOutbox
+from app.services.calendar_service import CalendarService
+from app.tasks import sync_calendar, retry_countdown
+from sqlalchemy import event, inspect, insert, select, update, delete, and_, or_, bindparam
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import chain
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Booking columns that appear on the calendar event
+SYNC_COLUMNS = {'name', 'email', 'phone', 'destination', 'preferred_date', 'guests', 'message', 'status'}
+
+# A claim older than this is assumed to belong to a crashed worker
+CLAIM_LEASE_SECONDS = 300
+
+# HTTP statuses that settle an operation without another attempt
+EVENT_MISSING = {404, 410}
+EVENT_EXISTS = 409
+
+def calendar_event_id(booking_id):
+    """Deterministic event id for a booking (base32hex alphabet, 5-1024 chars)"""
+    return f'rtbk{booking_id:08d}'
+
+def _http_status(error):
+    resp = getattr(error, 'resp', None)
+    return getattr(resp, 'status', None)
+
+class CalendarSync:
+    """Drain the calendar outbox into Google Calendar batch requests.
+
+    Booking writes add outbox rows in their own transaction (ORM writes via
+    the before_flush hook below, set-based writes via enqueue()), and the
+    commit schedules a drain. Event ids are derived from booking ids, so a
+    repeated or concurrent drain updates the event rather than duplicating it.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.delay = 5
+        self.batch_size = 50
+        self.max_attempts = 8
+
+    def init_app(self, app):
+        self.enabled = app.config.get('CALENDAR_SYNC_ENABLED', False)
+        self.delay = app.config.get('CALENDAR_SYNC_DELAY', 5)
+        self.batch_size = app.config.get('CALENDAR_SYNC_BATCH_SIZE', 50)
+        self.max_attempts = app.config.get('CALENDAR_SYNC_MAX_ATTEMPTS', 8)
+        app.extensions['calendar_sync'] = self
+
+    def enqueue(self, booking_ids):
+        """Queue bookings changed by set-based statements, in the current transaction"""
+        if not self.enabled or not booking_ids:
+            return
+        now = datetime.utcnow()
+        db.session.execute(insert(CalendarOutbox.__table__), [
+            {'booking_id': booking_id, 'status': 'pending', 'attempts': 0, 'next_attempt_at': now, 'created_at': now}
+            for booking_id in booking_ids
+        ])
+        db.session.info['calendar_outbox_dirty'] = True
+
+    def schedule(self, countdown=None):
+        """Ask a worker to drain the outbox shortly
+
+        Without a broker the task would run inline, inside the request that
+        committed the change, so nothing is scheduled and the rows wait for
+        `flask sync-calendar`; such deployments must run it from cron. With
+        a broker, beat also drains every CALENDAR_SYNC_INTERVAL seconds.
+        """
+        if sync_calendar.app.conf.task_always_eager:
+            return
+        try:
+            sync_calendar.apply_async(countdown=self.delay if countdown is None else countdown)
+        except Exception as e:
+            # The rows stay queued for the next drain
+            logger.warning(f"Could not schedule calendar sync: {e}")
+
+    def _claim(self, limit):
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        claimable = and_(
+            CalendarOutbox.status == 'pending',
+            CalendarOutbox.next_attempt_at <= now,
+            or_(
+                CalendarOutbox.claimed_at.is_(None),
+                CalendarOutbox.claimed_at < now - timedelta(seconds=CLAIM_LEASE_SECONDS)
+            )
+        )
+        candidates = select(CalendarOutbox.id).where(claimable).order_by(CalendarOutbox.id).limit(limit)
+        # The claim conditions are repeated on the outer UPDATE so a row taken
+        # by a concurrent drain is re-checked and skipped
+        db.session.execute(
+            update(CalendarOutbox)
+            .where(CalendarOutbox.id.in_(candidates.scalar_subquery()), claimable)
+            .values(claimed_by=token, claimed_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+        rows = db.session.execute(
+            select(CalendarOutbox.id, CalendarOutbox.booking_id, CalendarOutbox.attempts)
+            .where(CalendarOutbox.claimed_by == token)
+        ).all()
+        return token, rows
+
+    def _operation(self, calendar, booking, booking_id, retry_as=None):
+        """(method, params) bringing the booking's event up to date"""
+        event_id = booking.google_event_id if booking and booking.google_event_id else calendar_event_id(booking_id)
+
+        if booking is None or booking.status == 'cancelled' or not booking.preferred_date:
+            if booking is not None and not booking.preferred_date and not booking.google_event_id:
+                return None  # Never had an event
+            return 'delete', {'eventId': event_id}
+
+        body = calendar.event_body(booking)
+        # A deleted event keeps its id; updating it with this status restores it
+        body['status'] = 'confirmed'
+        if retry_as == 'insert' or (retry_as is None and not booking.google_event_id):
+            return 'insert', {'body': dict(body, id=calendar_event_id(booking_id))}
+        if retry_as == 'update':
+            event_id = calendar_event_id(booking_id)
+        return 'update', {'eventId': event_id, 'body': body}
+
+    def drain(self, limit=500):
+        """Sync up to `limit` outbox rows; returns counts for logging and rescheduling"""
+        token, rows = self._claim(limit)
+        stats = {'claimed': len(rows), 'bookings': 0, 'synced': 0, 'retried': 0, 'failed': 0, 'api_calls': 0}
+        if not rows:
+            return stats
+
+        rows_by_booking = defaultdict(list)
+        for row in rows:
+            rows_by_booking[row.booking_id].append(row)
+        bookings = {booking.id: booking for booking in Booking.query.filter(Booking.id.in_(list(rows_by_booking)))}
+        stats['bookings'] = len(rows_by_booking)
+
+        calendar = CalendarService()
+        event_ids = {}   # booking_id -> google_event_id to store (None clears it)
+        errors = {}      # booking_id -> error message
+        pending = {}
+        for booking_id in rows_by_booking:
+            operation = self._operation(calendar, bookings.get(booking_id), booking_id)
+            if operation is None:
+                event_ids[booking_id] = None
+            else:
+                pending[booking_id] = operation
+
+        # Round one as planned; round two retries an insert that hit an
+        # existing id as an update, and an update of a missing event as an insert
+        for _ in range(2):
+            if not pending:
+                break
+            results = calendar.execute_batch(
+                [(booking_id, method, params) for booking_id, (method, params) in pending.items()],
+                batch_size=self.batch_size
+            )
+            stats['api_calls'] += len(pending)
+            if results is None:
+                for booking_id in pending:
+                    errors[booking_id] = 'Google Calendar credentials unavailable'
+                break
+
+            retry = {}
+            for booking_id, (method, params) in pending.items():
+                response, error = results.get(booking_id, (None, RuntimeError('No response in batch')))
+                status = _http_status(error)
+                if error is None:
+                    event_ids[booking_id] = None if method == 'delete' else response.get('id')
+                elif method == 'delete' and status in EVENT_MISSING:
+                    event_ids[booking_id] = None
+                elif method == 'insert' and status == EVENT_EXISTS:
+                    retry[booking_id] = self._operation(calendar, bookings.get(booking_id), booking_id, retry_as='update')
+                elif method == 'update' and status in EVENT_MISSING:
+                    retry[booking_id] = self._operation(calendar, bookings.get(booking_id), booking_id, retry_as='insert')
+                else:
+                    errors[booking_id] = str(error)
+            pending = retry
+
+        for booking_id in pending:
+            errors.setdefault(booking_id, 'Event id conflict was not resolved')
+
+        self._record(token, rows_by_booking, bookings, event_ids, errors, stats)
+        logger.info(
+            f"Calendar sync: {stats['synced']} bookings synced, {stats['retried']} retrying, "
+            f"{stats['failed']} failed ({stats['api_calls']} operations)"
+        )
+        return stats
+
+    def _record(self, token, rows_by_booking, bookings, event_ids, errors, stats):
+        now = datetime.utcnow()
+
+        changed = [
+            {'b_id': booking_id, 'b_event_id': event_id}
+            for booking_id, event_id in event_ids.items()
+            if booking_id in bookings and bookings[booking_id].google_event_id != event_id
+        ]
+        if changed:
+            table = Booking.__table__
+            # updated_at is left alone: syncing is not a booking change
+            db.session.execute(
+                update(table).where(table.c.id == bindparam('b_id')).values(
+                    google_event_id=bindparam('b_event_id'), updated_at=table.c.updated_at
+                ),
+                changed
+            )
+
+        done_ids = [row.id for booking_id in event_ids for row in rows_by_booking[booking_id]]
+        if done_ids:
+            db.session.execute(
+                delete(CalendarOutbox)
+                .where(CalendarOutbox.id.in_(done_ids), CalendarOutbox.claimed_by == token)
+                .execution_options(synchronize_session=False)
+            )
+        stats['synced'] = len(event_ids)
+
+        retries = []
+        for booking_id, message in errors.items():
+            booking_rows = rows_by_booking[booking_id]
+            attempts = max(row.attempts for row in booking_rows) + 1
+            exhausted = attempts >= self.max_attempts
+            stats['failed' if exhausted else 'retried'] += 1
+            retries.extend({
+                'o_id': row.id,
+                'o_status': 'failed' if exhausted else 'pending',
+                'o_attempts': attempts,
+                'o_next': now + timedelta(seconds=retry_countdown(attempts - 1)),
+                'o_error': message[:2000]
+            } for row in booking_rows)
+        if retries:
+            table = CalendarOutbox.__table__
+            db.session.execute(
+                update(table).where(table.c.id == bindparam('o_id')).values(
+                    status=bindparam('o_status'),
+                    attempts=bindparam('o_attempts'),
+                    next_attempt_at=bindparam('o_next'),
+                    last_error=bindparam('o_error'),
+                    claimed_by=None,
+                    claimed_at=None
+                ),
+                retries
+            )
+
+        db.session.commit()
+
+    def next_attempt_at(self):
+        """When the earliest pending row becomes due, or None"""
+        return db.session.query(db.func.min(CalendarOutbox.next_attempt_at)).filter(
+            CalendarOutbox.status == 'pending'
+        ).scalar()
+
+calendar_sync = CalendarSync()
+
+def _has_sync_changes(booking):
+    state = inspect(booking)
+    return any(state.attrs[key].history.has_changes() for key in SYNC_COLUMNS)
+
+@event.listens_for(Session, 'before_flush')
+def _queue_calendar_sync(session, flush_context, instances):
+    if not calendar_sync.enabled:
+        return
+    for obj in chain(session.new, session.dirty):
+        if isinstance(obj, Booking) and (obj in session.new or _has_sync_changes(obj)):
+            session.add(CalendarOutbox(booking=obj))
+            session.info['calendar_outbox_dirty'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _schedule_calendar_sync(session):
+    if session.info.pop('calendar_outbox_dirty', False):
+        calendar_sync.schedule()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_calendar_sync(session):
+    session.info.pop('calendar_outbox_dirty', None)
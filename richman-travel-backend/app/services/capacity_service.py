@@ -0,0 +1,245 @@
+# app/services/capacity_service.py - Per-destination, per-date capacity
+from app.extensions import db
+from app.models import Booking, Destination, DestinationCapacity
+from app.utils.upsert import upsert_rows
+from sqlalchemy import event, inspect, select, update, delete, or_, func, bindparam
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from datetime import timedelta
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bookings in these statuses occupy their date
+HOLDING_STATUSES = {'pending', 'confirmed', 'completed'}
+
+# Booking columns that decide which date a booking occupies, and how much of it
+CAPACITY_COLUMNS = ['status', 'destination', 'preferred_date', 'guests']
+
+class CapacityExceeded(Exception):
+    """Not enough spots left for a new booking"""
+
+    def __init__(self, destination, day, remaining):
+        self.destination = destination
+        self.day = day
+        self.remaining = max(remaining, 0)
+        super().__init__(f"Only {self.remaining} spots left for {destination} on {day.isoformat()}")
+
+def _claim(status, destination, day, guests):
+    """(destination slug, date, guests) a booking occupies, or None"""
+    if (status or 'pending') not in HOLDING_STATUSES or not destination or not day:
+        return None
+    return destination, day, guests or 1
+
+class CapacityService:
+    """Keep destination_capacity.booked in step with bookings.
+
+    New bookings reserve spots with one conditional UPDATE
+    (booked + guests <= capacity) in the booking's own transaction: the row
+    lock serialises concurrent bookings for the same date, and the loser
+    sees the winner's total, so a date cannot be overbooked. Status, date
+    and guest changes by admins adjust the totals without the check.
+    """
+
+    @staticmethod
+    def _destinations(slugs):
+        """slug -> (id, daily_capacity) for known destinations"""
+        if not slugs:
+            return {}
+        rows = db.session.execute(
+            select(Destination.slug, Destination.id, Destination.daily_capacity)
+            .where(Destination.slug.in_(list(slugs)))
+        )
+        return {row.slug: (row.id, row.daily_capacity) for row in rows}
+
+    @staticmethod
+    def _ensure_rows(keys):
+        """Create missing (destination_id, date) rows with nothing booked"""
+        upsert_rows(DestinationCapacity.__table__, [
+            {'destination_id': destination_id, 'date': day, 'booked': 0} for destination_id, day in set(keys)
+        ], ['destination_id', 'date'])
+
+    @staticmethod
+    def _try_reserve(destination, day, guests):
+        """One conditional UPDATE; False if the row is missing or the date is full"""
+        table = DestinationCapacity.__table__
+        destination_id = select(Destination.id).where(Destination.slug == destination).scalar_subquery()
+        daily_capacity = select(Destination.daily_capacity).where(
+            Destination.id == table.c.destination_id
+        ).scalar_subquery()
+        limit = func.coalesce(table.c.capacity, daily_capacity)
+        result = db.session.execute(
+            update(table)
+            .where(
+                table.c.destination_id == destination_id,
+                table.c.date == day,
+                or_(limit.is_(None), table.c.booked + guests <= limit)
+            )
+            .values(booked=table.c.booked + guests)
+        )
+        return result.rowcount == 1
+
+    @staticmethod
+    def reserve(destination, day, guests):
+        """Take `guests` spots on `day`, or raise CapacityExceeded
+
+        `destination` is a slug; unknown destinations are not tracked.
+        Runs in the caller's transaction, so a rollback gives the spots back.
+        """
+        if CapacityService._try_reserve(destination, day, guests):
+            return
+
+        # The first booking for this date, an untracked destination, or a full date
+        known = CapacityService._destinations([destination])
+        if destination not in known:
+            return
+        destination_id, daily_capacity = known[destination]
+        CapacityService._ensure_rows([(destination_id, day)])
+        if CapacityService._try_reserve(destination, day, guests):
+            return
+
+        table = DestinationCapacity.__table__
+        row = db.session.execute(
+            select(table.c.capacity, table.c.booked)
+            .where(table.c.destination_id == destination_id, table.c.date == day)
+        ).one()
+        limit = row.capacity if row.capacity is not None else daily_capacity
+        raise CapacityExceeded(destination, day, limit - row.booked)
+
+    @staticmethod
+    def adjust(deltas):
+        """Apply {(destination slug, date): guests} to the running totals, unchecked"""
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        known = CapacityService._destinations({slug for slug, _ in deltas})
+        params = sorted((
+            {'d_id': known[slug][0], 'd_date': day, 'd_delta': delta}
+            for (slug, day), delta in deltas.items() if slug in known
+        ), key=lambda p: (p['d_id'], p['d_date']))
+        if not params:
+            return
+
+        CapacityService._ensure_rows([(p['d_id'], p['d_date']) for p in params])
+        table = DestinationCapacity.__table__
+        db.session.execute(
+            update(table)
+            .where(table.c.destination_id == bindparam('d_id'), table.c.date == bindparam('d_date'))
+            .values(booked=table.c.booked + bindparam('d_delta')),
+            params
+        )
+
+    @staticmethod
+    def booking_deltas(before, after):
+        """Running-total changes between two lists of (status, destination, date, guests)"""
+        deltas = defaultdict(int)
+        for values, sign in [(before, -1), (after, 1)]:
+            for booking in values:
+                claim = _claim(*booking)
+                if claim:
+                    deltas[claim[:2]] += sign * claim[2]
+        return deltas
+
+    @staticmethod
+    def get_availability(destination, start, end):
+        """Capacity, booked and remaining spots for each date in [start, end]"""
+        rows = {
+            row.date: row for row in DestinationCapacity.query.filter(
+                DestinationCapacity.destination_id == destination.id,
+                DestinationCapacity.date.between(start, end)
+            )
+        }
+
+        dates = []
+        day = start
+        while day <= end:
+            row = rows.get(day)
+            capacity = row.capacity if row is not None and row.capacity is not None else destination.daily_capacity
+            booked = row.booked if row is not None else 0
+            dates.append({
+                'date': day.isoformat(),
+                'capacity': capacity,
+                'booked': booked,
+                'remaining': max(capacity - booked, 0) if capacity is not None else None
+            })
+            day += timedelta(days=1)
+        return dates
+
+    @staticmethod
+    def set_capacity(destination, start, end, capacity):
+        """Override capacity for each date in [start, end]; None reverts to daily_capacity; the caller commits"""
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        CapacityService._ensure_rows([(destination.id, day) for day in days])
+        db.session.execute(
+            update(DestinationCapacity)
+            .where(DestinationCapacity.destination_id == destination.id, DestinationCapacity.date.between(start, end))
+            .values(capacity=capacity)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def rebuild():
+        """Recompute every running total from bookings; returns the number of dates"""
+        statuses = list(HOLDING_STATUSES)
+        totals = db.session.execute(
+            select(Destination.id, Booking.preferred_date, func.sum(func.coalesce(Booking.guests, 1)))
+            .join(Destination, Destination.slug == Booking.destination)
+            .where(Booking.status.in_(statuses), Booking.preferred_date.isnot(None))
+            .group_by(Destination.id, Booking.preferred_date)
+        ).all()
+
+        table = DestinationCapacity.__table__
+        # Totals for dates with no bookings left go to zero; capacity overrides stay
+        db.session.execute(update(table).values(booked=0))
+        db.session.execute(delete(table).where(table.c.capacity.is_(None)))
+        CapacityService._ensure_rows([(destination_id, day) for destination_id, day, _ in totals])
+        if totals:
+            db.session.execute(
+                update(table)
+                .where(table.c.destination_id == bindparam('d_id'), table.c.date == bindparam('d_date'))
+                .values(booked=bindparam('d_booked')),
+                [{'d_id': destination_id, 'd_date': day, 'd_booked': booked} for destination_id, day, booked in totals]
+            )
+        db.session.commit()
+        return len(totals)
+
+def _committed(state, key):
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return None
+
+@event.listens_for(Session, 'before_flush')
+def _track_capacity(session, flush_context, instances):
+    reservations = defaultdict(int)
+    before, after = [], []
+
+    for obj in session.new:
+        if isinstance(obj, Booking):
+            claim = _claim(obj.status, obj.destination, obj.preferred_date, obj.guests)
+            if claim:
+                reservations[claim[:2]] += claim[2]
+
+    for obj in session.dirty:
+        if not isinstance(obj, Booking):
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[key].history.has_changes() for key in CAPACITY_COLUMNS):
+            continue
+        before.append(tuple(_committed(state, key) for key in CAPACITY_COLUMNS))
+        after.append(tuple(getattr(obj, key) for key in CAPACITY_COLUMNS))
+
+    for obj in session.deleted:
+        if isinstance(obj, Booking):
+            before.append(tuple(_committed(inspect(obj), key) for key in CAPACITY_COLUMNS))
+
+    if not reservations and not before:
+        return
+
+    # Admin changes first: a cancellation in the same flush frees its spots
+    if before:
+        CapacityService.adjust(CapacityService.booking_deltas(before, after))
+
+    # New bookings are checked against capacity; several for one date reserve together
+    for (destination, day), guests in reservations.items():
+        CapacityService.reserve(destination, day, guests)
@@ -0,0 +1,289 @@
+# app/services/catalog_service.py - In-process destination catalog cache
+from app.extensions import db
+from app.models import Destination
+from app.utils.helpers import make_etag
+from sqlalchemy import event, inspect, case, func
+from sqlalchemy.orm import Session
+from itertools import chain
+import json
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Columns that change without affecting the published catalog
+VOLATILE_COLUMNS = {'view_count', 'updated_at'}
+
+# Rows re-encoded per query when a snapshot is rebuilt
+FRAGMENT_LOAD_BATCH = 500
+
+class CatalogSnapshot:
+    """Pre-encoded active destinations as of one catalog version.
+
+    `rows` are lightweight (id, slug, is_featured, updated_at, view_count)
+    tuples in listing order and `fragments` maps destination id to its JSON
+    bytes, so response bodies are assembled by joining bytes once per
+    snapshot.
+    """
+
+    def __init__(self, version, rows, fragments):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.fragments = fragments
+        self.by_slug = {row.slug: row for row in rows}
+        self.slug_by_id = {row.id: row.slug for row in rows}
+
+        featured_rows = [row for row in rows if row.is_featured]
+        self.listings = {
+            'active': self._build_listing('active', rows),
+            'featured': self._build_listing('featured', featured_rows)
+        }
+        self._decoded = None
+
+    def _build_listing(self, scope, rows):
+        body = b''.join([
+            b'{"success":true,"data":[',
+            b','.join(self.fragments[row.id] for row in rows),
+            b'],"count":%d}' % len(rows)
+        ])
+        # HTTP validators: max(updated_at) plus row count, and the view counts
+        # in the body (view flushes leave updated_at alone)
+        last_modified = max((row.updated_at for row in rows if row.updated_at), default=None)
+        etag = make_etag(scope, len(rows), last_modified, [row.view_count for row in rows])
+        return body, [row.id for row in rows], etag, last_modified
+
+    def listing(self, featured_only=False):
+        """Return (body, etag, last_modified) for a listing response"""
+        body, _, etag, last_modified = self.listings['featured' if featured_only else 'active']
+        return body, etag, last_modified
+
+    def listing_ids(self, featured_only=False):
+        """Destination ids of a listing, in listing order"""
+        return self.listings['featured' if featured_only else 'active'][1]
+
+    def subset_body(self, ids, extra=None):
+        """Listing body for the given ids (in order), plus extra top-level keys"""
+        fragments = [self.fragments[dest_id] for dest_id in ids if dest_id in self.fragments]
+        parts = [
+            b'{"success":true,"data":[',
+            b','.join(fragments),
+            b'],"count":%d' % len(fragments)
+        ]
+        for key, value in (extra or {}).items():
+            # Compact, like the fragments (Destination.to_json)
+            parts.append(b',' + json.dumps(key).encode('utf-8') + b':' + json.dumps(value, separators=(',', ':')).encode('utf-8'))
+        parts.append(b'}')
+        return b''.join(parts)
+
+    def detail(self, slug):
+        """Return (body, etag, last_modified) for one destination, or None"""
+        row = self.by_slug.get(slug)
+        if row is None:
+            return None
+        body = b'{"success":true,"data":' + self.fragments[row.id] + b'}'
+        return body, make_etag('destination', row.id, row.updated_at, row.view_count), row.updated_at
+
+    def destinations(self, featured_only=False):
+        """Decoded destination dicts, for callers that need Python objects"""
+        if self._decoded is None:
+            self._decoded = {dest_id: json.loads(fragment) for dest_id, fragment in self.fragments.items()}
+        _, ids, _, _ = self.listings['featured' if featured_only else 'active']
+        return [self._decoded[dest_id] for dest_id in ids]
+
+class CatalogCache:
+    """Hold the serialized destination catalog in process memory.
+
+    Every committed write to a Destination bumps the catalog version and the
+    next read rebuilds the snapshot, so steady-state reads never query the
+    database. CATALOG_CACHE_TTL bounds how long another worker's writes can
+    go unnoticed, since the version counter is per process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._snapshot = None
+        self._fragments = {}  # id -> ((updated_at, view_count), JSON bytes)
+        self.ttl = 300
+
+    def init_app(self, app):
+        self.ttl = app.config.get('CATALOG_CACHE_TTL', 300)
+        app.extensions['catalog_cache'] = self
+
+        # Warm the cache; tables may not exist yet (e.g. before `flask db upgrade`)
+        with app.app_context():
+            try:
+                self.warm()
+            except Exception as e:
+                logger.warning(f"Catalog cache not warmed, loading on first read: {e.__class__.__name__}")
+                db.session.rollback()
+
+    @property
+    def version(self):
+        return self._version
+
+    def bump_version(self):
+        """Invalidate the cached catalog"""
+        with self._lock:
+            self._version += 1
+        logger.debug(f"Catalog version bumped to {self._version}")
+
+    def warm(self):
+        """Load the catalog if it is missing or stale"""
+        return self._current()
+
+    def snapshot(self):
+        """Return the current catalog snapshot"""
+        return self._current()
+
+    def get_destinations(self, featured_only=False):
+        """Return serialized active (or featured) destinations"""
+        return self._current().destinations(featured_only)
+
+    def _is_stale(self, snapshot):
+        if snapshot is None or snapshot.version != self._version:
+            return True
+        return self.ttl > 0 and time.monotonic() - snapshot.loaded_at > self.ttl
+
+    def _current(self):
+        snapshot = self._snapshot
+        if not self._is_stale(snapshot):
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if self._is_stale(snapshot):
+                # Tag with the version seen before loading, so a write that
+                # lands mid-query forces another reload
+                version = self._version
+                snapshot = self._load(version)
+                self._snapshot = snapshot
+                logger.info(f"Catalog cache loaded {len(snapshot.by_slug)} destinations (version {version})")
+        return snapshot
+
+    def _load(self, version):
+        rows = db.session.query(
+            Destination.id,
+            Destination.slug,
+            Destination.is_featured,
+            Destination.updated_at,
+            Destination.view_count
+        ).filter_by(is_active=True).order_by(Destination.created_at.desc()).all()
+
+        # Re-encode only rows written since their fragment was built
+        keys = {row.id: (row.updated_at, row.view_count) for row in rows}
+        stale_ids = [row.id for row in rows if self._fragments.get(row.id, (None,))[0] != keys[row.id]]
+        fragments = {
+            dest_id: self._fragments[dest_id]
+            for dest_id in keys if dest_id not in stale_ids
+        }
+        for i in range(0, len(stale_ids), FRAGMENT_LOAD_BATCH):
+            chunk = stale_ids[i:i + FRAGMENT_LOAD_BATCH]
+            for dest in Destination.query.filter(Destination.id.in_(chunk)):
+                fragments[dest.id] = (keys[dest.id], dest.to_json())
+
+        self._fragments = fragments
+        return CatalogSnapshot(
+            version, rows, {dest_id: fragment for dest_id, (_, fragment) in fragments.items()}
+        )
+
+catalog_cache = CatalogCache()
+
+# Facet buckets: (label, lower bound inclusive, upper bound exclusive)
+PRICE_BUCKETS = [('under_500', None, 500), ('500_1000', 500, 1000), ('1000_2000', 1000, 2000), ('2000_plus', 2000, None)]
+DURATION_BUCKETS = [('1_day', None, 2), ('2_3_days', 2, 4), ('4_7_days', 4, 8), ('8_plus_days', 8, None)]
+
+def _bucket_expression(column, buckets):
+    whens = []
+    for label, lower, upper in buckets:
+        if upper is None:
+            whens.append((column >= lower, label))
+        else:
+            whens.append((column < upper, label))
+    return case(*whens, else_=None)
+
+class CatalogService:
+    @staticmethod
+    def filter_clauses(filters, featured_only=False):
+        """SQL criteria for active destinations matching the facet filters"""
+        clauses = [Destination.is_active.is_(True)]
+        if featured_only:
+            clauses.append(Destination.is_featured.is_(True))
+        # A destination matches a budget when its price range overlaps it
+        if 'min_price' in filters:
+            clauses.append(Destination.max_price >= filters['min_price'])
+        if 'max_price' in filters:
+            clauses.append(Destination.min_price <= filters['max_price'])
+        if 'min_days' in filters:
+            clauses.append(Destination.duration_days >= filters['min_days'])
+        if 'max_days' in filters:
+            clauses.append(Destination.duration_days <= filters['max_days'])
+        if filters.get('difficulty'):
+            clauses.append(Destination.difficulty_level.in_(filters['difficulty']))
+        return clauses
+
+    @staticmethod
+    def filter_destination_ids(filters, featured_only=False):
+        """Ids of matching destinations in listing order"""
+        rows = db.session.query(Destination.id).filter(
+            *CatalogService.filter_clauses(filters, featured_only)
+        ).order_by(Destination.created_at.desc()).all()
+        return [row.id for row in rows]
+
+    @staticmethod
+    def get_facet_counts(filters, featured_only=False):
+        """Difficulty, price and duration facet counts from one grouped query"""
+        price_bucket = _bucket_expression(Destination.min_price, PRICE_BUCKETS).label('price_bucket')
+        duration_bucket = _bucket_expression(Destination.duration_days, DURATION_BUCKETS).label('duration_bucket')
+
+        rows = db.session.query(
+            Destination.difficulty_level,
+            price_bucket,
+            duration_bucket,
+            func.count(Destination.id)
+        ).filter(
+            *CatalogService.filter_clauses(filters, featured_only)
+        ).group_by(
+            Destination.difficulty_level, price_bucket, duration_bucket
+        ).all()
+
+        facets = {
+            'difficulty': {},
+            'price': {label: 0 for label, _, _ in PRICE_BUCKETS},
+            'duration': {label: 0 for label, _, _ in DURATION_BUCKETS}
+        }
+        for difficulty, price, duration, count in rows:
+            if difficulty:
+                facets['difficulty'][difficulty] = facets['difficulty'].get(difficulty, 0) + count
+            if price:
+                facets['price'][price] += count
+            if duration:
+                facets['duration'][duration] += count
+        return facets
+
+def _has_catalog_changes(obj):
+    return any(
+        attr.history.has_changes()
+        for attr in inspect(obj).attrs
+        if attr.key not in VOLATILE_COLUMNS
+    )
+
+@event.listens_for(Session, 'after_flush')
+def _track_catalog_writes(session, flush_context):
+    changed = chain(
+        session.new,
+        session.deleted,
+        (obj for obj in session.dirty if isinstance(obj, Destination) and _has_catalog_changes(obj))
+    )
+    if any(isinstance(obj, Destination) for obj in changed):
+        session.info['catalog_dirty'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _bump_catalog_version(session):
+    if session.info.pop('catalog_dirty', False):
+        catalog_cache.bump_version()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_catalog_writes(session):
+    session.info.pop('catalog_dirty', None)
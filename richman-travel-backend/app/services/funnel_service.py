@@ -0,0 +1,181 @@
+# app/services/funnel_service.py - Per-destination conversion funnel counters
+from app.extensions import db
+from app.models import Booking, Destination, DestinationFunnelDaily
+from app.utils.background import PeriodicFlusher
+from app.utils.upsert import upsert_rows
+from flask import request, g
+from sqlalchemy import event, select, func
+from sqlalchemy.orm import Session
+from collections import Counter
+from datetime import datetime
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+FUNNEL_STAGES = ['page_visits', 'detail_views', 'bookings']
+
+# Public endpoint whose 200 response counts as a detail view of its slug
+DETAIL_ENDPOINT = 'public.get_destination_by_slug'
+
+def record_impressions(slugs):
+    """Note the destinations a listing, search or landing response shows
+
+    Each one counts as a page visit once the response goes out with 200.
+    """
+    g.funnel_impressions = list(dict.fromkeys(slugs))
+
+def _rate(numerator, denominator):
+    # Capped: the stages are counted independently (see FunnelService.rates)
+    return round(min(numerator / denominator, 1.0), 4) if denominator else None
+
+class FunnelService:
+    """Keep destination_funnel_daily in step with destination traffic and bookings.
+
+    Page visits (the destination shown in a listing, search or landing
+    response) and detail views (its detail page served in full) come from
+    FunnelCounter; bookings are counted in the booking's own transaction.
+    Repeat reloads answered with 304 are not counted.
+    Conversion over any range is a sum over (days x destinations) rows,
+    never a scan of site_visits or bookings.
+    """
+
+    @staticmethod
+    def add(counts):
+        """Add {(day, slug, stage): n} to destination_funnel_daily; the caller commits"""
+        rows = {}
+        for (day, slug, stage), count in counts.items():
+            row = rows.setdefault((day, slug), dict.fromkeys(FUNNEL_STAGES, 0))
+            row[stage] += count
+        upsert_rows(DestinationFunnelDaily.__table__, [
+            {'day': day, 'destination': slug, **row} for (day, slug), row in rows.items()
+        ], ['day', 'destination'], set_=FUNNEL_STAGES)
+
+    @staticmethod
+    def record_bookings(bookings):
+        """Count new bookings, given (destination, created_at) pairs; the caller commits
+
+        Only destinations that exist are counted; Booking.destination is free text.
+        """
+        bookings = [(destination, created_at) for destination, created_at in bookings if destination]
+        if not bookings:
+            return
+        known = set(db.session.execute(
+            select(Destination.slug).where(Destination.slug.in_({destination for destination, _ in bookings}))
+        ).scalars())
+        FunnelService.add(Counter(
+            ((created_at or datetime.utcnow()).date(), destination, 'bookings')
+            for destination, created_at in bookings if destination in known
+        ))
+
+    @staticmethod
+    def get_funnel(start, end, destination=None):
+        """Funnel totals and conversion rates per destination for the days [start, end]"""
+        table = DestinationFunnelDaily.__table__
+        query = select(
+            table.c.destination,
+            *(func.sum(table.c[stage]).label(stage) for stage in FUNNEL_STAGES)
+        ).where(table.c.day.between(start, end)).group_by(table.c.destination)
+        if destination:
+            query = query.where(table.c.destination == destination)
+
+        destinations = []
+        totals = dict.fromkeys(FUNNEL_STAGES, 0)
+        for row in db.session.execute(query):
+            counts = {stage: int(getattr(row, stage) or 0) for stage in FUNNEL_STAGES}
+            for stage in FUNNEL_STAGES:
+                totals[stage] += counts[stage]
+            destinations.append({'destination': row.destination, **counts, **FunnelService.rates(counts)})
+
+        destinations.sort(key=lambda item: (item['page_visits'], item['bookings']), reverse=True)
+        return {'totals': {**totals, **FunnelService.rates(totals)}, 'destinations': destinations}
+
+    @staticmethod
+    def rates(counts):
+        """Stage-to-stage rates between 0 and 1, or None without traffic
+
+        Each stage is counted on its own, not per visitor. Detail views
+        include direct links that never passed a listing, and bookings
+        include form bookings that never opened the detail page. A later
+        stage can therefore outnumber an earlier one, and its rate is then
+        capped at 1. The raw counts are returned next to the rates.
+        """
+        return {
+            'view_rate': _rate(counts['detail_views'], counts['page_visits']),
+            'booking_rate': _rate(counts['bookings'], counts['detail_views']),
+            'conversion_rate': _rate(counts['bookings'], counts['page_visits'])
+        }
+
+class FunnelCounter:
+    """Buffer destination page visits and detail views per worker.
+
+    Counts are keyed by UTC day and written with one FunnelService.add()
+    upsert per flush, every FUNNEL_FLUSH_INTERVAL seconds. An interval of 0
+    writes through on every event (used in tests).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()  # (day, slug, stage) -> count
+        self._flusher = None
+        self.app = None
+
+    def init_app(self, app):
+        self.app = app
+        interval = app.config.get('FUNNEL_FLUSH_INTERVAL', 10)
+        self._flusher = PeriodicFlusher('funnel-counter', self.flush, interval) if interval > 0 else None
+        app.after_request(self._after_request)
+        app.extensions['funnel'] = self
+
+    def _after_request(self, response):
+        impressions = g.pop('funnel_impressions', None)
+        if request.method != 'GET' or response.status_code != 200:
+            return response
+
+        events = [(slug, 'page_visits') for slug in impressions or ()]
+        if request.endpoint == DETAIL_ENDPOINT:
+            slug = (request.view_args or {}).get('slug')
+            if slug:
+                events.append((slug, 'detail_views'))
+        if events:
+            self.record(events)
+        return response
+
+    def record(self, events, day=None):
+        """Count one event per (slug, stage) pair"""
+        day = day or datetime.utcnow().date()
+        with self._lock:
+            for slug, stage in events:
+                self._pending[(day, slug, stage)] += 1
+
+        if self._flusher is None:
+            self.flush()
+            return
+        self._flusher.ensure_started()
+
+    def flush(self):
+        """Write pending page visits and detail views; returns the number of events written"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return 0
+
+        with self.app.app_context():
+            try:
+                FunnelService.add(pending)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error writing funnel counters: {e}")
+                with self._lock:
+                    self._pending.update(pending)
+                return 0
+        return sum(pending.values())
+
+funnel_counter = FunnelCounter()
+
+@event.listens_for(Session, 'before_flush')
+def _count_bookings(session, flush_context, instances):
+    new_bookings = [(obj.destination, obj.created_at) for obj in session.new if isinstance(obj, Booking)]
+    if new_bookings:
+        FunnelService.record_bookings(new_bookings)
@@ -0,0 +1,88 @@
+# app/services/reference_allocator.py - Collision-free booking references
+from app.extensions import db
+from app.models import ReferenceBlock
+from app.utils.upsert import upsert_rows
+from sqlalchemy import select
+from datetime import datetime
+import os
+import string
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+ALPHABET = string.ascii_uppercase + string.digits
+SUFFIX_LENGTH = 4
+CAPACITY = len(ALPHABET) ** SUFFIX_LENGTH  # references per day
+
+# Bijective scramble of the sequence (multiplier is coprime with CAPACITY),
+# so consecutive bookings do not get consecutive references
+SCRAMBLE_MULTIPLIER = 1000003
+SCRAMBLE_OFFSET = 482331
+
+class ReferenceSpaceExhausted(Exception):
+    """All RT{YYMMDD}XXXX references for a day have been handed out"""
+
+def encode_sequence(sequence):
+    """Map a per-day sequence number onto a unique 4-character suffix"""
+    value = (sequence * SCRAMBLE_MULTIPLIER + SCRAMBLE_OFFSET) % CAPACITY
+    chars = []
+    for _ in range(SUFFIX_LENGTH):
+        value, digit = divmod(value, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+class ReferenceAllocator:
+    """Hand out booking references from per-day sequence blocks.
+
+    Each worker reserves REFERENCE_BLOCK_SIZE sequence numbers at a time
+    with one atomic upsert on booking_reference_blocks, then allocates from
+    the block in memory, so a booking costs no extra queries and two
+    workers can never issue the same reference. Unused numbers in a block
+    are skipped when a worker exits.
+    """
+
+    def __init__(self, block_size=100):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._pid = None
+        self._day = None
+        self._next = 0
+        self._end = 0
+
+    def init_app(self, app):
+        self.block_size = app.config.get('REFERENCE_BLOCK_SIZE', 100)
+        app.extensions['reference_allocator'] = self
+
+    def allocate(self, today=None):
+        """Return a new RT{YYMMDD}XXXX reference"""
+        day = (today or datetime.now()).strftime('%y%m%d')
+        with self._lock:
+            # A block reserved before fork belongs to the parent
+            if self._pid != os.getpid() or self._day != day or self._next >= self._end:
+                self._next, self._end = self._reserve(day)
+                self._day = day
+                self._pid = os.getpid()
+            sequence = self._next
+            self._next += 1
+        return f"RT{day}{encode_sequence(sequence)}"
+
+    def _reserve(self, day):
+        # Own connection and transaction: the reservation must commit even
+        # if the caller's session later rolls back
+        with db.engine.begin() as connection:
+            end = self._increment(connection, day)
+
+        start = end - self.block_size
+        if start >= CAPACITY:
+            raise ReferenceSpaceExhausted(f"No booking references left for {day}")
+        logger.debug(f"Reserved booking reference block {start}-{end} for {day}")
+        return start, min(end, CAPACITY)
+
+    def _increment(self, connection, day):
+        table = ReferenceBlock.__table__
+        # The upsert holds the row lock until commit, so this reads our own increment
+        upsert_rows(table, [{'day': day, 'next_value': self.block_size}], ['day'], set_=['next_value'], connection=connection)
+        return connection.execute(select(table.c.next_value).where(table.c.day == day)).scalar_one()
+
+reference_allocator = ReferenceAllocator()
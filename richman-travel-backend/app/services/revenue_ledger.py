@@ -0,0 +1,177 @@
+# app/services/revenue_ledger.py - Monthly revenue summary kept in step with bookings
+from app.extensions import db
+from app.models import Booking, RevenueMonthly
+from app.utils.helpers import month_start, add_months
+from app.utils.upsert import upsert_rows
+from sqlalchemy import event, inspect, select, insert, delete, func, extract, text
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Statuses counted as revenue
+REVENUE_STATUSES = ['confirmed', 'completed']
+
+# Booking columns that decide whether and where a booking counts as revenue
+REVENUE_COLUMNS = ['status', 'estimated_cost', 'created_at']
+
+CENT = Decimal('0.01')
+
+def _amount(cost):
+    # Half up, as SQL ROUND() does in the migration's backfill
+    return Decimal(str(cost)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+def _contribution(status, estimated_cost, created_at):
+    """(month, amount) a booking adds to the ledger, or None"""
+    if status not in REVENUE_STATUSES or estimated_cost is None:
+        return None
+    return month_start(created_at or datetime.utcnow()), _amount(estimated_cost)
+
+class RevenueLedger:
+    """Keep revenue_monthly in step with bookings.
+
+    Every status, estimated_cost or created_at change adds its delta to the
+    month's row in the same transaction as the booking change. That covers
+    ORM changes through a before_flush listener (admin update and cancel,
+    BookingService.update_booking_status) and bulk updates explicitly.
+    Revenue totals and trends then read a few dozen rows. `flask
+    reconcile-revenue` checks the ledger against the bookings.
+    """
+
+    @staticmethod
+    def booking_deltas(before, after):
+        """{month: (revenue, bookings)} between (status, estimated_cost, created_at) tuples"""
+        deltas = defaultdict(lambda: [Decimal(0), 0])
+        for values, sign in [(before, -1), (after, 1)]:
+            for row in values:
+                contribution = _contribution(*row)
+                if contribution:
+                    month, amount = contribution
+                    deltas[month][0] += sign * amount
+                    deltas[month][1] += sign
+        return {month: tuple(delta) for month, delta in deltas.items() if delta[0] or delta[1]}
+
+    @staticmethod
+    def adjust(deltas):
+        """Add {month: (revenue, bookings)} to revenue_monthly; the caller commits"""
+        upsert_rows(RevenueMonthly.__table__, [
+            {'month': month, 'revenue': revenue, 'bookings': bookings}
+            for month, (revenue, bookings) in deltas.items()
+        ], ['month'], set_=['revenue', 'bookings'])
+
+    @staticmethod
+    def total():
+        """Revenue and revenue-bearing bookings over all months"""
+        revenue, bookings = db.session.execute(
+            select(func.coalesce(func.sum(RevenueMonthly.revenue), 0), func.coalesce(func.sum(RevenueMonthly.bookings), 0))
+        ).one()
+        return {'revenue': float(revenue), 'bookings': int(bookings)}
+
+    @staticmethod
+    def monthly(start, end):
+        """[{'month': date, 'revenue', 'bookings'}] for the months from start to end, empty months included"""
+        first, last = month_start(start), month_start(end)
+        rows = {
+            row.month: row for row in db.session.execute(
+                select(RevenueMonthly.month, RevenueMonthly.revenue, RevenueMonthly.bookings)
+                .where(RevenueMonthly.month.between(first, last))
+            )
+        }
+        months = []
+        month = first
+        while month <= last:
+            row = rows.get(month)
+            months.append({
+                'month': month,
+                'revenue': float(row.revenue) if row else 0.0,
+                'bookings': row.bookings if row else 0
+            })
+            month = add_months(month, 1)
+        return months
+
+    @staticmethod
+    def _from_bookings():
+        """{month: (revenue, bookings)} recomputed from the bookings table"""
+        year = extract('year', Booking.created_at)
+        month = extract('month', Booking.created_at)
+        rows = db.session.execute(
+            select(year, month, Booking.estimated_cost)
+            .where(
+                Booking.status.in_(REVENUE_STATUSES),
+                Booking.estimated_cost.isnot(None),
+                Booking.created_at.isnot(None)
+            )
+        )
+        # Summed per booking in Python so rounding matches the ledger's per-booking amounts
+        totals = defaultdict(lambda: [Decimal(0), 0])
+        for row_year, row_month, cost in rows:
+            key = datetime(int(row_year), int(row_month), 1).date()
+            totals[key][0] += _amount(cost)
+            totals[key][1] += 1
+        return {key: tuple(total) for key, total in totals.items()}
+
+    @staticmethod
+    def reconcile(fix=False):
+        """Compare the ledger with the bookings; returns the months that differ
+
+        With fix=True the ledger is replaced by the recomputed totals in one
+        transaction. On PostgreSQL the ledger is locked first, so booking
+        changes either commit before the bookings are read or apply their
+        delta after the fix.
+        """
+        try:
+            if fix and db.session.get_bind().dialect.name == 'postgresql':
+                db.session.execute(text('LOCK TABLE revenue_monthly IN EXCLUSIVE MODE'))
+            expected = RevenueLedger._from_bookings()
+            recorded = {
+                row.month: (Decimal(row.revenue).quantize(CENT), row.bookings)
+                for row in db.session.execute(select(RevenueMonthly.month, RevenueMonthly.revenue, RevenueMonthly.bookings))
+            }
+            zero = (Decimal(0), 0)
+            mismatches = [
+                {'month': month, 'expected': expected.get(month, zero), 'recorded': recorded.get(month, zero)}
+                for month in sorted(set(expected) | set(recorded))
+                if expected.get(month, zero) != recorded.get(month, zero)
+            ]
+
+            if fix and mismatches:
+                db.session.execute(delete(RevenueMonthly))
+                if expected:
+                    db.session.execute(insert(RevenueMonthly), [
+                        {'month': month, 'revenue': revenue, 'bookings': bookings}
+                        for month, (revenue, bookings) in sorted(expected.items())
+                    ])
+            db.session.commit()
+        except Exception as e:
+            logger.error(f"Error reconciling revenue ledger: {e}")
+            db.session.rollback()
+            raise
+
+        if mismatches:
+            logger.warning(f"Revenue ledger differs from bookings in {len(mismatches)} months{' (fixed)' if fix else ''}")
+        return mismatches
+
+@event.listens_for(Session, 'before_flush')
+def _track_revenue(session, flush_context, instances):
+    after = [tuple(getattr(obj, key) for key in REVENUE_COLUMNS) for obj in session.new if isinstance(obj, Booking)]
+
+    changed = [
+        obj for obj in session.dirty
+        if isinstance(obj, Booking) and any(inspect(obj).attrs[key].history.has_changes() for key in REVENUE_COLUMNS)
+    ]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Booking)]
+    before = []
+    if changed or deleted:
+        # The database still holds what the ledger has counted so far (an
+        # expired attribute set without loading has no old value in its history)
+        rows = session.execute(
+            select(Booking.id, *(getattr(Booking, key) for key in REVENUE_COLUMNS))
+            .where(Booking.id.in_([obj.id for obj in changed + deleted]))
+        )
+        before = [tuple(row[1:]) for row in rows]
+        after.extend(tuple(getattr(obj, key) for key in REVENUE_COLUMNS) for obj in changed)
+
+    RevenueLedger.adjust(RevenueLedger.booking_deltas(before, after))
@@ -0,0 +1,163 @@
+# app/services/search_service.py - Destination full-text search
+from flask import current_app
+from app.extensions import db
+from app.services.catalog_service import catalog_cache
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from collections import defaultdict
+import bisect
+import math
+import re
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Relative weight of a term occurring in each field
+FIELD_WEIGHTS = {'name': 3.0, 'highlights': 2.0, 'description': 1.0}
+
+def tokenize(value):
+    """Lower-cased word tokens"""
+    return TOKEN_RE.findall(value.lower()) if value else []
+
+class DestinationIndex:
+    """In-process inverted index over the active catalog.
+
+    Terms are ANDed; the last term also matches as a prefix so partially
+    typed queries still hit. Scores are field-weighted tf * idf.
+    """
+
+    def __init__(self, destinations):
+        postings = defaultdict(dict)
+        for position, dest in enumerate(destinations):
+            fields = {
+                'name': dest.get('name'),
+                'highlights': ' '.join(dest.get('highlights') or []),
+                'description': dest.get('description')
+            }
+            for field, value in fields.items():
+                weight = FIELD_WEIGHTS[field]
+                for token in tokenize(value):
+                    postings[token][position] = postings[token].get(position, 0) + weight
+
+        self.destinations = destinations
+        self.postings = dict(postings)
+        self.vocabulary = sorted(self.postings)
+
+    def _expand(self, term, prefix):
+        if not prefix:
+            return [term] if term in self.postings else []
+        start = bisect.bisect_left(self.vocabulary, term)
+        end = bisect.bisect_left(self.vocabulary, term + '\uffff')
+        return self.vocabulary[start:end]
+
+    def search(self, query, limit=20):
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        total = len(self.destinations)
+        scores = None
+        for i, term in enumerate(terms):
+            term_scores = {}
+            for token in self._expand(term, prefix=i == len(terms) - 1):
+                docs = self.postings[token]
+                idf = math.log(1 + total / len(docs))
+                for position, tf in docs.items():
+                    term_scores[position] = max(term_scores.get(position, 0), tf * idf)
+
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {pos: score + term_scores[pos] for pos, score in scores.items() if pos in term_scores}
+            if not scores:
+                return []
+
+        # Ties keep catalog (newest first) order
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [self.destinations[position] for position, _ in ranked[:limit]]
+
+class SearchService:
+    _lock = threading.Lock()
+    _index = None
+    _index_snapshot = None
+    _fts_available = {}
+
+    @classmethod
+    def search_destinations(cls, query, limit=20):
+        """Rank active destinations matching `query`.
+
+        Uses the database full-text index (PostgreSQL tsvector / SQLite FTS5)
+        when DESTINATION_SEARCH_BACKEND allows it and the migration has been
+        applied, otherwise the in-process inverted index.
+        """
+        snapshot = catalog_cache.snapshot()
+        backend = current_app.config.get('DESTINATION_SEARCH_BACKEND', 'auto')
+
+        if backend != 'memory' and cls._database_search_available():
+            try:
+                ids = cls._database_search(query, limit)
+            except SQLAlchemyError as e:
+                logger.warning(f"Full-text search failed, using in-process index: {e}")
+                db.session.rollback()
+            else:
+                by_id = {dest['id']: dest for dest in snapshot.destinations()}
+                return [by_id[dest_id] for dest_id in ids if dest_id in by_id]
+
+        return cls._memory_index(snapshot).search(query, limit)
+
+    @classmethod
+    def _memory_index(cls, snapshot):
+        # Rebuilt once per catalog snapshot
+        if cls._index_snapshot is not snapshot:
+            with cls._lock:
+                if cls._index_snapshot is not snapshot:
+                    cls._index = DestinationIndex(snapshot.destinations())
+                    cls._index_snapshot = snapshot
+        return cls._index
+
+    @classmethod
+    def _database_search_available(cls):
+        key = str(db.engine.url)
+        if key not in cls._fts_available:
+            inspector = inspect(db.engine)
+            if db.engine.dialect.name == 'postgresql':
+                columns = {column['name'] for column in inspector.get_columns('destinations')}
+                available = 'search_vector' in columns
+            elif db.engine.dialect.name == 'sqlite':
+                available = inspector.has_table('destinations_fts')
+            else:
+                available = False
+            cls._fts_available[key] = available
+        return cls._fts_available[key]
+
+    @staticmethod
+    def _database_search(query, limit):
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        if db.engine.dialect.name == 'postgresql':
+            # Tokens are \w+ only, so they are safe to splice into tsquery syntax
+            tsquery = ' & '.join(terms[:-1] + [terms[-1] + ':*'])
+            rows = db.session.execute(text("""
+                SELECT id FROM destinations, to_tsquery('english', :tsquery) AS query
+                WHERE is_active AND search_vector @@ query
+                ORDER BY ts_rank(search_vector, query) DESC, created_at DESC
+                LIMIT :limit
+            """), {'tsquery': tsquery, 'limit': limit})
+        else:
+            match = ' '.join(f'"{term}"' for term in terms[:-1])
+            match = f'{match} "{terms[-1]}"*'.strip()
+            # bm25 column weights follow FTS5 column order: name, description, highlights
+            rows = db.session.execute(text("""
+                SELECT d.id FROM destinations_fts
+                JOIN destinations d ON d.id = destinations_fts.rowid
+                WHERE destinations_fts MATCH :match AND d.is_active
+                ORDER BY bm25(destinations_fts, 3.0, 1.0, 2.0), d.created_at DESC
+                LIMIT :limit
+            """), {'match': match, 'limit': limit})
+
+        return [row.id for row in rows]
@@ -0,0 +1,113 @@
+# app/services/timeseries.py - Bucketed, gap-filled analytics time series
+from app.extensions import db
+from app.models import Booking, SiteVisit, VisitRollupHourly
+from app.services.booking_service import BookingService
+from app.services.revenue_ledger import REVENUE_STATUSES
+from app.services.visit_partitions import visit_partitions
+from app.utils.validators import TIMESERIES_GRANULARITIES
+from sqlalchemy import select, cast, extract, literal, BigInteger
+from datetime import datetime, timedelta, time
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _epoch(column):
+    """Seconds since the epoch, as an integer column"""
+    return cast(extract('epoch', column), BigInteger)
+
+class TimeseriesService:
+    """Per-bucket totals of one metric over a date range.
+
+    Each metric is pulled as two columns, epoch seconds and a value, and
+    bucketed with NumPy: searchsorted against the bucket edges, then a
+    weighted bincount, so empty buckets come back as zeros and any
+    granularity is the same query. Weeks start on Monday; all times are UTC.
+    """
+
+    # metric -> (time column, value column or None to count rows)
+    METRICS = {
+        'bookings': (Booking.created_at, None),
+        'guests': (Booking.created_at, Booking.guests),
+        'revenue': (Booking.created_at, Booking.estimated_cost),
+        'visits': (SiteVisit.timestamp, None),
+    }
+
+    @staticmethod
+    def bucket_edges(start, end, granularity):
+        """datetime64[s] bucket starts covering the days [start, end], plus the closing edge"""
+        stop = np.datetime64(end + timedelta(days=1), 'D')
+        if granularity == 'month':
+            first = np.datetime64(start, 'M')
+            edges = np.arange(first, np.datetime64(end, 'M') + 2, dtype='datetime64[M]')
+        elif granularity == 'week':
+            first = np.datetime64(start - timedelta(days=start.weekday()), 'D')
+            edges = np.arange(first, stop + 7, 7, dtype='datetime64[D]')
+            edges = edges[:np.searchsorted(edges, stop, side='left') + 1]
+        elif granularity == 'day':
+            edges = np.arange(np.datetime64(start, 'D'), stop + 1, dtype='datetime64[D]')
+        else:
+            edges = np.arange(np.datetime64(start, 'h'), np.datetime64(stop, 'h') + 1, dtype='datetime64[h]')
+        return edges.astype('datetime64[s]')
+
+    @staticmethod
+    def _extract(metric, start_at, end_at, filters):
+        """(epoch seconds, values) arrays for rows of `metric` in [start_at, end_at)"""
+        filters = filters or {}
+        time_column, value_column = TimeseriesService.METRICS[metric]
+
+        if metric == 'visits' and not filters.get('page'):
+            # Hourly rollups are exact for every granularity down to an hour
+            time_column, value_column = VisitRollupHourly.hour, VisitRollupHourly.visits
+            query = select(_epoch(time_column), value_column)
+        elif metric == 'visits':
+            visits = visit_partitions.source(start_at, end_at)
+            time_column = visits.c.timestamp
+            query = select(_epoch(time_column), literal(1)).where(visits.c.page == filters['page'])
+        else:
+            query = select(_epoch(time_column), value_column if value_column is not None else literal(1))
+            query = query.where(*BookingService.filter_clauses(filters))
+            if filters.get('destination'):
+                query = query.where(Booking.destination == filters['destination'])
+            if metric == 'revenue':
+                query = query.where(Booking.estimated_cost.isnot(None))
+                if not filters.get('status'):
+                    # Same bookings as the revenue ledger unless a status filter is given
+                    query = query.where(Booking.status.in_(REVENUE_STATUSES))
+
+        rows = db.session.execute(query.where(time_column >= start_at, time_column < end_at)).all()
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        seconds, values = zip(*rows)
+        return (np.fromiter(seconds, dtype=np.int64, count=len(rows)),
+                np.fromiter((value or 0 for value in values), dtype=np.float64, count=len(rows)))
+
+    @staticmethod
+    def series(metric, granularity, start, end, filters=None):
+        """Buckets for the days [start, end]: [{'start': datetime, 'value': n}, ...]
+
+        `filters` takes the admin booking filters (see parse_booking_filters)
+        plus `destination` for booking metrics, and `page` for visits.
+        """
+        if metric not in TimeseriesService.METRICS:
+            raise ValueError(f'Unknown metric: {metric}')
+        if granularity not in TIMESERIES_GRANULARITIES:
+            raise ValueError(f'Unknown granularity: {granularity}')
+
+        edges = TimeseriesService.bucket_edges(start, end, granularity)
+        # Buckets can reach past the range (a week or month started earlier);
+        # only rows inside the requested days are counted
+        start_at = datetime.combine(start, time.min)
+        end_at = datetime.combine(end + timedelta(days=1), time.min)
+        seconds, values = TimeseriesService._extract(metric, start_at, end_at, filters)
+
+        buckets = len(edges) - 1
+        index = np.searchsorted(edges.astype(np.int64), seconds, side='right') - 1
+        inside = (index >= 0) & (index < buckets)
+        totals = np.bincount(index[inside], weights=values[inside], minlength=buckets)
+
+        as_number = float if metric == 'revenue' else int
+        return [
+            {'start': bucket_start, 'value': as_number(total)}
+            for bucket_start, total in zip(edges[:-1].tolist(), totals.tolist())
+        ]
@@ -0,0 +1,92 @@
+# app/services/view_counter.py - Write-behind buffer for destination view counts
+from app.extensions import db
+from app.models import Destination
+from app.utils.background import PeriodicFlusher
+from sqlalchemy import bindparam, func
+from collections import Counter
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ViewCounter:
+    """Accumulate destination views in memory and flush them in batches.
+
+    Each worker keeps its own pending counts and writes them with a single
+    executemany `UPDATE ... SET view_count = view_count + n` per flush, on
+    VIEW_COUNT_FLUSH_INTERVAL or once VIEW_COUNT_FLUSH_THRESHOLD views are
+    pending. An interval of 0 writes through on every view (used in tests).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._pending_total = 0
+        self._flusher = None
+        self.app = None
+        self.threshold = 500
+
+    def init_app(self, app):
+        self.app = app
+        self.threshold = app.config.get('VIEW_COUNT_FLUSH_THRESHOLD', 500)
+        interval = app.config.get('VIEW_COUNT_FLUSH_INTERVAL', 10)
+        self._flusher = PeriodicFlusher('view-counter', self.flush, interval) if interval > 0 else None
+        app.extensions['view_counter'] = self
+
+    @property
+    def pending(self):
+        """Views recorded by this worker but not yet written"""
+        return self._pending_total
+
+    def increment(self, slug, views=1):
+        """Record views for a destination slug"""
+        with self._lock:
+            self._pending[slug] += views
+            self._pending_total += views
+            over_threshold = self._pending_total >= self.threshold
+
+        if self._flusher is None:
+            self.flush()
+            return
+
+        self._flusher.ensure_started()
+        if over_threshold:
+            self._flusher.wake()
+
+    def flush(self):
+        """Write pending view counts; returns the number of views flushed"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._pending_total = 0
+
+        if not pending:
+            return 0
+
+        table = Destination.__table__
+        statement = table.update().where(
+            table.c.slug == bindparam('b_slug')
+        ).values(
+            view_count=func.coalesce(table.c.view_count, 0) + bindparam('b_views'),
+            updated_at=table.c.updated_at  # Views are not catalog edits
+        )
+
+        with self.app.app_context():
+            try:
+                db.session.execute(statement, [
+                    {'b_slug': slug, 'b_views': views} for slug, views in pending.items()
+                ])
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                # Put the counts back so the next flush retries them
+                with self._lock:
+                    self._pending.update(pending)
+                    self._pending_total += sum(pending.values())
+                logger.error(f"Error flushing view counts: {e}")
+                return 0
+
+        flushed = sum(pending.values())
+        logger.debug(f"Flushed {flushed} views for {len(pending)} destinations")
+        return flushed
+
+view_counter = ViewCounter()
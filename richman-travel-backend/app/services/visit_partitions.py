@@ -0,0 +1,219 @@
+# app/services/visit_partitions.py - Monthly site_visits partitions and compaction
+from app.extensions import db
+from app.models import SiteVisit
+from app.utils.helpers import month_start, add_months
+from sqlalchemy import MetaData, Table, Column, Index, select, insert, union_all, inspect, text
+from collections import defaultdict
+from datetime import datetime, date, time
+import re
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+PARTITION_NAME_RE = re.compile(r'^site_visits_(\d{4})(\d{2})$')
+
+# SQLite shard tables, defined on first use
+_shards = MetaData()
+
+def partition_name(month):
+    return f'site_visits_{month:%Y%m}'
+
+def _shard_table(month):
+    """Table object for a SQLite shard: site_visits' columns and timestamp index"""
+    name = partition_name(month)
+    if name in _shards.tables:
+        return _shards.tables[name]
+    table = Table(name, _shards, *(
+        Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+        for column in SiteVisit.__table__.columns
+    ))
+    Index(f'ix_{name}_timestamp', table.c.timestamp)
+    return table
+
+class VisitPartitions:
+    """Route site_visits by month and drop whole months once they are old.
+
+    PostgreSQL partitions site_visits natively (PARTITION BY RANGE on
+    timestamp, one site_visits_YYYYMM partition per month) once the
+    migrations have run. SQLite has no partitioning, so each month is its
+    own site_visits_YYYYMM table and this router picks the table on insert
+    and UNION ALLs the months a read covers; site_visits itself stays empty
+    there. Other databases, and a PostgreSQL site_visits created without
+    partitioning (db.create_all()), use the plain table and are never
+    compacted.
+
+    Partitions are created on first insert into a month (and a month ahead
+    by compact()). compact() rebuilds the rollups and visitor sketches of
+    months older than VISIT_RETENTION_MONTHS from their raw rows, then
+    drops those partitions with one DROP TABLE each instead of deleting
+    rows. Late visits for a month that is already gone only update the
+    rollups and sketches.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._known = set()  # (engine, month) partitions seen to exist
+        self._partitioned = {}  # engine -> whether site_visits is partitioned
+        self.retention_months = 12
+
+    def init_app(self, app):
+        self.retention_months = app.config.get('VISIT_RETENTION_MONTHS', 12)
+        app.extensions['visit_partitions'] = self
+
+    @staticmethod
+    def _dialect():
+        return db.session.get_bind().dialect.name
+
+    def partitioned(self):
+        engine = db.engine
+        if engine not in self._partitioned:
+            dialect = self._dialect()
+            if dialect == 'postgresql':
+                # Only the migrated table is a partitioned parent
+                available = db.session.execute(text(
+                    "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+                    "WHERE partrelid = to_regclass('site_visits'))"
+                )).scalar()
+            else:
+                available = dialect == 'sqlite'
+            with self._lock:
+                self._partitioned[engine] = available
+        return self._partitioned[engine]
+
+    def ensure(self, months):
+        """Create the partitions for these months if they do not exist yet"""
+        engine = db.engine
+        with self._lock:
+            known = {month for known_engine, month in self._known if known_engine is engine}
+        missing = sorted({month_start(month) for month in months} - known)
+        if not missing or not self.partitioned():
+            return
+
+        for month in missing:
+            if self._dialect() == 'postgresql':
+                db.session.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF site_visits "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+                ))
+            else:
+                _shard_table(month).create(bind=db.session.connection(), checkfirst=True)
+
+        with self._lock:
+            self._known.update((engine, month) for month in missing)
+
+    def forget(self):
+        """Drop the cache of existing partitions (after a rollback that may have undone a CREATE)"""
+        with self._lock:
+            self._known.clear()
+
+    def insert(self, visits):
+        """Insert site_visits rows (dicts); the caller commits"""
+        if not visits:
+            return
+        by_month = defaultdict(list)
+        for visit in visits:
+            by_month[month_start(visit['timestamp'])].append(visit)
+
+        late = [month for month in by_month if month < self.cutoff()]
+        if late and self.partitioned():
+            existing = set(self.months())
+            for month in late:
+                if month not in existing:
+                    # Already compacted; the rollups and sketches still count these visits
+                    del by_month[month]
+        self.ensure(by_month)
+
+        if self._dialect() != 'sqlite':
+            # PostgreSQL routes rows to their partition itself
+            rows = [visit for month_visits in by_month.values() for visit in month_visits]
+            if rows:
+                db.session.execute(insert(SiteVisit.__table__), rows)
+            return
+        for month, rows in sorted(by_month.items()):
+            db.session.execute(insert(_shard_table(month)), rows)
+
+    def cutoff(self, retention_months=None, today=None):
+        """First month whose raw visits are kept"""
+        retention_months = self.retention_months if retention_months is None else retention_months
+        return add_months(month_start(today or datetime.utcnow()), -retention_months)
+
+    def months(self):
+        """Months that have a partition, oldest first"""
+        if not self.partitioned():
+            return []
+        if self._dialect() == 'postgresql':
+            names = db.session.execute(text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "WHERE parent.relname = 'site_visits'"
+            )).scalars()
+        else:
+            names = inspect(db.session.connection()).get_table_names()
+        matches = (PARTITION_NAME_RE.match(name) for name in names)
+        return sorted(date(int(match.group(1)), int(match.group(2)), 1) for match in matches if match)
+
+    def source(self, start_at, end_at):
+        """A selectable with site_visits' columns holding (at least) the visits in [start_at, end_at)
+
+        Callers still filter on timestamp; on SQLite only the shards that
+        overlap the range are read.
+        """
+        if self._dialect() != 'sqlite':
+            return SiteVisit.__table__
+        shards = [
+            _shard_table(month) for month in self.months()
+            if datetime.combine(month, time.min) < end_at and datetime.combine(add_months(month, 1), time.min) > start_at
+        ]
+        if not shards:
+            return SiteVisit.__table__
+        if len(shards) == 1:
+            return shards[0]
+        return union_all(*(
+            select(shard).where(shard.c.timestamp >= start_at, shard.c.timestamp < end_at) for shard in shards
+        )).subquery('visits')
+
+    def raw_since(self):
+        """First day raw visits may exist for, or None if site_visits is not partitioned"""
+        if not self.partitioned():
+            return None
+        months = self.months()
+        return months[0] if months else month_start(datetime.utcnow())
+
+    def compact(self, retention_months=None, today=None):
+        """Roll up and drop partitions older than the retention window; returns a summary"""
+        # Both services read site_visits through this module
+        from app.services.visit_rollups import VisitRollupService
+        from app.services.visitor_sketches import VisitorSketchService
+
+        current = month_start(today or datetime.utcnow())
+        cutoff = self.cutoff(retention_months, current)
+        summary = {'cutoff': cutoff, 'dropped': [], 'visits': 0}
+        if not self.partitioned():
+            return summary
+
+        try:
+            # Next month's partition, so the first visits of the month don't create it
+            self.ensure([current, add_months(current, 1)])
+            db.session.commit()
+
+            for month in self.months():
+                if month >= cutoff:
+                    break
+                summary['visits'] += VisitRollupService.rebuild(month, add_months(month, 1))
+                VisitorSketchService.rebuild(month, add_months(month, 1))
+                db.session.execute(text(f'DROP TABLE {partition_name(month)}'))
+                db.session.commit()
+                with self._lock:
+                    self._known.discard((db.engine, month))
+                summary['dropped'].append(partition_name(month))
+                logger.info(f"Compacted site visits for {month:%Y-%m}")
+        except Exception as e:
+            logger.error(f"Error compacting site visits: {e}")
+            db.session.rollback()
+            raise
+
+        return summary
+
+visit_partitions = VisitPartitions()
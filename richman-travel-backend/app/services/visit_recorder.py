@@ -0,0 +1,139 @@
+# app/services/visit_recorder.py - Buffered, batched site visit ingestion
+from app.extensions import db
+from app.services.visit_partitions import visit_partitions
+from app.services.visit_rollups import VisitRollupService
+from app.services.visitor_sketches import VisitorSketchService
+from app.utils.background import PeriodicFlusher
+from flask import request
+from collections import deque
+from datetime import datetime
+import hashlib
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Column lengths in site_visits; longer values are cut so one row cannot fail a batch
+FIELD_LIMITS = {'ip_address': 45, 'page': 100, 'user_agent': 255, 'referer': 255, 'session_id': 50}
+
+# Endpoints that are not page views
+UNTRACKED_ENDPOINTS = {'public.health_check', 'static'}
+
+class VisitRecorder:
+    """Buffer site visits in memory and bulk-insert them in batches.
+
+    Each worker keeps a bounded ring buffer (VISIT_BUFFER_SIZE). A
+    background flusher writes it every VISIT_FLUSH_INTERVAL seconds, or as
+    soon as VISIT_FLUSH_BATCH visits are waiting, with one executemany
+    insert plus the rollup and visitor sketch updates per batch, and once
+    more at exit. When the buffer is full the oldest visit is overwritten
+    and counted in `dropped`. An interval of 0 writes through on every
+    visit (used in tests).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buffer = deque(maxlen=10000)
+        self._flusher = None
+        self.app = None
+        self.enabled = True
+        self.batch_size = 500
+        self.dropped = 0
+        self.recorded = 0
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('VISIT_TRACKING_ENABLED', True)
+        self.batch_size = app.config.get('VISIT_FLUSH_BATCH', 500)
+        self._buffer = deque(maxlen=app.config.get('VISIT_BUFFER_SIZE', 10000))
+        interval = app.config.get('VISIT_FLUSH_INTERVAL', 5)
+        self._flusher = PeriodicFlusher('visit-recorder', self.flush, interval) if interval > 0 else None
+        app.after_request(self._after_request)
+        app.extensions['visit_recorder'] = self
+
+    @property
+    def pending(self):
+        """Visits buffered by this worker but not yet written"""
+        return len(self._buffer)
+
+    def _after_request(self, response):
+        if (self.enabled and request.method == 'GET' and response.status_code < 400
+                and request.blueprint == 'public' and request.endpoint not in UNTRACKED_ENDPOINTS):
+            self.record_request()
+        return response
+
+    def record_request(self):
+        """Buffer a visit for the current request"""
+        user_agent = request.headers.get('User-Agent', '')
+        session_id = request.headers.get('X-Session-ID')
+        if not session_id:
+            # Stable anonymous id, so unique-visitor counts see repeat visits
+            session_id = hashlib.sha1(f'{request.remote_addr}|{user_agent}'.encode('utf-8')).hexdigest()[:32]
+        self.record({
+            'timestamp': datetime.utcnow(),
+            'ip_address': request.remote_addr,
+            'page': request.endpoint,
+            'user_agent': user_agent,
+            'referer': request.headers.get('Referer', ''),
+            'session_id': session_id
+        })
+
+    def record(self, visit):
+        """Buffer one visit (a dict of site_visits columns)"""
+        for field, limit in FIELD_LIMITS.items():
+            if visit.get(field):
+                visit[field] = visit[field][:limit]
+
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1  # The append below overwrites the oldest
+            self._buffer.append(visit)
+            due = len(self._buffer) >= self.batch_size
+
+        if self._flusher is None:
+            self.flush()
+            return
+
+        self._flusher.ensure_started()
+        if due:
+            self._flusher.wake()
+
+    def flush(self):
+        """Write buffered visits; returns the number written"""
+        with self._lock:
+            visits = list(self._buffer)
+            self._buffer.clear()
+
+        written = 0
+        for i in range(0, len(visits), self.batch_size):
+            batch = visits[i:i + self.batch_size]
+            with self.app.app_context():
+                try:
+                    visit_partitions.insert(batch)
+                    VisitRollupService.record([visit['timestamp'] for visit in batch])
+                    VisitorSketchService.record(batch)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    visit_partitions.forget()
+                    logger.error(f"Error writing site visits: {e}")
+                    self._requeue(visits[i:])
+                    break
+            written += len(batch)
+
+        with self._lock:
+            self.recorded += written
+        if written:
+            logger.debug(f"Wrote {written} site visits ({self.dropped} dropped so far)")
+        return written
+
+    def _requeue(self, visits):
+        # Older than anything buffered since; they go first and are the
+        # first to be overwritten if the buffer fills up
+        with self._lock:
+            merged = visits + list(self._buffer)
+            overflow = max(len(merged) - self._buffer.maxlen, 0)
+            self.dropped += overflow
+            self._buffer = deque(merged, maxlen=self._buffer.maxlen)
+
+visit_recorder = VisitRecorder()
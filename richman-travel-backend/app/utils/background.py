@@ -0,0 +1,62 @@
+# app/utils/background.py - Background flush threads for write-behind buffers
+import atexit
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+class PeriodicFlusher:
+    """Call `flush` on a daemon thread every `interval` seconds.
+
+    The thread is started lazily on first use so that each gunicorn worker
+    gets its own after fork. `wake()` triggers an early flush (size
+    threshold) and a final flush runs at interpreter exit.
+    """
+
+    def __init__(self, name, flush, interval):
+        self.name = name
+        self.flush = flush
+        self.interval = interval
+        self._pid = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._exit_hook_registered = False
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._wake = threading.Event()
+            self._stopped = threading.Event()
+            thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            thread.start()
+            self._pid = os.getpid()
+            if not self._exit_hook_registered:
+                atexit.register(self.stop)
+                self._exit_hook_registered = True
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        """Stop the thread and flush whatever is still buffered"""
+        self._stopped.set()
+        self._wake.set()
+        self._safe_flush()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if not self._stopped.is_set():
+                self._safe_flush()
+
+    def _safe_flush(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Error in background flush ({self.name}): {e}")
@@ -0,0 +1,57 @@
+# app/utils/cache.py - Short-TTL, single-flight result cache
+import threading
+import time
+
+class TTLCache:
+    """Cache computed values per key for `ttl` seconds, per process.
+
+    Only one thread recomputes an expired key at a time. The others return
+    the stale value while the refresh runs, or wait for it if there is no
+    value yet, so N concurrent readers cost one computation. A ttl of 0
+    disables caching (used in tests).
+    """
+
+    def __init__(self, ttl=15):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> (expires_at, value)
+        self._key_locks = {}
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(self, key, compute):
+        """Return the cached value for key, calling compute() when it has expired"""
+        if self.ttl <= 0:
+            return compute()
+
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        lock = self._key_lock(key)
+        if entry is not None and not lock.acquire(blocking=False):
+            # Someone else is refreshing; the stale value is at most one refresh old
+            return entry[1]
+        if entry is None:
+            lock.acquire()
+
+        try:
+            # Refreshed while we waited for the lock
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+            value = compute()
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            return value
+        finally:
+            lock.release()
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -2,9 +2,8 @@
 from functools import wraps
 from flask import request, jsonify, current_app
 import jwt
-from app.models import Admin, SiteVisit
-from app.extensions import db
-import uuid
+from app.models import Admin
+from app.services.visit_recorder import visit_recorder
 import logging
 
 logger = logging.getLogger(__name__)
@@ -33,18 +32,5 @@ def token_required(f):
     return decorated
 
 def track_visit():
-    """Track site visits for analytics"""
-    try:
-        visit = SiteVisit(
-            ip_address=request.remote_addr,
-            page=request.endpoint,
-            user_agent=request.headers.get('User-Agent', ''),
-            referer=request.headers.get('Referer', ''),
-            session_id=request.headers.get('X-Session-ID', str(uuid.uuid4()))
-        )
-        db.session.add(visit)
-        db.session.commit()
-    except Exception as e:
-        logger.error(f"Error tracking visit: {e}")
-        db.session.rollback()
-        
\ No newline at end of file
+    """Track a site visit for the current request (buffered; see VisitRecorder)"""
+    visit_recorder.record_request()
@@ -1,12 +1,17 @@
 # app/utils/helpers.py - General helper functions
-from flask import jsonify
+from flask import jsonify, request, current_app
+import base64
+import hashlib
+import json
 import logging
-import smtplib
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
-from datetime import datetime
+from datetime import datetime, date
+import re
 import uuid
+from app.utils.smtp_pool import SMTPConnectionPool
 
 logger = logging.getLogger(__name__)
 
@@ -33,52 +38,141 @@ def register_error_handlers(app):
         logger.error(f"Internal server error: {error}")
         return jsonify({'success': False, 'message': 'Internal server error'}), 500
 
+def make_etag(*parts):
+    """Build a strong ETag value from the parts that identify a representation"""
+    key = ':'.join(str(part) for part in parts)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def is_not_modified(etag, last_modified=None):
+    """Check If-None-Match / If-Modified-Since against the current validators"""
+    # If-None-Match takes precedence when both are sent (RFC 9110 13.2.2)
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+def set_cache_validators(response, etag, last_modified=None):
+    """Attach ETag / Last-Modified and require revalidation on every use"""
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'public, no-cache'
+    return response
+
+def not_modified_response(etag, last_modified=None):
+    """Empty 304 response carrying the current validators"""
+    return set_cache_validators(current_app.response_class(status=304), etag, last_modified)
+
+def encode_cursor(*values):
+    """Opaque, URL-safe pagination cursor for a keyset position"""
+    raw = json.dumps(values, separators=(',', ':'), default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    return values
+
+def month_start(value):
+    """First day of the month of a date or datetime"""
+    return date(value.year, value.month, 1)
+
+def add_months(month, months):
+    """First day of the month `months` after (or before) `month`"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
 def generate_booking_reference():
     """Generate unique booking reference"""
     timestamp = datetime.now().strftime('%Y%m')
     unique_id = str(uuid.uuid4())[:6].upper()
     return f"RT{timestamp}{unique_id}"
 
-def send_notification_email(to_email, subject, body, is_html=False):
-    """Send notification email using SMTP"""
+_smtp_pool = None
+_smtp_pool_lock = threading.Lock()
+
+def get_smtp_pool():
+    """Process-wide SMTP session pool, or None when SMTP is not configured"""
+    global _smtp_pool
+    smtp_username = os.environ.get('SMTP_USERNAME')
+    smtp_password = os.environ.get('SMTP_PASSWORD')
+    if not smtp_username or not smtp_password:
+        return None
+    
+    if _smtp_pool is None:
+        with _smtp_pool_lock:
+            if _smtp_pool is None:
+                _smtp_pool = SMTPConnectionPool(
+                    os.environ.get('SMTP_SERVER', 'smtp.gmail.com'),
+                    int(os.environ.get('SMTP_PORT', 587)),
+                    username=smtp_username,
+                    password=smtp_password,
+                    use_tls=os.environ.get('SMTP_USE_TLS', 'true').lower() == 'true',
+                    max_size=int(os.environ.get('SMTP_POOL_SIZE', 4))
+                )
+    return _smtp_pool
+
+def build_email_message(to_email, subject, body, is_html=False):
+    """Build a MIME message from the configured sender"""
+    msg = MIMEMultipart('alternative')
+    msg['From'] = os.environ.get('SMTP_USERNAME')
+    msg['To'] = to_email
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'html' if is_html else 'plain'))
+    return msg
+
+def send_notification_emails(emails):
+    """Send (to_email, subject, body) tuples as one batch over a pooled session
+
+    Returns one entry per email: None when delivered (or skipped because
+    SMTP is not configured), otherwise the exception that prevented it.
+    """
+    pool = get_smtp_pool()
+    if pool is None:
+        logger.warning("SMTP credentials not configured")
+        return [None] * len(emails)
+    
+    results = pool.send_batch([build_email_message(*email) for email in emails])
+    for (to_email, subject, _), error in zip(emails, results):
+        if error is None:
+            logger.info(f"Email sent successfully to {to_email}")
+        else:
+            logger.error(f"Error sending email to {to_email}: {error}")
+    return results
+
+def send_notification_email(to_email, subject, body, is_html=False, raise_errors=False):
+    """Send notification email using SMTP
+
+    Returns False when SMTP is not configured. Delivery errors are logged
+    and return False, or are re-raised with raise_errors=True so background
+    jobs can retry them.
+    """
     try:
-        smtp_server = os.environ.get('SMTP_SERVER', 'smtp.gmail.com')
-        smtp_port = int(os.environ.get('SMTP_PORT', 587))
-        smtp_username = os.environ.get('SMTP_USERNAME')
-        smtp_password = os.environ.get('SMTP_PASSWORD')
-        
-        if not smtp_username or not smtp_password:
+        pool = get_smtp_pool()
+        if pool is None:
             logger.warning("SMTP credentials not configured")
             return False
         
-        # Create message
-        msg = MIMEMultipart('alternative')
-        msg['From'] = smtp_username
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        
-        # Add body
-        if is_html:
-            msg.attach(MIMEText(body, 'html'))
-        else:
-            msg.attach(MIMEText(body, 'plain'))
-        
-        # Send email
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_username, smtp_password)
-            server.send_message(msg)
+        pool.send(build_email_message(to_email, subject, body, is_html))
         
         logger.info(f"Email sent successfully to {to_email}")
         return True
         
     except Exception as e:
         logger.error(f"Error sending email: {e}")
+        if raise_errors:
+            raise
         return False
-    
 
-def send_booking_confirmation_email(booking):
-    """Send booking confirmation email to client"""
+def booking_confirmation_email(booking):
+    """Booking confirmation email to client as (to_email, subject, body)"""
     subject = f"Booking Confirmation - {booking.booking_reference}"
     
     body = f"""
@@ -106,10 +200,10 @@ def send_booking_confirmation_email(booking):
     Email: richard@richmantravel.co.ke
     """
     
-    return send_notification_email(booking.email, subject, body.strip())
+    return booking.email, subject, body.strip()
 
-def send_admin_booking_notification(booking):
-    """Send new booking notification to admin"""
+def admin_booking_notification_email(booking):
+    """New booking notification to admin as (to_email, subject, body)"""
     admin_email = os.environ.get('ADMIN_EMAIL', 'richard@richmantravel.co.ke')
     subject = f"New Booking Request - {booking.booking_reference}"
     
@@ -136,7 +230,32 @@ def send_admin_booking_notification(booking):
     Please review and respond to this booking request.
     """
     
-    return send_notification_email(admin_email, subject, body.strip())
+    return admin_email, subject, body.strip()
+
+def send_booking_confirmation_email(booking, raise_errors=False):
+    """Send booking confirmation email to client"""
+    return send_notification_email(*booking_confirmation_email(booking), raise_errors=raise_errors)
+
+def send_admin_booking_notification(booking, raise_errors=False):
+    """Send new booking notification to admin"""
+    return send_notification_email(*admin_booking_notification_email(booking), raise_errors=raise_errors)
+
+def parse_price_range(price_range):
+    """Parse '$800 - $1200' into (800, 1200); a single figure gives (n, n)"""
+    amounts = [int(float(n.replace(',', ''))) for n in re.findall(r'\d[\d,]*(?:\.\d+)?', price_range or '')]
+    if not amounts:
+        return None, None
+    return min(amounts), max(amounts)
+
+def parse_duration_days(duration):
+    """Parse '3 days', '2 weeks' or '4-5 days' into whole days (longest figure)"""
+    numbers = [int(n) for n in re.findall(r'\d+', duration or '')]
+    if not numbers:
+        return None
+    days = max(numbers)
+    if re.search(r'week', duration, re.IGNORECASE):
+        days *= 7
+    return days
 
 def format_currency(amount, currency='USD'):
     """Format currency amount"""
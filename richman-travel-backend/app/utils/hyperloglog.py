@@ -0,0 +1,89 @@
+# app/utils/hyperloglog.py - HyperLogLog distinct-count sketches
+import hashlib
+import math
+import zlib
+
+DEFAULT_PRECISION = 12  # 4096 registers, ~1.6% standard error
+
+# 2 ** -rank for every possible register value
+_INVERSE_POWERS = [2.0 ** -rank for rank in range(65)]
+
+def _alpha(m):
+    if m == 16:
+        return 0.673
+    if m == 32:
+        return 0.697
+    if m == 64:
+        return 0.709
+    return 0.7213 / (1 + 1.079 / m)
+
+class HyperLogLog:
+    """Approximate count of distinct values in a fixed 2**precision bytes.
+
+    Sketches with the same precision merge by taking the register-wise
+    maximum, so a week is the merge of seven daily sketches. Serialized
+    form is one precision byte plus the zlib-compressed registers; sketches
+    for quiet days are mostly zero registers and compress to a few bytes.
+    """
+
+    def __init__(self, precision=DEFAULT_PRECISION, registers=None):
+        if not 4 <= precision <= 18:
+            raise ValueError('precision must be between 4 and 18')
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+        if len(self.registers) != self.m:
+            raise ValueError('register count does not match precision')
+
+    def add(self, value):
+        """Add a string (or bytes) value"""
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        hashed = int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), 'big')
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other):
+        """Fold another sketch of the same precision into this one"""
+        if other.precision != self.precision:
+            raise ValueError('cannot merge sketches with different precision')
+        # map() over two bytes objects runs in C; ~0.1ms for 4096 registers
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        """Estimated number of distinct values added"""
+        m = self.m
+        estimate = _alpha(m) * m * m / sum(map(_INVERSE_POWERS.__getitem__, self.registers))
+        if estimate <= 2.5 * m:
+            zeros = self.registers.count(0)
+            if zeros:
+                # Linear counting is more accurate for small cardinalities
+                estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def __len__(self):
+        return self.count()
+
+    def to_bytes(self):
+        return bytes([self.precision]) + zlib.compress(bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(data[0], zlib.decompress(data[1:]))
+
+    @classmethod
+    def merged(cls, sketches, precision=DEFAULT_PRECISION):
+        """Union of an iterable of sketches (an empty sketch if there are none)"""
+        result = cls(precision)
+        for sketch in sketches:
+            result.merge(sketch)
+        return result
@@ -0,0 +1,160 @@
+# app/utils/smtp_pool.py - Pooled, persistent SMTP sessions
+from contextlib import contextmanager
+from collections import deque
+import smtplib
+import socket
+import threading
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Errors after which the session itself can no longer be trusted. Other
+# SMTPExceptions (refused recipient, rejected data) fail one message and
+# leave the session usable.
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError,
+                     ConnectionError, TimeoutError, socket.timeout)
+
+def _is_connection_error(error):
+    """True when the session that raised `error` should be dropped"""
+    return isinstance(error, CONNECTION_ERRORS) or not isinstance(error, smtplib.SMTPException)
+
+class SMTPConnectionPool:
+    """Keep authenticated SMTP sessions open and reuse them across messages.
+
+    An idle session is checked with NOOP before reuse once it has been idle
+    for `noop_after` seconds, and closed after `idle_timeout`. At most
+    `max_size` sessions are open per process; callers beyond that wait.
+    """
+
+    def __init__(self, host, port, username=None, password=None, use_tls=True,
+                 max_size=4, idle_timeout=120, noop_after=10, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.idle_timeout = idle_timeout
+        self.noop_after = noop_after
+        self.timeout = timeout
+        self._idle = deque()  # (session, last_used)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._pid = os.getpid()
+
+    def _connect(self):
+        session = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                session.starttls()
+            if self.username:
+                session.login(self.username, self.password)
+        except Exception:
+            session.close()
+            raise
+        return session
+
+    @staticmethod
+    def _close(session):
+        try:
+            session.quit()
+        except Exception:
+            session.close()
+
+    def _is_healthy(self, session, last_used):
+        idle = time.monotonic() - last_used
+        if idle > self.idle_timeout:
+            return False
+        if idle < self.noop_after:
+            return True
+        try:
+            return session.noop()[0] == 250
+        except OSError:
+            return False
+
+    def _checkout(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked: the parent's sockets are not ours to use
+                self._idle.clear()
+                self._pid = os.getpid()
+            while self._idle:
+                session, last_used = self._idle.pop()
+                if self._is_healthy(session, last_used):
+                    return session
+                self._close(session)
+        return self._connect()
+
+    def _checkin(self, session):
+        with self._lock:
+            self._idle.append((session, time.monotonic()))
+
+    @contextmanager
+    def session(self):
+        """Borrow a healthy, authenticated session"""
+        self._slots.acquire()
+        session = None
+        try:
+            session = self._checkout()
+            yield session
+        except OSError as e:
+            if session is not None and _is_connection_error(e):
+                session.close()
+                session = None
+            raise
+        finally:
+            if session is not None:
+                self._checkin(session)
+            self._slots.release()
+
+    def send(self, message):
+        """Send one message over a pooled session"""
+        error = self.send_batch([message])[0]
+        if error is not None:
+            raise error
+
+    def send_batch(self, messages):
+        """Send messages over one session.
+
+        Returns one entry per message: None when delivered, otherwise the
+        exception. A dropped connection is re-established once and the
+        remaining messages continue on the new session.
+        """
+        results = [None] * len(messages)
+        pending = list(range(len(messages)))
+        reconnected = False
+
+        while pending:
+            try:
+                with self.session() as session:
+                    while pending:
+                        index = pending[0]
+                        try:
+                            session.send_message(messages[index])
+                        except CONNECTION_ERRORS:
+                            raise
+                        except smtplib.SMTPException as e:
+                            # Refused recipient/data: the session is still usable
+                            results[index] = e
+                        pending.pop(0)
+            except CONNECTION_ERRORS as e:
+                if reconnected:
+                    for index in pending:
+                        results[index] = e
+                    break
+                logger.warning(f"SMTP session dropped, reconnecting: {e}")
+                reconnected = True
+            except OSError as e:
+                # Connect/STARTTLS/AUTH failed, or a socket error: give up on the rest of the batch
+                for index in pending:
+                    results[index] = e
+                break
+
+        return results
+
+    def close_all(self):
+        with self._lock:
+            while self._idle:
+                session, _ = self._idle.pop()
+                self._close(session)
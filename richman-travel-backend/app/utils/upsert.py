@@ -0,0 +1,55 @@
+# app/utils/upsert.py - Insert-or-accumulate for counter and summary tables
+from app.extensions import db
+from sqlalchemy import select, insert, update, and_
+from sqlalchemy.exc import IntegrityError
+
+def upsert_rows(table, rows, index_elements, set_=None, connection=None):
+    """Insert rows (dicts), or add to the rows already stored under the same key
+
+    `index_elements` are the key columns (a primary key or unique index).
+    On a key that exists, each column in `set_` is incremented by the new
+    row's value; with no `set_` the existing row is left alone. Runs on
+    `connection` if given, else on db.session; the caller commits.
+    """
+    if not rows:
+        return
+    executor = connection if connection is not None else db.session
+    dialect = (connection.dialect if connection is not None else db.session.get_bind().dialect).name
+    # Sorted, so concurrent writers take row locks in the same order
+    rows = sorted(rows, key=lambda row: tuple(row[column] for column in index_elements))
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        statement = upsert(table)
+        if set_:
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c[column] for column in index_elements],
+                set_={column: table.c[column] + statement.excluded[column] for column in set_}
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=[table.c[column] for column in index_elements])
+        executor.execute(statement, rows)
+        return
+
+    # Portable fallback: update existing rows, insert the rest one by one
+    for row in rows:
+        key = and_(*(table.c[column] == row[column] for column in index_elements))
+        if set_ and _add_to(executor, table, key, row, set_):
+            continue
+        try:
+            with executor.begin_nested():
+                executor.execute(insert(table).values(**row))
+        except IntegrityError:
+            # Only a concurrent insert of the same key is expected here
+            if executor.execute(select(*(table.c[column] for column in index_elements)).where(key)).first() is None:
+                raise
+            if set_:
+                _add_to(executor, table, key, row, set_)
+
+def _add_to(executor, table, key, row, set_):
+    return executor.execute(
+        update(table).where(key).values({column: table.c[column] + row[column] for column in set_})
+    ).rowcount == 1
@@ -1,6 +1,17 @@
 # app/utils/validators.py - Fixed validation logic
 import re
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
+
+DIFFICULTY_LEVELS = ['easy', 'moderate', 'challenging']
+BOOKING_STATUSES = ['pending', 'confirmed', 'cancelled', 'completed']
+BULK_UPDATE_LIMIT = 500
+AVAILABILITY_DEFAULT_DAYS = 30
+AVAILABILITY_MAX_DAYS = 366
+FUNNEL_DEFAULT_DAYS = 30
+FUNNEL_MAX_DAYS = 731
+TIMESERIES_METRICS = ['bookings', 'guests', 'revenue', 'visits']
+# granularity -> (default days, max days)
+TIMESERIES_GRANULARITIES = {'hour': (2, 31), 'day': (30, 366), 'week': (84, 731), 'month': (365, 1830)}
 
 def validate_email(email):
     """Validate email format"""
@@ -85,11 +96,182 @@ def validate_destination_data(data):
     if data.get('image_url') and not is_valid_url(data['image_url']):
         errors.append('Invalid image URL')
     
-    if data.get('difficulty_level') and data['difficulty_level'] not in ['easy', 'moderate', 'challenging']:
+    if data.get('difficulty_level') and data['difficulty_level'] not in DIFFICULTY_LEVELS:
         errors.append('Difficulty level must be easy, moderate, or challenging')
     
     return errors
 
+def parse_destination_filters(args):
+    """Parse destination facet filters from query args; returns (filters, errors)"""
+    filters = {}
+    errors = []
+    
+    for field in ['min_price', 'max_price', 'min_days', 'max_days']:
+        value = args.get(field, '').strip()
+        if not value:
+            continue
+        try:
+            filters[field] = int(value)
+            if filters[field] < 0:
+                errors.append(f'{field} cannot be negative')
+        except ValueError:
+            errors.append(f'{field} must be a whole number')
+    
+    difficulty = args.get('difficulty', '').strip()
+    if difficulty:
+        levels = [level.strip().lower() for level in difficulty.split(',') if level.strip()]
+        invalid = [level for level in levels if level not in DIFFICULTY_LEVELS]
+        if invalid:
+            errors.append('Difficulty level must be easy, moderate, or challenging')
+        filters['difficulty'] = levels
+    
+    return filters, errors
+
+def parse_booking_filters(args):
+    """Parse admin booking filters from query args; returns (filters, errors)"""
+    filters = {}
+    errors = []
+    
+    status = args.get('status', '').strip()
+    if status:
+        statuses = [value.strip().lower() for value in status.split(',') if value.strip()]
+        if any(value not in BOOKING_STATUSES for value in statuses):
+            errors.append(f"Status must be one of: {', '.join(BOOKING_STATUSES)}")
+        filters['status'] = statuses
+    
+    # Name / email fragment or booking reference; trigram indexes need 3+ characters
+    q = args.get('q', '').strip()
+    if q:
+        if len(q) < 3:
+            errors.append('Search term must be at least 3 characters long')
+        elif len(q) > 100:
+            errors.append('Search term cannot exceed 100 characters')
+        filters['q'] = q
+    
+    # Inclusive ranges on the creation date and the preferred travel date
+    for start, end in [('start_date', 'end_date'), ('preferred_from', 'preferred_to')]:
+        for field in [start, end]:
+            value = args.get(field, '').strip()
+            if not value:
+                continue
+            try:
+                filters[field] = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                errors.append(f'{field} must be in YYYY-MM-DD format')
+        
+        if start in filters and end in filters and filters[start] > filters[end]:
+            errors.append(f'{start} cannot be after {end}')
+    
+    return filters, errors
+
+def parse_bulk_booking_update(data):
+    """Parse a bulk booking update body; returns (booking_ids, changes, errors)"""
+    errors = []
+    changes = {}
+    
+    raw_ids = data.get('ids')
+    booking_ids = []
+    if not isinstance(raw_ids, list) or not raw_ids:
+        errors.append('ids must be a non-empty list of booking ids')
+    elif len(raw_ids) > BULK_UPDATE_LIMIT:
+        errors.append(f'Cannot update more than {BULK_UPDATE_LIMIT} bookings at once')
+    else:
+        try:
+            # Keep request order, drop duplicates
+            booking_ids = list(dict.fromkeys(int(booking_id) for booking_id in raw_ids))
+        except (ValueError, TypeError):
+            errors.append('ids must be a non-empty list of booking ids')
+    
+    if data.get('status') is not None:
+        if data['status'] not in BOOKING_STATUSES:
+            errors.append(f"Status must be one of: {', '.join(BOOKING_STATUSES)}")
+        changes['status'] = data['status']
+    
+    if data.get('estimated_cost') is not None:
+        try:
+            changes['estimated_cost'] = float(data['estimated_cost'])
+            if changes['estimated_cost'] < 0:
+                errors.append('Estimated cost cannot be negative')
+        except (ValueError, TypeError):
+            errors.append('Invalid estimated cost format')
+    
+    if not changes and not errors:
+        errors.append('Provide a status and/or estimated_cost to apply')
+    
+    return booking_ids, changes, errors
+
+def parse_date_range(values, start_field='from', end_field='to', max_days=AVAILABILITY_MAX_DAYS):
+    """Parse an inclusive date range; `to` defaults to 30 days after `from`, which defaults to today
+
+    Returns (start, end, errors).
+    """
+    errors = []
+    dates = {}
+    for field in [start_field, end_field]:
+        value = str(values.get(field) or '').strip()
+        if not value:
+            continue
+        try:
+            dates[field] = datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            errors.append(f'{field} must be in YYYY-MM-DD format')
+    if errors:
+        return None, None, errors
+    
+    start = dates.get(start_field, date.today())
+    end = dates.get(end_field, start + timedelta(days=AVAILABILITY_DEFAULT_DAYS - 1))
+    if start > end:
+        errors.append(f'{start_field} cannot be after {end_field}')
+    elif (end - start).days >= max_days:
+        errors.append(f'Date range cannot exceed {max_days} days')
+    return start, end, errors
+
+def parse_lookback_range(args, default_days, max_days):
+    """Parse an inclusive from/to range ending today by default, for reports
+    
+    Returns (start, end, errors) like parse_date_range.
+    """
+    values = {'to': args.get('to') or date.today().isoformat()}
+    if args.get('from'):
+        values['from'] = args['from']
+    else:
+        try:
+            values['from'] = (datetime.strptime(values['to'], '%Y-%m-%d').date() - timedelta(days=default_days - 1)).isoformat()
+        except ValueError:
+            pass  # Reported by parse_date_range
+    return parse_date_range(values, max_days=max_days)
+
+def parse_timeseries_query(args):
+    """Parse a time series request; returns (query, errors)
+    
+    `to` defaults to today and `from` to a span that suits the granularity.
+    Filters are the admin booking filters plus `destination` and `page`;
+    the booking creation date range comes from `from`/`to` instead.
+    """
+    errors = []
+    metric = args.get('metric', 'bookings').strip().lower()
+    if metric not in TIMESERIES_METRICS:
+        errors.append(f"Metric must be one of: {', '.join(TIMESERIES_METRICS)}")
+    granularity = args.get('granularity', 'day').strip().lower()
+    if granularity not in TIMESERIES_GRANULARITIES:
+        errors.append(f"Granularity must be one of: {', '.join(TIMESERIES_GRANULARITIES)}")
+    if errors:
+        return None, errors
+    
+    default_days, max_days = TIMESERIES_GRANULARITIES[granularity]
+    start, end, errors = parse_lookback_range(args, default_days, max_days)
+    
+    filters, filter_errors = parse_booking_filters(args)
+    errors.extend(filter_errors)
+    filters.pop('start_date', None)
+    filters.pop('end_date', None)
+    for field in ['destination', 'page']:
+        value = args.get(field, '').strip()
+        if value:
+            filters[field] = value
+    
+    return {'metric': metric, 'granularity': granularity, 'start': start, 'end': end, 'filters': filters}, errors
+
 def validate_contact_data(data):
     """Validate contact form data"""
     errors = []
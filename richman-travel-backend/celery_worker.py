@@ -0,0 +1,7 @@
+# celery_worker.py - Celery worker entry point
+#   celery -A celery_worker worker --loglevel=info
+import os
+from app import create_app
+
+flask_app = create_app(os.getenv('FLASK_CONFIG', 'development'))
+celery_app = flask_app.extensions['celery']
@@ -1,5 +1,6 @@
 import os
 from datetime import timedelta
+from celery.schedules import crontab
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -18,6 +19,60 @@ class Config:
     
     # Rate Limiting
     RATELIMIT_STORAGE_URL = os.environ.get('REDIS_URL', 'memory://')
+    
+    # Background jobs; without a broker, tasks run eagerly in-process
+    CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', os.environ.get('REDIS_URL'))
+    CELERY = {
+        'broker_url': CELERY_BROKER_URL or 'memory://',
+        'task_always_eager': not CELERY_BROKER_URL,
+        'task_ignore_result': True,
+        # Periodic jobs for `celery -A celery_worker beat`; without a broker, cron the matching flask commands
+        'beat_schedule': {
+            'sync-calendar': {
+                'task': 'app.tasks.sync_calendar',
+                # Picks up retries and anything a missed schedule() left queued
+                'schedule': float(os.environ.get('CALENDAR_SYNC_INTERVAL', 300))
+            },
+            'compact-site-visits': {
+                'task': 'app.tasks.compact_site_visits',
+                # Daily, so an expired month is dropped within a day of leaving the retention window
+                'schedule': crontab(hour=3, minute=15)
+            }
+        }
+    }
+    
+    # Destination catalog cache (seconds before a worker re-reads the catalog)
+    CATALOG_CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL', 300))
+    
+    # Booking reference sequence numbers reserved per worker at a time
+    REFERENCE_BLOCK_SIZE = int(os.environ.get('REFERENCE_BLOCK_SIZE', 100))
+    
+    # Destination search: 'auto' (database full-text index if migrated), 'database' or 'memory'
+    DESTINATION_SEARCH_BACKEND = os.environ.get('DESTINATION_SEARCH_BACKEND', 'auto')
+    
+    # Destination view counts are buffered per worker and written in batches
+    VIEW_COUNT_FLUSH_INTERVAL = float(os.environ.get('VIEW_COUNT_FLUSH_INTERVAL', 10))
+    VIEW_COUNT_FLUSH_THRESHOLD = int(os.environ.get('VIEW_COUNT_FLUSH_THRESHOLD', 500))
+    
+    # Site visits are buffered per worker (ring buffer) and bulk-inserted
+    VISIT_TRACKING_ENABLED = os.environ.get('VISIT_TRACKING_ENABLED', 'true').lower() == 'true'
+    VISIT_BUFFER_SIZE = int(os.environ.get('VISIT_BUFFER_SIZE', 10000))
+    VISIT_FLUSH_INTERVAL = float(os.environ.get('VISIT_FLUSH_INTERVAL', 5))
+    VISIT_FLUSH_BATCH = int(os.environ.get('VISIT_FLUSH_BATCH', 500))
+    # Raw visits are kept in monthly partitions for this many months, then rolled up and dropped
+    VISIT_RETENTION_MONTHS = int(os.environ.get('VISIT_RETENTION_MONTHS', 12))
+    
+    # Destination funnel counters (page visits, detail views) are buffered per worker
+    FUNNEL_FLUSH_INTERVAL = float(os.environ.get('FUNNEL_FLUSH_INTERVAL', 10))
+    
+    # Google Calendar sync through the calendar_outbox table
+    CALENDAR_SYNC_ENABLED = os.environ.get('CALENDAR_SYNC_ENABLED', 'false').lower() == 'true'
+    CALENDAR_SYNC_DELAY = int(os.environ.get('CALENDAR_SYNC_DELAY', 5))  # seconds to gather changes before a drain
+    CALENDAR_SYNC_BATCH_SIZE = int(os.environ.get('CALENDAR_SYNC_BATCH_SIZE', 50))  # operations per batch HTTP request
+    CALENDAR_SYNC_MAX_ATTEMPTS = int(os.environ.get('CALENDAR_SYNC_MAX_ATTEMPTS', 8))
+    
+    # Admin dashboard payload is cached per worker for this many seconds
+    DASHBOARD_CACHE_TTL = float(os.environ.get('DASHBOARD_CACHE_TTL', 15))
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -31,6 +86,11 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    VIEW_COUNT_FLUSH_INTERVAL = 0
+    VISIT_FLUSH_INTERVAL = 0
+    FUNNEL_FLUSH_INTERVAL = 0
+    DASHBOARD_CACHE_TTL = 0
+    CELERY = dict(Config.CELERY, broker_url='memory://', task_always_eager=True)
 
 config_by_name = {
     'development': DevelopmentConfig,
@@ -51,6 +51,23 @@ def get_metadata():
     return target_db.metadata
 
 
+# Objects maintained by hand-written SQL in migrations (full-text indexes),
+# which autogenerate would otherwise try to drop
+UNMANAGED_TABLE_PREFIXES = ('destinations_fts', 'bookings_fts', 'site_visits_')
+UNMANAGED_COLUMNS = {('destinations', 'search_vector')}
+UNMANAGED_INDEXES = {'ix_destinations_search_vector', 'ix_bookings_name_trgm', 'ix_bookings_email_trgm'}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == 'table' and name.startswith(UNMANAGED_TABLE_PREFIXES):
+        return False
+    if type_ == 'column' and (object.table.name, name) in UNMANAGED_COLUMNS:
+        return False
+    if type_ == 'index' and name in UNMANAGED_INDEXES:
+        return False
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -93,6 +110,8 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_object") is None:
+        conf_args["include_object"] = include_object
 
     connectable = get_engine()
 
@@ -0,0 +1,84 @@
+"""Destination numeric facets (price, duration, difficulty)
+
+Revision ID: 10ce503f3507
+Revises: 36d9d9f603aa
+Create Date: 2026-10-17 10:03:52.118406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import re
+
+
+# revision identifiers, used by Alembic.
+revision = '10ce503f3507'
+down_revision = '36d9d9f603aa'
+branch_labels = None
+depends_on = None
+
+
+# Frozen copies of app.utils.helpers.parse_price_range / parse_duration_days
+def _parse_price_range(price_range):
+    amounts = [int(float(n.replace(',', ''))) for n in re.findall(r'\d[\d,]*(?:\.\d+)?', price_range or '')]
+    if not amounts:
+        return None, None
+    return min(amounts), max(amounts)
+
+
+def _parse_duration_days(duration):
+    numbers = [int(n) for n in re.findall(r'\d+', duration or '')]
+    if not numbers:
+        return None
+    days = max(numbers)
+    if re.search(r'week', duration, re.IGNORECASE):
+        days *= 7
+    return days
+
+
+def upgrade():
+    op.add_column('destinations', sa.Column('min_price', sa.Integer(), nullable=True))
+    op.add_column('destinations', sa.Column('max_price', sa.Integer(), nullable=True))
+    op.add_column('destinations', sa.Column('duration_days', sa.Integer(), nullable=True))
+
+    # Backfill from the free-text columns
+    bind = op.get_bind()
+    destinations = sa.table(
+        'destinations',
+        sa.column('id', sa.Integer),
+        sa.column('price_range', sa.String),
+        sa.column('duration', sa.String),
+        sa.column('min_price', sa.Integer),
+        sa.column('max_price', sa.Integer),
+        sa.column('duration_days', sa.Integer)
+    )
+    rows = bind.execute(sa.select(destinations.c.id, destinations.c.price_range, destinations.c.duration)).fetchall()
+    updates = []
+    for row in rows:
+        min_price, max_price = _parse_price_range(row.price_range)
+        updates.append({
+            'b_id': row.id,
+            'min_price': min_price,
+            'max_price': max_price,
+            'duration_days': _parse_duration_days(row.duration)
+        })
+    if updates:
+        bind.execute(
+            destinations.update().where(destinations.c.id == sa.bindparam('b_id')),
+            updates
+        )
+
+    op.create_index('ix_destinations_min_price', 'destinations', ['min_price'])
+    op.create_index('ix_destinations_max_price', 'destinations', ['max_price'])
+    op.create_index('ix_destinations_duration_days', 'destinations', ['duration_days'])
+    op.create_index('ix_destinations_difficulty_level', 'destinations', ['difficulty_level'])
+
+
+def downgrade():
+    op.drop_index('ix_destinations_difficulty_level', table_name='destinations')
+    op.drop_index('ix_destinations_duration_days', table_name='destinations')
+    op.drop_index('ix_destinations_max_price', table_name='destinations')
+    op.drop_index('ix_destinations_min_price', table_name='destinations')
+    with op.batch_alter_table('destinations') as batch_op:
+        batch_op.drop_column('duration_days')
+        batch_op.drop_column('max_price')
+        batch_op.drop_column('min_price')
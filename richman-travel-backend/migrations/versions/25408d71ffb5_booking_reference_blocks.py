@@ -0,0 +1,28 @@
+"""Booking reference sequence blocks
+
+Revision ID: 25408d71ffb5
+Revises: 10ce503f3507
+Create Date: 2026-10-17 11:26:08.530917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '25408d71ffb5'
+down_revision = '10ce503f3507'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('booking_reference_blocks',
+    sa.Column('day', sa.String(length=6), nullable=False),
+    sa.Column('next_value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+
+
+def downgrade():
+    op.drop_table('booking_reference_blocks')
@@ -0,0 +1,72 @@
+"""Destination full-text search index
+
+Revision ID: 36d9d9f603aa
+Revises: aeadb651dff7
+Create Date: 2026-10-17 09:12:31.402115
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '36d9d9f603aa'
+down_revision = 'aeadb651dff7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # Weighted tsvector kept current by PostgreSQL itself (12+)
+        op.execute("""
+            ALTER TABLE destinations ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(highlights, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(description, '')), 'C')
+            ) STORED
+        """)
+        op.create_index('ix_destinations_search_vector', 'destinations', ['search_vector'],
+                        postgresql_using='gin')
+    elif bind.dialect.name == 'sqlite':
+        # External-content FTS5 table kept in sync by triggers
+        op.execute("""
+            CREATE VIRTUAL TABLE destinations_fts USING fts5(
+                name, description, highlights,
+                content='destinations', content_rowid='id'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER destinations_fts_ai AFTER INSERT ON destinations BEGIN
+                INSERT INTO destinations_fts(rowid, name, description, highlights)
+                VALUES (new.id, new.name, new.description, new.highlights);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER destinations_fts_ad AFTER DELETE ON destinations BEGIN
+                INSERT INTO destinations_fts(destinations_fts, rowid, name, description, highlights)
+                VALUES ('delete', old.id, old.name, old.description, old.highlights);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER destinations_fts_au AFTER UPDATE OF name, description, highlights ON destinations BEGIN
+                INSERT INTO destinations_fts(destinations_fts, rowid, name, description, highlights)
+                VALUES ('delete', old.id, old.name, old.description, old.highlights);
+                INSERT INTO destinations_fts(rowid, name, description, highlights)
+                VALUES (new.id, new.name, new.description, new.highlights);
+            END
+        """)
+        op.execute("INSERT INTO destinations_fts(destinations_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.drop_index('ix_destinations_search_vector', table_name='destinations')
+        op.drop_column('destinations', 'search_vector')
+    elif bind.dialect.name == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS destinations_fts_au')
+        op.execute('DROP TRIGGER IF EXISTS destinations_fts_ad')
+        op.execute('DROP TRIGGER IF EXISTS destinations_fts_ai')
+        op.execute('DROP TABLE IF EXISTS destinations_fts')
@@ -0,0 +1,25 @@
+"""Booking keyset pagination indexes
+
+Revision ID: 5c1e7a90b2d4
+Revises: 25408d71ffb5
+Create Date: 2026-10-17 14:02:41.118304
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e7a90b2d4'
+down_revision = '25408d71ffb5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_bookings_created_at_id', 'bookings', ['created_at', 'id'])
+    op.create_index('ix_bookings_status_created_at_id', 'bookings', ['status', 'created_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_bookings_status_created_at_id', table_name='bookings')
+    op.drop_index('ix_bookings_created_at_id', table_name='bookings')
@@ -0,0 +1,67 @@
+"""Booking admin search indexes
+
+Revision ID: 8f3b2d6e4a17
+Revises: 5c1e7a90b2d4
+Create Date: 2026-10-17 15:20:07.664290
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8f3b2d6e4a17'
+down_revision = '5c1e7a90b2d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_bookings_preferred_date', 'bookings', ['preferred_date'])
+
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # Trigram GIN indexes serve ILIKE '%fragment%' on name and email
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute('CREATE INDEX ix_bookings_name_trgm ON bookings USING gin (name gin_trgm_ops)')
+        op.execute('CREATE INDEX ix_bookings_email_trgm ON bookings USING gin (email gin_trgm_ops)')
+    elif bind.dialect.name == 'sqlite':
+        # External-content trigram FTS5 table (SQLite 3.34+) kept in sync by triggers
+        op.execute("""
+            CREATE VIRTUAL TABLE bookings_fts USING fts5(
+                name, email,
+                content='bookings', content_rowid='id', tokenize='trigram'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER bookings_fts_ai AFTER INSERT ON bookings BEGIN
+                INSERT INTO bookings_fts(rowid, name, email) VALUES (new.id, new.name, new.email);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER bookings_fts_ad AFTER DELETE ON bookings BEGIN
+                INSERT INTO bookings_fts(bookings_fts, rowid, name, email)
+                VALUES ('delete', old.id, old.name, old.email);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER bookings_fts_au AFTER UPDATE OF name, email ON bookings BEGIN
+                INSERT INTO bookings_fts(bookings_fts, rowid, name, email)
+                VALUES ('delete', old.id, old.name, old.email);
+                INSERT INTO bookings_fts(rowid, name, email) VALUES (new.id, new.name, new.email);
+            END
+        """)
+        op.execute("INSERT INTO bookings_fts(bookings_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_bookings_email_trgm')
+        op.execute('DROP INDEX IF EXISTS ix_bookings_name_trgm')
+    elif bind.dialect.name == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS bookings_fts_au')
+        op.execute('DROP TRIGGER IF EXISTS bookings_fts_ad')
+        op.execute('DROP TRIGGER IF EXISTS bookings_fts_ai')
+        op.execute('DROP TABLE IF EXISTS bookings_fts')
+
+    op.drop_index('ix_bookings_preferred_date', table_name='bookings')
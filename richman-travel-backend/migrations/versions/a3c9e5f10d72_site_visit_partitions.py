@@ -0,0 +1,150 @@
+"""Monthly site_visits partitions
+
+Revision ID: a3c9e5f10d72
+Revises: f5d2e8a61c3b
+Create Date: 2026-10-18 09:41:27.604113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import date
+import re
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c9e5f10d72'
+down_revision = 'f5d2e8a61c3b'
+branch_labels = None
+depends_on = None
+
+COLUMNS = 'id, ip_address, page, user_agent, referer, session_id, "timestamp"'
+PARTITION_NAME_RE = re.compile(r'^site_visits_(\d{4})(\d{2})$')
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def visit_columns():
+    return [
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('ip_address', sa.String(length=45), nullable=True),
+        sa.Column('page', sa.String(length=100), nullable=True),
+        sa.Column('user_agent', sa.String(length=255), nullable=True),
+        sa.Column('referer', sa.String(length=255), nullable=True),
+        sa.Column('session_id', sa.String(length=50), nullable=True),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    ]
+
+
+def upgrade():
+    # Visits without a timestamp cannot be placed in a month (and were never counted)
+    op.execute('DELETE FROM site_visits WHERE "timestamp" IS NULL')
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        upgrade_postgresql()
+    elif dialect == 'sqlite':
+        upgrade_sqlite()
+    else:
+        with op.batch_alter_table('site_visits') as batch_op:
+            batch_op.alter_column('timestamp', existing_type=sa.DateTime(), nullable=False)
+
+
+def upgrade_postgresql():
+    op.execute('ALTER TABLE site_visits RENAME TO site_visits_unpartitioned')
+    op.execute('ALTER INDEX ix_site_visits_timestamp RENAME TO ix_site_visits_unpartitioned_timestamp')
+    op.execute('ALTER SEQUENCE site_visits_id_seq RENAME TO site_visits_unpartitioned_id_seq')
+
+    # The partition key has to be part of the primary key
+    op.execute("""
+        CREATE TABLE site_visits (
+            id SERIAL NOT NULL,
+            ip_address VARCHAR(45),
+            page VARCHAR(100),
+            user_agent VARCHAR(255),
+            referer VARCHAR(255),
+            session_id VARCHAR(50),
+            "timestamp" TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id, "timestamp")
+        ) PARTITION BY RANGE ("timestamp")
+    """)
+    op.execute('CREATE INDEX ix_site_visits_timestamp ON site_visits ("timestamp")')
+
+    months = set(op.get_bind().execute(sa.text(
+        "SELECT DISTINCT date_trunc('month', \"timestamp\")::date FROM site_visits_unpartitioned"
+    )).scalars())
+    current = date.today().replace(day=1)
+    months.update([current, add_months(current, 1)])
+    for month in sorted(months):
+        op.execute(
+            f"CREATE TABLE site_visits_{month:%Y%m} PARTITION OF site_visits "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        )
+
+    op.execute(f'INSERT INTO site_visits ({COLUMNS}) SELECT {COLUMNS} FROM site_visits_unpartitioned')
+    op.execute("SELECT setval('site_visits_id_seq', COALESCE((SELECT MAX(id) FROM site_visits), 0) + 1, false)")
+    op.execute('DROP TABLE site_visits_unpartitioned')
+
+
+def upgrade_sqlite():
+    months = op.get_bind().execute(sa.text(
+        "SELECT DISTINCT strftime('%Y-%m-01', timestamp) FROM site_visits"
+    )).scalars().all()
+    for value in months:
+        month = date.fromisoformat(value)
+        name = f'site_visits_{month:%Y%m}'
+        op.create_table(name, *visit_columns())
+        op.create_index(f'ix_{name}_timestamp', name, ['timestamp'])
+        op.execute(
+            f"INSERT INTO {name} ({COLUMNS}) SELECT {COLUMNS} FROM site_visits "
+            f"WHERE timestamp >= '{month.isoformat()}' AND timestamp < '{add_months(month, 1).isoformat()}'"
+        )
+    # Rows live in the monthly tables from now on
+    op.execute('DELETE FROM site_visits')
+
+    with op.batch_alter_table('site_visits') as batch_op:
+        batch_op.alter_column('timestamp', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        downgrade_postgresql()
+    elif dialect == 'sqlite':
+        downgrade_sqlite()
+    else:
+        with op.batch_alter_table('site_visits') as batch_op:
+            batch_op.alter_column('timestamp', existing_type=sa.DateTime(), nullable=True)
+
+
+def downgrade_postgresql():
+    op.execute('ALTER TABLE site_visits RENAME TO site_visits_partitioned')
+    op.execute('ALTER INDEX ix_site_visits_timestamp RENAME TO ix_site_visits_partitioned_timestamp')
+    op.execute('ALTER SEQUENCE site_visits_id_seq RENAME TO site_visits_partitioned_id_seq')
+
+    columns = visit_columns()
+    columns[-2] = sa.Column('timestamp', sa.DateTime(), nullable=True)
+    op.create_table('site_visits', *columns)
+    op.create_index('ix_site_visits_timestamp', 'site_visits', ['timestamp'])
+
+    op.execute(f'INSERT INTO site_visits ({COLUMNS}) SELECT {COLUMNS} FROM site_visits_partitioned')
+    op.execute("SELECT setval('site_visits_id_seq', COALESCE((SELECT MAX(id) FROM site_visits), 0) + 1, false)")
+    # Drops the partitions with it
+    op.execute('DROP TABLE site_visits_partitioned')
+
+
+def downgrade_sqlite():
+    with op.batch_alter_table('site_visits') as batch_op:
+        batch_op.alter_column('timestamp', existing_type=sa.DateTime(), nullable=True)
+
+    names = op.get_bind().execute(sa.text(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'site_visits_%'"
+    )).scalars().all()
+    # Ids are only unique within a month's table, so they are reassigned
+    columns = COLUMNS.replace('id, ', '', 1)
+    for name in sorted(name for name in names if PARTITION_NAME_RE.match(name)):
+        op.execute(f'INSERT INTO site_visits ({columns}) SELECT {columns} FROM {name} ORDER BY timestamp')
+        op.drop_table(name)
@@ -0,0 +1,40 @@
+"""Per-destination daily funnel counters
+
+Revision ID: b6f1d08e2a95
+Revises: a3c9e5f10d72
+Create Date: 2026-10-18 11:26:03.871540
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6f1d08e2a95'
+down_revision = 'a3c9e5f10d72'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('destination_funnel_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('destination', sa.String(length=100), nullable=False),
+    sa.Column('page_visits', sa.BigInteger(), nullable=False),
+    sa.Column('detail_views', sa.BigInteger(), nullable=False),
+    sa.Column('bookings', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'destination')
+    )
+
+    # Bookings so far; page visits and detail views were never recorded per day
+    op.execute("""
+        INSERT INTO destination_funnel_daily (day, destination, page_visits, detail_views, bookings)
+        SELECT date(bookings.created_at), bookings.destination, 0, 0, COUNT(*)
+        FROM bookings JOIN destinations ON destinations.slug = bookings.destination
+        WHERE bookings.created_at IS NOT NULL
+        GROUP BY date(bookings.created_at), bookings.destination
+    """)
+
+
+def downgrade():
+    op.drop_table('destination_funnel_daily')
@@ -0,0 +1,40 @@
+"""Calendar sync outbox
+
+Revision ID: c47d0e9a3f61
+Revises: 8f3b2d6e4a17
+Create Date: 2026-10-17 17:41:52.203318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47d0e9a3f61'
+down_revision = '8f3b2d6e4a17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('calendar_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('booking_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+    sa.Column('claimed_by', sa.String(length=32), nullable=True),
+    sa.Column('claimed_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['booking_id'], ['bookings.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_calendar_outbox_booking_id', 'calendar_outbox', ['booking_id'])
+    op.create_index('ix_calendar_outbox_status_next_attempt_at', 'calendar_outbox', ['status', 'next_attempt_at'])
+
+
+def downgrade():
+    op.drop_index('ix_calendar_outbox_status_next_attempt_at', table_name='calendar_outbox')
+    op.drop_index('ix_calendar_outbox_booking_id', table_name='calendar_outbox')
+    op.drop_table('calendar_outbox')
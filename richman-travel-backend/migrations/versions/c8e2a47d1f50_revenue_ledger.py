@@ -0,0 +1,43 @@
+"""Monthly revenue ledger
+
+Revision ID: c8e2a47d1f50
+Revises: b6f1d08e2a95
+Create Date: 2026-10-18 13:52:48.117693
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e2a47d1f50'
+down_revision = 'b6f1d08e2a95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('revenue_monthly',
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('bookings', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('month')
+    )
+
+    # Backfill; amounts are rounded to cents per booking, like the ledger's own updates
+    if op.get_bind().dialect.name == 'postgresql':
+        month = "date_trunc('month', created_at)::date"
+        amount = 'ROUND(estimated_cost::numeric, 2)'
+    else:
+        month = "date(created_at, 'start of month')"
+        amount = 'ROUND(estimated_cost, 2)'
+    op.execute(f"""
+        INSERT INTO revenue_monthly (month, revenue, bookings)
+        SELECT {month}, SUM({amount}), COUNT(*) FROM bookings
+        WHERE status IN ('confirmed', 'completed') AND estimated_cost IS NOT NULL AND created_at IS NOT NULL
+        GROUP BY {month}
+    """)
+
+
+def downgrade():
+    op.drop_table('revenue_monthly')
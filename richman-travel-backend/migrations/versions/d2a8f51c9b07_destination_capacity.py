@@ -0,0 +1,44 @@
+"""Destination capacity running totals
+
+Revision ID: d2a8f51c9b07
+Revises: c47d0e9a3f61
+Create Date: 2026-10-17 19:12:40.617254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a8f51c9b07'
+down_revision = 'c47d0e9a3f61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('destinations', sa.Column('daily_capacity', sa.Integer(), nullable=True))
+    op.create_table('destination_capacity',
+    sa.Column('destination_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('capacity', sa.Integer(), nullable=True),
+    sa.Column('booked', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['destination_id'], ['destinations.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('destination_id', 'date')
+    )
+
+    # Running totals for existing bookings (same rule as CapacityService.rebuild)
+    op.execute("""
+        INSERT INTO destination_capacity (destination_id, date, booked)
+        SELECT destinations.id, bookings.preferred_date, SUM(COALESCE(bookings.guests, 1))
+        FROM bookings JOIN destinations ON destinations.slug = bookings.destination
+        WHERE bookings.status IN ('pending', 'confirmed', 'completed')
+          AND bookings.preferred_date IS NOT NULL
+        GROUP BY destinations.id, bookings.preferred_date
+    """)
+
+
+def downgrade():
+    op.drop_table('destination_capacity')
+    with op.batch_alter_table('destinations') as batch_op:
+        batch_op.drop_column('daily_capacity')
@@ -0,0 +1,53 @@
+"""Hourly and daily visit rollups
+
+Revision ID: e91b4c7d2f38
+Revises: d2a8f51c9b07
+Create Date: 2026-10-17 20:03:15.482907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e91b4c7d2f38'
+down_revision = 'd2a8f51c9b07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('visit_rollups_hourly',
+    sa.Column('hour', sa.DateTime(), nullable=False),
+    sa.Column('visits', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('hour')
+    )
+    op.create_table('visit_rollups_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('visits', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_index('ix_site_visits_timestamp', 'site_visits', ['timestamp'])
+
+    # Backfill from the visits recorded so far
+    if op.get_bind().dialect.name == 'postgresql':
+        hour = "date_trunc('hour', timestamp)"
+    else:
+        hour = "strftime('%Y-%m-%d %H:00:00.000000', timestamp)"
+    op.execute(f"""
+        INSERT INTO visit_rollups_hourly (hour, visits)
+        SELECT {hour}, COUNT(*) FROM site_visits
+        WHERE timestamp IS NOT NULL
+        GROUP BY {hour}
+    """)
+    op.execute("""
+        INSERT INTO visit_rollups_daily (day, visits)
+        SELECT date(hour), SUM(visits) FROM visit_rollups_hourly
+        GROUP BY date(hour)
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_site_visits_timestamp', table_name='site_visits')
+    op.drop_table('visit_rollups_daily')
+    op.drop_table('visit_rollups_hourly')
@@ -0,0 +1,57 @@
+"""Daily HyperLogLog unique visitor sketches
+
+Revision ID: f5d2e8a61c3b
+Revises: e91b4c7d2f38
+Create Date: 2026-10-17 21:12:40.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from collections import defaultdict
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5d2e8a61c3b'
+down_revision = 'e91b4c7d2f38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    from app.utils.hyperloglog import HyperLogLog
+
+    sketches_table = op.create_table('visitor_sketches',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('page', sa.String(length=100), nullable=False),
+    sa.Column('sketch', sa.LargeBinary(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'page')
+    )
+
+    # Backfill from the visits recorded so far, same keys as VisitorSketchService
+    site_visits = sa.table('site_visits',
+        sa.column('timestamp', sa.DateTime()),
+        sa.column('page', sa.String()),
+        sa.column('session_id', sa.String()),
+        sa.column('ip_address', sa.String()),
+        sa.column('user_agent', sa.String()),
+    )
+    sketches = defaultdict(HyperLogLog)
+    rows = op.get_bind().execute(
+        sa.select(site_visits).where(site_visits.c.timestamp.isnot(None))
+        .execution_options(yield_per=10000)
+    )
+    for row in rows:
+        day = row.timestamp.date()
+        key = row.session_id or f"{row.ip_address or ''}|{row.user_agent or ''}"
+        sketches[(day, '*')].add(key)
+        if row.page:
+            sketches[(day, row.page)].add(key)
+    if sketches:
+        op.bulk_insert(sketches_table, [
+            {'day': day, 'page': page, 'sketch': sketch.to_bytes()}
+            for (day, page), sketch in sorted(sketches.items())
+        ])
+
+
+def downgrade():
+    op.drop_table('visitor_sketches')
@@ -0,0 +1,87 @@
+# scripts/benchmark_calendar_client.py - Per-call overhead of CalendarService
+#
+# Usage: python scripts/benchmark_calendar_client.py [calls] [latency_ms]
+#
+# Runs create/update/delete cycles against the local fake Calendar server
+# and reports calls/sec for:
+#   uncached  - token file read, discovery build and a new connection on
+#               every call (the previous behaviour, via CalendarService.reset())
+#   cached    - credentials, service and connection reused
+# latency_ms adds a server-side delay per response (default 0, which
+# isolates the client-side overhead).
+
+import sys
+import os
+import json
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fake_calendar_server import FakeCalendarServer
+
+def write_token(path):
+    # Long-lived access token so no refresh is attempted
+    expiry = (datetime.utcnow() + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%SZ')
+    with open(path, 'w') as token:
+        json.dump({
+            'token': 'fake-access-token',
+            'refresh_token': 'fake-refresh-token',
+            'client_id': 'fake-client',
+            'client_secret': 'fake-secret',
+            'token_uri': 'https://oauth2.googleapis.com/token',
+            'expiry': expiry
+        }, token)
+
+def booking(i):
+    return SimpleNamespace(
+        booking_reference=f'RT300101{i:04d}', name=f'Guest {i}', email=f'guest{i}@example.com',
+        phone='0712345678', destination='maasai-mara', guests=2, status='confirmed',
+        message='', preferred_date=date(2030, 1, 1)
+    )
+
+def cycle(service, i, reset):
+    # Three API calls per cycle: insert, get+update, delete
+    if reset:
+        service.reset()
+    event_id = service.create_event(booking(i))
+    assert event_id
+    if reset:
+        service.reset()
+    assert service.update_event(event_id, booking(i))
+    if reset:
+        service.reset()
+    assert service.delete_event(event_id)
+
+def main(calls=300, latency_ms=0):
+    server = FakeCalendarServer(latency_ms=latency_ms).start()
+    token = tempfile.NamedTemporaryFile(suffix='.json', delete=False)
+    write_token(token.name)
+    os.environ['GOOGLE_TOKEN_FILE'] = token.name
+    os.environ['GOOGLE_CALENDAR_API_ENDPOINT'] = server.endpoint
+
+    from app.services.calendar_service import CalendarService
+
+    try:
+        service = CalendarService()
+        cycles = max(calls // 4, 1)
+        print(f"{cycles * 4} API calls ({cycles} create/update/delete cycles), {latency_ms}ms server latency")
+        print(f"{'mode':>10} {'seconds':>8} {'calls/sec':>10} {'ms/call':>8}")
+        for name, reset in [('uncached', True), ('cached', False)]:
+            CalendarService.reset()
+            start = time.perf_counter()
+            for i in range(cycles):
+                cycle(service, i, reset)
+            elapsed = time.perf_counter() - start
+            api_calls = cycles * 4
+            print(f"{name:>10} {elapsed:>8.2f} {api_calls / elapsed:>10.1f} {elapsed / api_calls * 1000:>8.2f}")
+        assert not server.active_events()
+    finally:
+        server.stop()
+        os.unlink(token.name)
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args)
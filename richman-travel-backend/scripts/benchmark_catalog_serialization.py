@@ -0,0 +1,88 @@
+# scripts/benchmark_catalog_serialization.py - Compare destination list serialization paths
+#
+# Usage: python scripts/benchmark_catalog_serialization.py [sizes...]
+#
+# Builds an in-memory SQLite catalog and times, per list response:
+#   baseline  - query all rows, to_dict() each (json.loads + isoformat), jsonify
+#   rebuild   - catalog cache snapshot rebuild after one destination changed
+#   cached    - serving the pre-encoded body from the snapshot (steady state)
+
+import sys
+import os
+import json
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import jsonify
+from app import create_app
+from app.extensions import db
+from app.models import Destination
+from app.services.catalog_service import catalog_cache
+
+def seed(count):
+    db.session.query(Destination).delete()
+    db.session.bulk_insert_mappings(Destination, [
+        {
+            'name': f'Destination {i}',
+            'slug': f'destination-{i}',
+            'description': 'Game drives, guided walks and sundowners over the savannah. ' * 3,
+            'image_url': f'https://images.example.com/{i}.jpg',
+            'duration': f'{i % 7 + 1} days',
+            'highlights': json.dumps(['Big Five', 'Great Migration', 'Maasai Culture', 'Photography']),
+            'price_range': '$800 - $1200',
+            'difficulty_level': 'easy',
+            'best_time_to_visit': 'July - October',
+            'is_featured': i % 5 == 0,
+            'is_active': True,
+            'view_count': i
+        } for i in range(count)
+    ])
+    db.session.commit()
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def baseline():
+    destinations = Destination.query.filter_by(is_active=True).order_by(Destination.created_at.desc()).all()
+    response = jsonify({
+        'success': True,
+        'data': [dest.to_dict() for dest in destinations],
+        'count': len(destinations)
+    })
+    db.session.expunge_all()
+    return response.get_data()
+
+def rebuild():
+    # One row edited: only its fragment is re-encoded
+    dest = Destination.query.first()
+    dest.description = dest.description + '.'
+    db.session.commit()
+    db.session.expunge_all()
+    return catalog_cache.snapshot().listing()[0]
+
+def cached():
+    return catalog_cache.snapshot().listing()[0]
+
+def main(sizes):
+    app = create_app('testing')
+    with app.test_request_context():
+        db.create_all()
+        print(f"{'rows':>8} {'baseline ms':>12} {'rebuild ms':>11} {'cached ms':>10} {'speedup':>8}")
+        for size in sizes:
+            seed(size)
+            catalog_cache.bump_version()
+            catalog_cache.snapshot()
+
+            assert json.loads(baseline())['count'] == json.loads(cached())['count'] == size
+            base_ms = timed(baseline, 5)
+            rebuild_ms = timed(rebuild, 5)
+            cached_ms = timed(cached, 50)
+            print(f"{size:>8} {base_ms:>12.2f} {rebuild_ms:>11.2f} {cached_ms:>10.4f} {base_ms / rebuild_ms:>7.1f}x")
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000])
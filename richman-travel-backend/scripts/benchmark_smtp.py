@@ -0,0 +1,93 @@
+# scripts/benchmark_smtp.py - SMTP throughput: one connection per message vs pooled sessions
+#
+# Usage: pip install aiosmtpd && python scripts/benchmark_smtp.py [messages] [latency_ms]
+#
+# Starts a local aiosmtpd sink (no TLS/AUTH) and reports messages/sec for:
+#   per-message  - new connection + EHLO per message (the old send path)
+#   pooled       - one message per call over a pooled session
+#   batched      - batches of 50 messages over one pooled session
+# latency_ms adds an artificial delay to each SMTP command response,
+# approximating a remote server (default 5ms).
+
+import sys
+import os
+import asyncio
+import smtplib
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import SMTP as SMTPServer
+from app.utils.helpers import build_email_message
+from app.utils.smtp_pool import SMTPConnectionPool
+
+HOST = '127.0.0.1'
+PORT = 8025
+BATCH_SIZE = 50
+
+class SinkHandler:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return '250 OK'
+
+class SlowSMTP(SMTPServer):
+    latency = 0
+
+    async def push(self, status):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        await super().push(status)
+
+class SlowController(Controller):
+    def factory(self):
+        return SlowSMTP(self.handler, **self.SMTP_kwargs)
+
+def messages(count):
+    return [
+        build_email_message(f'guest{i}@example.com', f'Booking Confirmation - RT{i:06d}', 'Thank you for your booking.')
+        for i in range(count)
+    ]
+
+def per_message(msgs):
+    for msg in msgs:
+        with smtplib.SMTP(HOST, PORT) as server:
+            server.send_message(msg)
+
+def pooled(msgs):
+    pool = SMTPConnectionPool(HOST, PORT, use_tls=False)
+    for msg in msgs:
+        pool.send(msg)
+    pool.close_all()
+
+def batched(msgs):
+    pool = SMTPConnectionPool(HOST, PORT, use_tls=False)
+    for i in range(0, len(msgs), BATCH_SIZE):
+        assert not any(pool.send_batch(msgs[i:i + BATCH_SIZE]))
+    pool.close_all()
+
+def main(count=500, latency_ms=5):
+    os.environ.setdefault('SMTP_USERNAME', 'bookings@richmantravel.co.ke')
+    SlowSMTP.latency = latency_ms / 1000
+    handler = SinkHandler()
+    controller = SlowController(handler, hostname=HOST, port=PORT)
+    controller.start()
+    try:
+        msgs = messages(count)
+        print(f"{count} messages, {latency_ms}ms per SMTP reply")
+        print(f"{'mode':>12} {'seconds':>8} {'msgs/sec':>9}")
+        for name, fn in [('per-message', per_message), ('pooled', pooled), ('batched', batched)]:
+            before = handler.received
+            start = time.perf_counter()
+            fn(msgs)
+            elapsed = time.perf_counter() - start
+            assert handler.received - before == count
+            print(f"{name:>12} {elapsed:>8.2f} {count / elapsed:>9.1f}")
+    finally:
+        controller.stop()
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,94 @@
+# scripts/benchmark_unique_visitors.py - Unique visitors: exact sets vs HyperLogLog sketches
+#
+# Usage: python scripts/benchmark_unique_visitors.py [visits] [days]
+#
+# Generates a synthetic visit stream (10M visits over 30 days by default;
+# a pool of returning visitors plus one-off ones, spread over a handful of
+# pages) and counts distinct visitors per day, per page and over the whole
+# period twice: exactly with Python sets, and with the per-(day, page)
+# sketches VisitorSketchService keeps. Reports ingest time, memory/storage
+# size, query time and the estimation error of each.
+
+import sys
+import os
+import random
+import time
+from collections import defaultdict
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.hyperloglog import HyperLogLog
+
+PAGES = ['public.get_destinations', 'public.get_destination', 'public.get_featured_destinations',
+         'public.search_destinations', 'public.get_destination_availability']
+
+def visits(count, days, seed=42):
+    """Yield (day, page, visitor) with ~1 in 4 visits from a pool of regulars"""
+    rng = random.Random(seed)
+    regulars = max(count // 100, 1)
+    for i in range(count):
+        day = i * days // count
+        page = PAGES[min(int(rng.expovariate(1.0)), len(PAGES) - 1)]
+        if rng.random() < 0.25:
+            visitor = f'regular-{rng.randrange(regulars)}'
+        else:
+            visitor = f'visitor-{rng.randrange(count // 2)}'
+        yield day, page, visitor
+
+def error(estimate, exact):
+    return abs(estimate - exact) / exact * 100 if exact else 0.0
+
+def main(count=10_000_000, days=30):
+    print(f"{count} visits over {days} days, {len(PAGES)} pages")
+
+    start = time.perf_counter()
+    exact = defaultdict(set)
+    for day, page, visitor in visits(count, days):
+        exact[(day, '*')].add(visitor)
+        exact[(day, page)].add(visitor)
+    exact_ingest = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sketches = defaultdict(HyperLogLog)
+    for day, page, visitor in visits(count, days):
+        sketches[(day, '*')].add(visitor)
+        sketches[(day, page)].add(visitor)
+    sketch_ingest = time.perf_counter() - start
+
+    # Generating the stream is part of both timings; report it separately
+    start = time.perf_counter()
+    for _ in visits(count, days):
+        pass
+    generate = time.perf_counter() - start
+
+    exact_bytes = sum(sum(len(v) + 49 for v in members) for members in exact.values())
+    stored = {key: sketch.to_bytes() for key, sketch in sketches.items()}
+    sketch_bytes = sum(len(data) for data in stored.values())
+
+    print(f"{'':>8} {'ingest s':>9} {'us/visit':>9} {'size':>12}")
+    print(f"{'exact':>8} {exact_ingest - generate:>9.2f} {(exact_ingest - generate) / count * 1e6:>9.2f} {exact_bytes / 1e6:>10.1f}MB")
+    print(f"{'sketch':>8} {sketch_ingest - generate:>9.2f} {(sketch_ingest - generate) / count * 1e6:>9.2f} {sketch_bytes / 1e3:>10.1f}KB")
+
+    print(f"\n{'query':>24} {'exact':>10} {'estimate':>10} {'error %':>8} {'exact ms':>9} {'sketch ms':>10}")
+
+    def compare(label, keys):
+        start = time.perf_counter()
+        truth = len(set().union(*(exact[key] for key in keys)))
+        exact_ms = (time.perf_counter() - start) * 1000
+        # From the stored form, as AnalyticsService reads them
+        start = time.perf_counter()
+        estimate = HyperLogLog.merged(HyperLogLog.from_bytes(stored[key]) for key in keys).count()
+        sketch_ms = (time.perf_counter() - start) * 1000
+        print(f"{label:>24} {truth:>10} {estimate:>10} {error(estimate, truth):>8.2f} {exact_ms:>9.1f} {sketch_ms:>10.2f}")
+        return error(estimate, truth)
+
+    errors = [compare(f'day {day}', [(day, '*')]) for day in (0, days // 2, days - 1)]
+    errors += [compare(page.split('.')[-1], [(0, page)]) for page in PAGES[:3]]
+    errors.append(compare('week (7 days)', [(day, '*') for day in range(min(7, days))]))
+    errors.append(compare(f'all {days} days', [(day, '*') for day in range(days)]))
+
+    daily_errors = [error(sketches[(day, '*')].count(), len(exact[(day, '*')])) for day in range(days)]
+    print(f"\nMean daily error {sum(daily_errors) / days:.2f}%, worst {max(daily_errors):.2f}%, "
+          f"worst query above {max(errors):.2f}%")
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,92 @@
+# scripts/benchmark_visit_ingestion.py - Site visit ingestion: one transaction per visit vs buffered batches
+#
+# Usage: python scripts/benchmark_visit_ingestion.py [visits] [database_url]
+#
+# Migrates a scratch database (a temporary SQLite file by default) and
+# reports visits/sec and the time spent on the request path for:
+#   per-visit  - insert + rollup upserts + commit per visit (the old
+#                track_visit path)
+#   buffered   - VisitRecorder.record() on the request path, written by
+#                flush() in VISIT_FLUSH_BATCH-sized executemany batches
+
+import sys
+import os
+import tempfile
+import time
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def visit(i):
+    return {
+        'timestamp': datetime.utcnow(),
+        'ip_address': f'10.0.{i // 256 % 256}.{i % 256}',
+        'page': 'public.get_destinations',
+        'user_agent': 'Mozilla/5.0 (benchmark)',
+        'referer': '',
+        'session_id': f'session-{i % 500}'
+    }
+
+def per_visit(count):
+    from app.extensions import db
+    from app.services.visit_partitions import visit_partitions
+    from app.services.visit_rollups import VisitRollupService
+
+    for i in range(count):
+        values = visit(i)
+        visit_partitions.insert([values])
+        VisitRollupService.record([values['timestamp']])
+        db.session.commit()
+
+def buffered(count, recorder):
+    for i in range(count):
+        recorder.record(visit(i))
+
+def main(count=5000, database_url=None):
+    scratch = None
+    if not database_url:
+        scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        database_url = f'sqlite:///{scratch.name}'
+    os.environ['DATABASE_URL'] = database_url
+    # Batches are written on the size trigger and a final explicit flush
+    os.environ['VISIT_FLUSH_INTERVAL'] = '3600'
+    os.environ['VISIT_BUFFER_SIZE'] = str(count)
+
+    from flask_migrate import upgrade
+    from app import create_app
+    from app.extensions import db
+    from app.models import VisitRollupDaily
+    from app.services.visit_partitions import visit_partitions
+    from app.services.visit_recorder import visit_recorder
+
+    app = create_app('production')
+    try:
+        with app.app_context():
+            upgrade()
+            print(f"{count} visits on {db.engine.dialect.name}")
+            print(f"{'mode':>10} {'request ms':>11} {'total s':>8} {'visits/sec':>11}")
+
+            start = time.perf_counter()
+            per_visit(count)
+            elapsed = time.perf_counter() - start
+            print(f"{'per-visit':>10} {elapsed / count * 1000:>11.3f} {elapsed:>8.2f} {count / elapsed:>11.0f}")
+
+            start = time.perf_counter()
+            buffered(count, visit_recorder)
+            request_path = time.perf_counter() - start
+            # The background flusher may already be writing a full batch
+            visit_recorder.flush()
+            while visit_recorder.recorded < count:
+                time.sleep(0.001)
+            elapsed = time.perf_counter() - start
+            print(f"{'buffered':>10} {request_path / count * 1000:>11.3f} {elapsed:>8.2f} {count / elapsed:>11.0f}")
+
+            visits = visit_partitions.source(datetime.min, datetime.max)
+            assert db.session.query(db.func.count()).select_from(visits).scalar() == 2 * count
+            assert db.session.query(db.func.sum(VisitRollupDaily.visits)).scalar() == 2 * count
+    finally:
+        if scratch:
+            os.unlink(scratch.name)
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(*([int(args[0])] + args[1:] if args else []))
@@ -0,0 +1,158 @@
+# scripts/check_booking_search_plan.py - Query-plan checks for the admin booking search
+#
+# Usage: python scripts/check_booking_search_plan.py [database_url]
+#
+# Migrates a scratch database (a temporary SQLite file by default, or an
+# empty PostgreSQL database passed as database_url), seeds bookings, then
+# asserts that each admin search/filter combination is answered from its
+# index rather than a full scan of bookings, and returns the right rows.
+
+import sys
+import os
+import re
+import tempfile
+from datetime import date, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BOOKINGS = 5000
+
+# filters -> plan fragments that must appear, per dialect
+CASES = [
+    ({'q': 'smith'}, {
+        'sqlite': ['bookings_fts VIRTUAL TABLE INDEX'],
+        'postgresql': ['ix_bookings_name_trgm', 'ix_bookings_email_trgm']
+    }),
+    ({'q': 'example.org'}, {
+        'sqlite': ['bookings_fts VIRTUAL TABLE INDEX'],
+        'postgresql': ['ix_bookings_name_trgm', 'ix_bookings_email_trgm']
+    }),
+    ({'q': 'RT300101AAAA'}, {
+        'sqlite': ['USING INDEX sqlite_autoindex_bookings_1'],
+        'postgresql': ['bookings_booking_reference_key']
+    }),
+    ({'preferred_from': date(2030, 3, 1), 'preferred_to': date(2030, 3, 7)}, {
+        'sqlite': ['USING INDEX ix_bookings_preferred_date'],
+        'postgresql': ['ix_bookings_preferred_date']
+    }),
+    ({'status': ['confirmed']}, {
+        'sqlite': ['USING INDEX ix_bookings_status_created_at_id'],
+        'postgresql': ['ix_bookings_status_created_at_id']
+    }),
+    ({}, {
+        'sqlite': ['USING INDEX ix_bookings_created_at_id'],
+        'postgresql': ['ix_bookings_created_at_id']
+    }),
+]
+
+# A full scan of bookings is only acceptable for the unfiltered listing
+FULL_SCAN = {
+    'sqlite': re.compile(r'SCAN bookings(?!_fts)'),
+    'postgresql': re.compile(r'Seq Scan on bookings')
+}
+
+def seed():
+    from app.services.booking_service import BookingService
+
+    surnames = ['Smith', 'Otieno', 'Wanjiru', 'Kamau', 'Müller']
+    slugs = ['smith', 'otieno', 'wanjiru', 'kamau', 'mueller']
+    rows = []
+    for i in range(BOOKINGS):
+        surname = surnames[i % len(surnames)]
+        domain = 'example.org' if i % 7 == 0 else 'example.com'
+        rows.append((i + 2, {
+            'name': f'Guest {i} {surname}',
+            'email': f'guest{i}.{slugs[i % len(slugs)]}@{domain}',
+            'date': (date(2030, 1, 1) + timedelta(days=i % 365)).isoformat(),
+            'guests': 2
+        }))
+    report = BookingService.import_bookings(rows)
+    assert report['imported'] == BOOKINGS, report['errors'][:3]
+
+def explain(query, dialect):
+    from app.extensions import db
+    from sqlalchemy import text
+
+    compiled = query.statement.compile(
+        dialect=db.engine.dialect,
+        compile_kwargs={'literal_binds': True, 'render_postcompile': True}
+    )
+    if dialect == 'postgresql':
+        # Small tables favour a seq scan; make the planner show the index path
+        db.session.execute(text('SET LOCAL enable_seqscan = off'))
+        rows = db.session.execute(text(f'EXPLAIN {compiled}')).all()
+        return '\n'.join(row[0] for row in rows)
+    rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {compiled}')).all()
+    return '\n'.join(row[-1] for row in rows)
+
+def expected_ids(bookings, filters):
+    matches = []
+    for booking in bookings:
+        q = filters.get('q')
+        if q and q.upper() != booking.booking_reference and \
+                q.lower() not in booking.name.lower() and q.lower() not in booking.email.lower():
+            continue
+        if filters.get('status') and booking.status not in filters['status']:
+            continue
+        if 'preferred_from' in filters and booking.preferred_date < filters['preferred_from']:
+            continue
+        if 'preferred_to' in filters and booking.preferred_date > filters['preferred_to']:
+            continue
+        matches.append(booking.id)
+    return sorted(matches)
+
+def main(database_url=None):
+    scratch = None
+    if not database_url:
+        scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        database_url = f'sqlite:///{scratch.name}'
+    os.environ['DATABASE_URL'] = database_url
+
+    from flask_migrate import upgrade
+    from app import create_app
+    from app.extensions import db
+    from app.models import Booking
+    from app.services.booking_service import BookingService
+
+    app = create_app('production')
+    try:
+        with app.app_context():
+            upgrade()
+            seed()
+            db.session.execute(Booking.__table__.update().where(Booking.id % 4 == 0).values(status='confirmed'))
+            # Pin one reference so the exact-match case has a row to find
+            db.session.execute(Booking.__table__.update().where(Booking.id == 1).values(booking_reference='RT300101AAAA'))
+            db.session.commit()
+            if db.engine.dialect.name == 'postgresql':
+                db.session.execute(db.text('ANALYZE bookings'))
+            dialect = db.engine.dialect.name
+            bookings = Booking.query.all()
+
+            failures = 0
+            for filters, plans in CASES:
+                query = Booking.query.filter(
+                    *BookingService.filter_clauses(filters)
+                ).order_by(Booking.created_at.desc(), Booking.id.desc()).limit(21)
+                plan = explain(query, dialect)
+                db.session.rollback()
+
+                missing = [fragment for fragment in plans[dialect] if fragment not in plan]
+                if filters and FULL_SCAN[dialect].search(plan):
+                    missing.append('no full scan of bookings')
+                found = sorted(b.id for b in Booking.query.filter(*BookingService.filter_clauses(filters)))
+                wrong = found != expected_ids(bookings, filters)
+
+                status = 'FAIL' if missing or wrong else 'ok'
+                failures += status == 'FAIL'
+                print(f"{status:>4}  {filters}  ({len(found)} rows)")
+                if missing:
+                    print(f"      plan is missing {missing}:\n      " + plan.replace('\n', '\n      '))
+                if wrong:
+                    print('      rows differ from a full scan')
+
+            assert not failures, f'{failures} case(s) failed'
+    finally:
+        if scratch:
+            os.unlink(scratch.name)
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,162 @@
+# scripts/check_calendar_sync.py - End-to-end checks for the calendar outbox
+#
+# Usage: python scripts/check_calendar_sync.py [bookings]
+#
+# Migrates a scratch SQLite database, points CalendarService at the local
+# fake Calendar server and runs with CALENDAR_SYNC_ENABLED and no Celery
+# broker. Without a broker commits only queue outbox rows, so each step
+# drains the outbox itself, as `flask sync-calendar` does. Checks
+# that creates, edits, cancellations, imports and bulk status updates end up
+# as events, that batches carry many operations per HTTP request, that a
+# lost google_event_id is recovered without a duplicate event, and that
+# failed operations are retried.
+
+import sys
+import os
+import json
+import tempfile
+from datetime import date, datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fake_calendar_server import FakeCalendarServer
+
+def write_token(path):
+    # Long-lived access token so no refresh is attempted
+    expiry = (datetime.utcnow() + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%SZ')
+    with open(path, 'w') as token:
+        json.dump({
+            'token': 'fake-access-token',
+            'refresh_token': 'fake-refresh-token',
+            'client_id': 'fake-client',
+            'client_secret': 'fake-secret',
+            'token_uri': 'https://oauth2.googleapis.com/token',
+            'expiry': expiry
+        }, token)
+
+def check(name, condition, detail=''):
+    print(f"{'ok' if condition else 'FAIL':>4}  {name}" + (f"  ({detail})" if detail else ''))
+    return 0 if condition else 1
+
+def main(bookings=120):
+    server = FakeCalendarServer().start()
+    token = tempfile.NamedTemporaryFile(suffix='.json', delete=False)
+    scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    write_token(token.name)
+    os.environ.update({
+        'GOOGLE_TOKEN_FILE': token.name,
+        'GOOGLE_CALENDAR_API_ENDPOINT': server.endpoint,
+        'CALENDAR_SYNC_ENABLED': 'true',
+        'DATABASE_URL': f'sqlite:///{scratch.name}'
+    })
+    os.environ.pop('CELERY_BROKER_URL', None)
+    os.environ.pop('REDIS_URL', None)
+
+    from flask_migrate import upgrade
+    from app import create_app
+    from app.extensions import db
+    from app.models import Booking, CalendarOutbox
+    from app.services.booking_service import BookingService
+    from app.services.calendar_sync import calendar_sync, calendar_event_id
+
+    def event(booking):
+        return server.events.get(('primary', calendar_event_id(booking.id)))
+
+    def commit_and_sync():
+        db.session.commit()
+        return calendar_sync.drain()
+
+    app = create_app('production')
+    failures = 0
+    try:
+        with app.app_context():
+            upgrade()
+
+            # Single ORM writes
+            booking = Booking(
+                booking_reference='RT300101AAAA', name='Jane Smith', email='jane@example.com',
+                destination='maasai-mara', preferred_date=date(2030, 1, 1), guests=2
+            )
+            db.session.add(booking)
+            commit_and_sync()
+            failures += check('new booking creates its event',
+                              booking.google_event_id == calendar_event_id(booking.id) and event(booking) is not None)
+
+            booking.status = 'confirmed'
+            commit_and_sync()
+            failures += check('status change updates the event', 'Status: confirmed' in event(booking)['description'])
+
+            booking.admin_notes = 'Called back'
+            requests = server.requests
+            commit_and_sync()
+            failures += check('unsynced column changes make no API call', server.requests == requests)
+
+            booking.status = 'cancelled'
+            commit_and_sync()
+            failures += check('cancellation deletes the event',
+                              event(booking)['status'] == 'cancelled' and booking.google_event_id is None)
+
+            booking.status = 'confirmed'
+            commit_and_sync()
+            failures += check('reinstating restores the deleted event', event(booking)['status'] == 'confirmed')
+
+            # Set-based writes
+            batches = server.batches
+            rows = [(i + 2, {
+                'name': f'Guest {i}', 'email': f'guest{i}@example.com',
+                'date': (date(2030, 2, 1) + timedelta(days=i % 90)).isoformat(), 'guests': 2
+            }) for i in range(bookings)]
+            report = BookingService.import_bookings(rows, chunk_size=bookings)
+            calendar_sync.drain()
+            imported = Booking.query.filter(Booking.id != booking.id).all()
+            expected_batches = -(-bookings // calendar_sync.batch_size)
+            failures += check('import creates one event per booking',
+                              report['imported'] == bookings and all(event(b) for b in imported)
+                              and all(b.google_event_id for b in imported))
+            failures += check('import syncs in batch requests', server.batches - batches == expected_batches,
+                              f"{server.batches - batches} batch requests for {bookings} events")
+
+            batches = server.batches
+            BookingService.bulk_update_bookings([b.id for b in imported], {'status': 'confirmed'})
+            calendar_sync.drain()
+            failures += check('bulk status update updates every event',
+                              all('Status: confirmed' in event(b)['description'] for b in imported)
+                              and server.batches - batches == expected_batches)
+
+            # Idempotency: the event exists but the booking lost its event id
+            lost = imported[0]
+            db.session.execute(Booking.__table__.update().where(Booking.id == lost.id).values(google_event_id=None))
+            calendar_sync.enqueue([lost.id])
+            commit_and_sync()
+            db.session.refresh(lost)
+            failures += check('a repeated insert falls back to an update',
+                              lost.google_event_id == calendar_event_id(lost.id)
+                              and len(server.active_events()) == bookings + 1)
+
+            # Retries: the next operations fail, then succeed once due again
+            retried = imported[1:6]
+            server.fail_next = len(retried)
+            for b in retried:
+                b.status = 'completed'
+            commit_and_sync()
+            outbox = CalendarOutbox.query.all()
+            failures += check('failed operations stay queued with a backoff',
+                              len(outbox) == len(retried) and all(row.attempts == 1 for row in outbox)
+                              and all(row.next_attempt_at > datetime.utcnow() for row in outbox))
+
+            CalendarOutbox.query.update({'next_attempt_at': datetime.utcnow()})
+            stats = commit_and_sync()
+            failures += check('retried operations sync once due',
+                              stats['synced'] == len(retried) and CalendarOutbox.query.count() == 0
+                              and all('Status: completed' in event(b)['description'] for b in retried))
+
+            print(f"      {server.requests} HTTP requests, {server.batches} batches, {server.operations} operations")
+            assert not failures, f'{failures} check(s) failed'
+    finally:
+        server.stop()
+        os.unlink(token.name)
+        os.unlink(scratch.name)
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,74 @@
+# scripts/check_destination_funnel.py - End-to-end checks for the destination funnel
+#
+# Usage: python scripts/check_destination_funnel.py
+#
+# Drives listing, search, detail and booking traffic through the test client
+# against an in-memory database and checks what each funnel stage counts:
+# impressions as page visits, 200 detail pages (not 304s) as detail views,
+# every new booking as a booking, and that the rates stay between 0 and 1
+# even when bookings outnumber detail views.
+
+import sys
+import os
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SLUG = 'maasai-mara-safari'
+
+def check(name, condition, detail=''):
+    print(f"{'ok' if condition else 'FAIL':>4}  {name}" + (f"  ({detail})" if detail else ''))
+    return 0 if condition else 1
+
+def main():
+    import io
+    import contextlib
+    from app import create_app
+    from app.extensions import db, limiter
+    from app.services.funnel_service import FunnelService
+    from scripts.seed_data import seed_database
+
+    app = create_app('testing')
+    limiter.enabled = False
+    client = app.test_client()
+    today = datetime.utcnow().date()
+
+    def funnel(slug=SLUG):
+        with app.app_context():
+            return FunnelService.get_funnel(today, today, slug)
+
+    failures = 0
+    with app.app_context():
+        db.create_all()
+        with contextlib.redirect_stdout(io.StringIO()):
+            seed_database()
+
+    listing = client.get('/api/destinations')
+    client.get('/api/destinations', headers={'If-None-Match': listing.headers['ETag']})
+    client.get('/api/destinations/search?q=safari')
+    counts = funnel()['totals']
+    failures += check('listings and search count as page visits, 304s do not', counts['page_visits'] == 2,
+                      f"{counts['page_visits']} page visits")
+
+    detail = client.get(f'/api/destinations/{SLUG}')
+    client.get(f'/api/destinations/{SLUG}', headers={'If-None-Match': detail.headers['ETag']})
+    client.get(f'/api/destinations/{SLUG}/availability')
+    counts = funnel()['totals']
+    failures += check('only 200 detail pages count as detail views', counts['detail_views'] == 1,
+                      f"{counts['detail_views']} detail views")
+
+    # Form bookings without a detail view: bookings outnumber detail views
+    for i in range(4):
+        client.post('/api/bookings', json={
+            'name': 'Jane Doe', 'email': f'jane{i}@example.com', 'destination': SLUG, 'guests': 2,
+            'date': (today + timedelta(days=30 + i)).isoformat()
+        })
+    counts = funnel()['totals']
+    rates = [counts['view_rate'], counts['booking_rate'], counts['conversion_rate']]
+    failures += check('every new booking is counted', counts['bookings'] == 4, f"{counts['bookings']} bookings")
+    failures += check('rates stay between 0 and 1', all(0 <= rate <= 1 for rate in rates),
+                      ', '.join(f'{rate}' for rate in rates))
+
+    assert not failures, f'{failures} check(s) failed'
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+# scripts/fake_calendar_server.py - Local stand-in for the Google Calendar v3 events API
+#
+# Usage: python scripts/fake_calendar_server.py [port] [latency_ms]
+#
+# Serves events.insert/get/update/delete for any calendar id from memory,
+# plus multipart/mixed batch requests at /batch/calendar/v3, with HTTP/1.1
+# keep-alive. Point the app at it with
+#   GOOGLE_CALENDAR_API_ENDPOINT=http://127.0.0.1:<port>/
+# Authorization headers are accepted but not checked; POST /token stands in
+# for the OAuth token endpoint and counts refreshes. latency_ms delays
+# every response, approximating the round trip to Google. Set `fail_next`
+# to make the next N operations answer 503.
+
+import sys
+import json
+import re
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+EVENT_PATH = re.compile(r'^(?:/calendar/v3)?/calendars/(?P<calendar>[^/]+)/events(?:/(?P<event>[^/?]+))?(?:\?.*)?$')
+BATCH_PATH = '/batch/calendar/v3'
+
+STATUS_TEXT = {200: 'OK', 204: 'No Content', 404: 'Not Found', 405: 'Method Not Allowed',
+               409: 'Conflict', 410: 'Gone', 503: 'Service Unavailable'}
+
+def error(status, message):
+    return status, {'error': {'code': status, 'message': message}}
+
+class CalendarHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; don't let Nagle hold the body
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def _send(self, status, body=b'', content_type='application/json; charset=UTF-8'):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        body = self._read_body()
+        self.server.requests += 1
+
+        if self.command == 'POST' and self.path == '/token':
+            self.server.token_refreshes += 1
+            return self._send(200, json.dumps({
+                'access_token': f'fake-access-token-{self.server.token_refreshes}',
+                'expires_in': 3600,
+                'token_type': 'Bearer'
+            }).encode('utf-8'))
+
+        if self.command == 'POST' and self.path == BATCH_PATH:
+            return self._batch(body)
+
+        status, payload = self.server.dispatch(self.command, self.path, body)
+        self._send(status, json.dumps(payload).encode('utf-8') if payload is not None else b'')
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def _batch(self, body):
+        self.server.batches += 1
+        message = BytesParser().parsebytes(
+            b'Content-Type: ' + self.headers['Content-Type'].encode('ascii') + b'\r\n\r\n' + body
+        )
+        boundary = f'batch_{uuid.uuid4().hex}'
+        parts = []
+        for part in message.get_payload():
+            method, path, part_body = self._parse_http(part.get_payload(decode=False))
+            status, payload = self.server.dispatch(method, path, part_body)
+            content_id = part['Content-ID'].strip('<>')
+            response_body = json.dumps(payload) if payload is not None else ''
+            parts.append(
+                f'--{boundary}\r\n'
+                f'Content-Type: application/http\r\n'
+                f'Content-ID: <response-{content_id}>\r\n\r\n'
+                f'HTTP/1.1 {status} {STATUS_TEXT.get(status, "")}\r\n'
+                f'Content-Type: application/json; charset=UTF-8\r\n'
+                f'Content-Length: {len(response_body.encode("utf-8"))}\r\n\r\n'
+                f'{response_body}\r\n'
+            )
+        parts.append(f'--{boundary}--\r\n')
+        self._send(200, ''.join(parts).encode('utf-8'), f'multipart/mixed; boundary={boundary}')
+
+    @staticmethod
+    def _parse_http(text):
+        """Split an embedded 'application/http' request into (method, path, body)"""
+        head, _, body = text.replace('\r\n', '\n').partition('\n\n')
+        method, path = head.split('\n', 1)[0].split(' ')[:2]
+        return method, path, body.encode('utf-8')
+
+class FakeCalendarServer(ThreadingHTTPServer):
+    """In-memory Calendar API; `events` maps (calendar_id, event_id) to the event"""
+
+    daemon_threads = True
+
+    def __init__(self, port=0, latency_ms=0):
+        super().__init__(('127.0.0.1', port), CalendarHandler)
+        self.latency = latency_ms / 1000
+        self.events = {}
+        self.requests = 0
+        self.batches = 0
+        self.operations = 0
+        self.token_refreshes = 0
+        self.fail_next = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def endpoint(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/'
+
+    def dispatch(self, method, path, body):
+        """Apply one events API call; returns (status, JSON payload or None)"""
+        match = EVENT_PATH.match(path)
+        if not match:
+            return error(404, 'Not Found')
+        key = (match.group('calendar'), match.group('event'))
+
+        with self._lock:
+            self.operations += 1
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                return error(503, 'Backend Error')
+
+            if method == 'POST' and key[1] is None:
+                event = json.loads(body or b'{}')
+                event_id = event.get('id') or uuid.uuid4().hex
+                # Client-supplied ids stay taken after deletion, as in the real API
+                if (key[0], event_id) in self.events:
+                    return error(409, 'The requested identifier already exists.')
+                event = dict(event, id=event_id)
+                self.events[(key[0], event_id)] = event
+                return 200, event
+
+            if key[1] is None:
+                return error(405, 'Method Not Allowed')
+            event = self.events.get(key)
+
+            if method == 'GET':
+                return (200, event) if event else error(404, 'Not Found')
+            if method == 'PUT':
+                if event is None:
+                    return error(404, 'Not Found')
+                event = dict(json.loads(body or b'{}'), id=key[1])
+                self.events[key] = event
+                return 200, event
+            if method == 'DELETE':
+                if event is None:
+                    return error(404, 'Not Found')
+                if event.get('status') == 'cancelled':
+                    return error(410, 'Resource has been deleted')
+                # Deleted events keep their id with status 'cancelled'
+                self.events[key] = dict(event, status='cancelled')
+                return 204, None
+            return error(405, 'Method Not Allowed')
+
+    def active_events(self):
+        """Events that have not been deleted"""
+        return {key: event for key, event in self.events.items() if event.get('status') != 'cancelled'}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    server = FakeCalendarServer(*args)
+    print(f'Fake Calendar API on {server.endpoint}')
+    server.serve_forever()
@@ -29,7 +29,8 @@ def seed_database():
                 'price_range': '$800 - $1200',
                 'difficulty_level': 'easy',
                 'best_time_to_visit': 'July - October',
-                'is_featured': True
+                'is_featured': True,
+                'daily_capacity': 30
             },
             {
                 'name': 'Mount Kenya Expedition',
@@ -41,7 +42,8 @@ def seed_database():
                 'price_range': '$600 - $900',
                 'difficulty_level': 'challenging',
                 'best_time_to_visit': 'December - March, June - October',
-                'is_featured': True
+                'is_featured': True,
+                'daily_capacity': 12
             },
             {
                 'name': 'Coastal Paradise - Diani Beach',
@@ -53,7 +55,8 @@ def seed_database():
                 'price_range': '$300 - $500',
                 'difficulty_level': 'easy',
                 'best_time_to_visit': 'October - April',
-                'is_featured': True
+                'is_featured': True,
+                'daily_capacity': 40
             },
             {
                 'name': 'Hell\'s Gate National Park',
@@ -65,7 +68,8 @@ def seed_database():
                 'price_range': '$150 - $250',
                 'difficulty_level': 'moderate',
                 'best_time_to_visit': 'Year Round',
-                'is_featured': False
+                'is_featured': False,
+                'daily_capacity': 25
             }
         ]
         
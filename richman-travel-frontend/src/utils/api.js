@@ -54,6 +54,11 @@ class ApiClient {
     return this.request(`/destinations${query}`);
   }
 
+  async searchDestinations(query, limit = 20) {
+    const params = new URLSearchParams({ q: query, limit });
+    return this.request(`/destinations/search?${params}`);
+  }
+
   async getDestinationBySlug(slug) {
     return this.request(`/destinations/${slug}`);
   }